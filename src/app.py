@@ -1,9 +1,31 @@
 import streamlit as st
 import pandas as pd
-import pickle
+import numpy as np
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
-from inference import predict_churn, preprocess_input
+from inference import record_features, score_record
+from explain import get_explainer
+from registry import get_registry
+from prediction_cache import get_prediction_cache
+from export import EXPORT_FORMATS, export_tempfile
+from jobs import DONE, FINISHED_STATES, get_job_manager
+from score_store import get_score_store
+from results_view import (
+    CATEGORY_COLUMN,
+    ID_COLUMN,
+    LARGE_BATCH_THRESHOLD,
+    PAGE_SIZE,
+    PROBABILITY_COLUMN,
+    REASONS_COLUMN,
+    TOP_K,
+    build_results_frame,
+    page_count,
+    probability_histogram,
+    results_page,
+    risk_counts,
+    sort_order,
+    top_k,
+)
 import logging
 import os
 
@@ -15,15 +37,29 @@ logger = logging.getLogger(__name__)
 current_dir = os.path.dirname(os.path.abspath(__file__))  # Поточна директорія (src)
 project_root = os.path.dirname(current_dir)  # Корінь проєкту (на один рівень вище)
 
-# Завантаження моделі та scaler із кореня проєкту
+# Кількість рядків CSV, що читаються для попереднього перегляду та перевірки колонок
+PREVIEW_ROWS = 1000
+
+
+def drop_export(view):
+    # Видалення тимчасового файлу експорту попереднього формату або партії
+    export = view.get("export") if view is not None else None
+    if export is not None and os.path.exists(export[1]):
+        os.remove(export[1])
+
+
+# Модель, scaler та статистики препроцесингу завантажуються один раз на процес через
+# реєстр, який підміняє їх при зміні файлів у корені проєкту
 try:
-    model_path = os.path.join(project_root, "model.pkl")
-    scaler_path = os.path.join(project_root, "scaler.pkl")
-    with open(model_path, "rb") as f:
-        model = pickle.load(f)
-    with open(scaler_path, "rb") as f:
-        scaler = pickle.load(f)
-    logger.info("Модель і scaler успішно завантажено.")
+    model, scaler, stats, model_version = get_registry(project_root).get()
+    # Кеш прогнозів для повторно завантажених клієнтів (скидається при зміні моделі)
+    prediction_cache = get_prediction_cache()
+    # Сховище оцінок: прогнози всіх сесій з ID клієнтів зберігаються на диску
+    score_store = get_score_store()
+    # Пояснення прогнозів: ознаки з найбільшим внеском для кожного клієнта
+    explainer = get_explainer(model)
+    # Прогноз для CSV виконується фоновими завданнями, спільними для всіх сесій процесу
+    job_manager = get_job_manager(cache=prediction_cache, store=score_store, explain=True)
 except Exception as e:
     st.error(f"Не вдалося завантажити модель або scaler: {e}")
     logger.error(f"Не вдалося завантажити модель або scaler: {e}")
@@ -36,9 +72,13 @@ if "input_type" not in st.session_state:
     st.session_state.input_type = "Завантажити дані у форматі CSV"
 if "original_ids" not in st.session_state:
     st.session_state.original_ids = None
+if "job_id" not in st.session_state:
+    # Після перезавантаження сторінки завдання відновлюється з параметра URL
+    st.session_state.job_id = st.query_params.get("job")
 
 # Створення Streamlit-додатка
 st.title("Прогнозування Відтоку Клієнтів для Телекомунікаційної компанії")
+st.caption(f"Версія моделі: {model_version}")
 
 # Документація про необхідні колонки (випадаючий список)
 with st.expander("📋 Інструкція для CSV-файлу"):
@@ -92,7 +132,8 @@ with tabs[0]:
 
     if uploaded_file is not None:
         try:
-            st.session_state.data = pd.read_csv(uploaded_file)
+            # Для перевірки колонок достатньо початку файлу; весь файл читає фонове завдання
+            st.session_state.data = pd.read_csv(uploaded_file, nrows=PREVIEW_ROWS)
             # Зберігаємо оригінальні ID перед обробкою
             id_col = None
             for col in st.session_state.data.columns:
@@ -134,6 +175,8 @@ with tabs[0]:
             st.success("Файл успішно завантажено!")
             logger.info("Файл CSV успішно завантажено.")
             st.dataframe(st.session_state.data)
+            if len(st.session_state.data) == PREVIEW_ROWS:
+                st.caption(f"Показано перші {PREVIEW_ROWS} рядків файлу.")
         except Exception as e:
             st.error(f"Не вдалося прочитати файл: {e}")
             logger.error(f"Не вдалося прочитати файл: {e}")
@@ -151,14 +194,13 @@ with tabs[0]:
     if st.button("Зробити прогноз для CSV", key="predict_csv"):
         if st.session_state.data is not None:
             try:
-                processed_data = preprocess_input(
-                    st.session_state.data, scaler=scaler, logger=logger
-                )
-                preds = predict_churn(model, processed_data, logger=logger)
-                logger.info(f"Прогноз виконано для CSV. Кількість клієнтів: {len(preds)}")
-
-                st.session_state.preds = preds
-                st.session_state.show_results = True
+                # Файл обробляється у фоні частинами; той самий файл для тієї самої версії
+                # моделі повертає вже існуюче завдання без повторного прогнозування
+                job_id = job_manager.submit(uploaded_file.getvalue(), uploaded_file.name)
+                st.session_state.job_id = job_id
+                st.session_state.job_loaded = None
+                st.query_params["job"] = job_id
+                logger.info(f"Прогноз для CSV поставлено в чергу: завдання {job_id}")
             except Exception as e:
                 st.error(f"Помилка під час прогнозування: {str(e)}")
                 logger.error(f"Помилка під час прогнозування: {str(e)}")
@@ -167,6 +209,58 @@ with tabs[0]:
             st.error("Будь ласка, завантажте CSV-файл перед прогнозуванням.")
             st.session_state.show_results = False
 
+    @st.fragment(run_every=1)
+    def job_progress(job_id):
+        """
+        Прогрес фонового завдання; оновлюється щосекунди без перезапуску всієї сторінки.
+
+        Args:
+            job_id (str): ID завдання.
+        """
+        status = job_manager.status(job_id)
+        if status["state"] in FINISHED_STATES:
+            # Результати завантажуються повним перезапуском сторінки
+            st.rerun()
+        rows_total = max(status["rows_total"], 1)
+        st.progress(
+            min(status["rows_done"] / rows_total, 1.0),
+            text=f"Прогнозування: {status['rows_done']} з ~{status['rows_total']} рядків",
+        )
+        if st.button("Скасувати", key="cancel_job"):
+            job_manager.cancel(job_id)
+            logger.info(f"Завдання {job_id} скасовано користувачем.")
+
+    job_id = st.session_state.job_id
+    if job_id is not None and st.session_state.get("job_loaded") != job_id:
+        status = job_manager.status(job_id)
+        if status is None:
+            st.warning(f"Завдання {job_id} не знайдено.")
+            st.session_state.job_id = None
+            st.query_params.pop("job", None)
+        elif status["state"] == DONE:
+            results = job_manager.results(job_id)
+            logger.info(f"Прогноз виконано для CSV. Кількість клієнтів: {len(results)}")
+            st.session_state.preds = results["probability"].to_numpy()
+            st.session_state.original_ids = results["id"] if status["id_column"] else None
+            st.session_state.reasons = (
+                results.filter(regex="^(reason|contribution)_")
+                if "reason_1" in results.columns
+                else None
+            )
+            st.session_state.input_type = "Завантажити дані у форматі CSV"
+            st.session_state.show_results = True
+            st.session_state.job_loaded = job_id
+        elif status["state"] in FINISHED_STATES:
+            messages = {
+                "failed": f"Помилка під час прогнозування: {status['error']}",
+                "cancelled": "Прогнозування скасовано.",
+                "interrupted": "Прогнозування перервано перезапуском сервера. Запустіть знову.",
+            }
+            st.warning(messages[status["state"]])
+            st.session_state.job_loaded = job_id
+        else:
+            job_progress(job_id)
+
 # Вкладка 2: Ручне введення
 with tabs[1]:
     st.subheader("Введення даних клієнта")
@@ -186,6 +280,12 @@ with tabs[1]:
         download_over_limit = st.selectbox(
             "Скачування поза лімітом", options=[0, 1, 2, 3, 4, 5, 6, 7]
         )
+        # Ручне введення зазвичай перевіряє сценарії "що, якщо", тож у сховище оцінок
+        # прогноз потрапляє лише на явний запит
+        save_score = st.checkbox(
+            "Зберегти прогноз у сховищі оцінок",
+            help="Прогноз замінить збережену оцінку клієнта з цим id для поточної моделі.",
+        )
 
         submitted = st.form_submit_button("Зробити прогноз")
 
@@ -195,31 +295,40 @@ with tabs[1]:
                 st.error("Введені значення не можуть бути від’ємними!")
                 logger.error("Введені від’ємні значення при ручному вводі.")
             else:
-                st.session_state.data = pd.DataFrame(
-                    [
-                        {
-                            "id": id,
-                            "is_tv_subscriber": is_tv_subscriber,
-                            "is_movie_package_subscriber": is_movie_package_subscriber,
-                            "subscription_age": subscription_age,
-                            "reamining_contract": reamining_contract,
-                            "service_failure_count": service_failure_count,
-                            "download_avg": download_avg,
-                            "upload_avg": upload_avg,
-                            "download_over_limit": download_over_limit,
-                        }
-                    ]
-                )
+                record = {
+                    "id": id,
+                    "is_tv_subscriber": is_tv_subscriber,
+                    "is_movie_package_subscriber": is_movie_package_subscriber,
+                    "subscription_age": subscription_age,
+                    "reamining_contract": reamining_contract,
+                    "service_failure_count": service_failure_count,
+                    "download_avg": download_avg,
+                    "upload_avg": upload_avg,
+                    "download_over_limit": download_over_limit,
+                }
+                st.session_state.data = pd.DataFrame([record])
                 st.session_state.original_ids = [id]  # Зберігаємо введений ID
                 logger.info("Дані успішно створено з ручного введення.")
                 st.session_state.input_type = "Ввести вручну"
 
-                # Виконуємо прогноз для ручного введення
+                # Виконуємо прогноз для ручного введення (без pandas-препроцесингу)
                 try:
-                    processed_data = preprocess_input(
-                        st.session_state.data, scaler=scaler, logger=logger
+                    p = score_record(
+                        record,
+                        model,
+                        scaler,
+                        stats,
+                        logger=logger,
+                        cache=prediction_cache,
+                        model_version=model_version,
+                        store=score_store.batch([id]) if save_score else None,
+                    )
+                    preds = np.array([p])
+                    st.session_state.reasons = (
+                        explainer.top_features(record_features(record, scaler, stats)[None, :])
+                        if explainer is not None
+                        else None
                     )
-                    preds = predict_churn(model, processed_data, logger=logger)
                     logger.info(
                         f"Прогноз виконано для ручного введення. Кількість клієнтів: {len(preds)}"
                     )
@@ -231,6 +340,34 @@ with tabs[1]:
                     logger.error(f"Помилка під час прогнозування: {str(e)}")
                     st.session_state.show_results = False
 
+# Збережені прогнози: запити до сховища оцінок без повторного прогнозування
+with st.expander("🗄️ Збережені прогнози"):
+    st.caption("Клієнти з найвищим ризиком серед усіх збережених прогнозів поточної моделі.")
+    threshold_col, k_col = st.columns(2)
+    store_threshold = threshold_col.number_input(
+        "Поріг ймовірності",
+        min_value=0.0,
+        max_value=1.0,
+        value=0.7,
+        step=0.05,
+        key="store_threshold",
+    )
+    store_k = k_col.number_input(
+        "Кількість клієнтів", min_value=1, max_value=1000, value=TOP_K, key="store_k"
+    )
+    st.metric(
+        f"Клієнтів з ймовірністю вище {store_threshold:.2f}",
+        score_store.count_above(store_threshold, model_version),
+    )
+    st.dataframe(
+        score_store.above(store_threshold, model_version, limit=store_k),
+        hide_index=True,
+        column_config={"probability": st.column_config.NumberColumn(format="%.2f")},
+    )
+    store_id = st.text_input("Пошук клієнта за ID", key="store_lookup")
+    if store_id:
+        st.dataframe(score_store.lookup(store_id.strip()), hide_index=True)
+
 # Відображення результатів прогнозування
 if (
     "show_results" in st.session_state
@@ -247,40 +384,123 @@ if (
         "Середня": "Клієнт (ID: {client_id}) може бути в зоні ризику, варто звернути увагу.",
         "Низька": "Клієнт (ID: {client_id}), ймовірно, залишиться з компанією.",
     }
-    for i, p in enumerate(preds):
-        # Отримуємо ID клієнта перед умовними операторами
-        client_id = (
-            st.session_state.original_ids[i] if st.session_state.original_ids is not None else i + 1
+    # Великі партії показуються зведено: кількість елементів на сторінці не залежить
+    # від кількості клієнтів, а таблиця, порядки сортування та експорт будуються один раз
+    large_batch = len(preds) > LARGE_BATCH_THRESHOLD
+    view = st.session_state.get("results_view")
+    if view is None or view["preds"] is not preds:
+        drop_export(view)
+        view = {
+            "preds": preds,
+            "frame": build_results_frame(
+                preds, st.session_state.original_ids, st.session_state.get("reasons")
+            ),
+            "orders": {},
+            # (формат, шлях до тимчасового файлу) останнього запитаного експорту
+            "export": None,
+        }
+        st.session_state.results_view = view
+        # Нова партія відкривається з першої сторінки
+        st.session_state.results_page = 1
+    results_df = view["frame"]
+
+    if large_batch:
+        logger.info(f"Зведене відображення результатів для {len(preds)} клієнтів.")
+        counts = risk_counts(preds)
+        for column, (level, count) in zip(st.columns(len(counts)), counts.items()):
+            column.metric(
+                f"{level} ймовірність", f"{count}", f"{count / len(preds):.1%}", delta_color="off"
+            )
+
+        st.subheader("Розподіл ймовірностей відтоку")
+        hist, edges = probability_histogram(preds)
+        centers = (edges[:-1] + edges[1:]) / 2
+        fig = go.Figure(
+            go.Bar(
+                x=centers,
+                y=hist,
+                width=edges[1] - edges[0],
+                marker_color=[
+                    "red" if c > 0.7 else "orange" if c > 0.3 else "green" for c in centers
+                ],
+            )
+        )
+        fig.update_layout(
+            xaxis_title="Ймовірність відтоку", yaxis_title="Кількість клієнтів", bargap=0.05
         )
+        st.plotly_chart(fig)
 
-        if p > 0.7:
-            color = "red"
-            level = "Висока"
-        elif p < 0.3:
-            color = "green"
-            level = "Низька"
-        else:
-            color = "orange"
-            level = "Середня"
-
-        st.markdown(
-            f"""
-            <div style='
-                background-color:{color};
-                padding:10px;
-                border-radius:5px;
-                color:white;
-                font-weight:bold;
-                margin-bottom:10px'>
-                ⚠️ Клієнт (ID: {client_id}): {level} ймовірність відтоку — {p:.2f}
-            </div>
-            <div style='padding:5px; color:black;'>
-                {recommendation[level].format(client_id=client_id)}
-            </div>
-            """,
-            unsafe_allow_html=True,
+        st.subheader(f"Топ-{TOP_K} клієнтів з найвищим ризиком")
+        st.dataframe(
+            top_k(results_df),
+            hide_index=True,
+            column_config={PROBABILITY_COLUMN: st.column_config.NumberColumn(format="%.2f")},
         )
 
+        st.subheader("Усі результати")
+        sort_col, order_col, page_col = st.columns(3)
+        sort_by = sort_col.selectbox(
+            "Сортувати за", [PROBABILITY_COLUMN, ID_COLUMN, CATEGORY_COLUMN], key="results_sort"
+        )
+        ascending = (
+            order_col.radio("Порядок", ["За спаданням", "За зростанням"], key="results_order")
+            == "За зростанням"
+        )
+        n_pages = page_count(len(results_df))
+        page = page_col.number_input(
+            f"Сторінка (з {n_pages})", min_value=1, max_value=n_pages, step=1, key="results_page"
+        )
+        if (sort_by, ascending) not in view["orders"]:
+            view["orders"][(sort_by, ascending)] = sort_order(results_df, sort_by, ascending)
+        st.dataframe(
+            results_page(results_df, view["orders"][(sort_by, ascending)], page),
+            hide_index=True,
+            column_config={PROBABILITY_COLUMN: st.column_config.NumberColumn(format="%.2f")},
+        )
+        first_row = (page - 1) * PAGE_SIZE + 1
+        st.caption(
+            f"Рядки {first_row}–{min(page * PAGE_SIZE, len(results_df))} з {len(results_df)}"
+        )
+    else:
+        for i, p in enumerate(preds):
+            # Отримуємо ID клієнта перед умовними операторами
+            client_id = (
+                st.session_state.original_ids[i]
+                if st.session_state.original_ids is not None
+                else i + 1
+            )
+
+            if p > 0.7:
+                color = "red"
+                level = "Висока"
+            elif p < 0.3:
+                color = "green"
+                level = "Низька"
+            else:
+                color = "orange"
+                level = "Середня"
+
+            st.markdown(
+                f"""
+                <div style='
+                    background-color:{color};
+                    padding:10px;
+                    border-radius:5px;
+                    color:white;
+                    font-weight:bold;
+                    margin-bottom:10px'>
+                    ⚠️ Клієнт (ID: {client_id}): {level} ймовірність відтоку — {p:.2f}
+                </div>
+                <div style='padding:5px; color:black;'>
+                    {recommendation[level].format(client_id=client_id)}
+                </div>
+                """,
+                unsafe_allow_html=True,
+            )
+            # Чинники, що найбільше підвищують ймовірність відтоку саме цього клієнта
+            if REASONS_COLUMN in results_df.columns and results_df[REASONS_COLUMN].iat[i]:
+                st.caption(f"Основні чинники ризику: {results_df[REASONS_COLUMN].iat[i]}")
+
     # Візуалізація для одного користувача
     if len(preds) == 1:
         client_id = (
@@ -307,33 +527,35 @@ if (
 
     # Таблиця та експорт для CSV
     if input_type == "Завантажити дані у форматі CSV":
-        # Використовуємо збережені оригінальні ID
-        if st.session_state.original_ids is not None:
-            client_ids = st.session_state.original_ids
-        else:
-            client_ids = range(1, len(preds) + 1)
-
-        results_df = pd.DataFrame(
-            {
-                "ID клієнта": client_ids,
-                "Ймовірність відтоку": [f"{p:.2f}" for p in preds],
-                "Категорія ризику": [
-                    "Висока" if p > 0.7 else "Середня" if p > 0.3 else "Низька" for p in preds
-                ],
-            }
-        )
-        st.subheader("Підсумкова таблиця результатів")
-        st.dataframe(results_df)
-        results_csv = results_df.to_csv(index=False)
-        st.download_button(
-            label="Завантажити результати прогнозу",
-            data=results_csv,
-            file_name="churn_predictions.csv",
-            mime="text/csv",
-        )
+        if not large_batch:
+            st.subheader("Підсумкова таблиця результатів")
+            st.dataframe(
+                results_df,
+                column_config={PROBABILITY_COLUMN: st.column_config.NumberColumn(format="%.2f")},
+            )
+        # Експорт пишеться частинами у тимчасовий файл; зберігається лише останній
+        # запитаний формат, тож пам'ять сесії не росте з кількістю форматів
+        export_format = st.selectbox("Формат експорту", list(EXPORT_FORMATS), key="export_format")
+        if view["export"] is None or view["export"][0] != export_format:
+            drop_export(view)
+            view["export"] = None
+            try:
+                view["export"] = (export_format, export_tempfile(results_df, export_format))
+            except ValueError as e:
+                st.error(str(e))
+                logger.error(str(e))
+        if view["export"] is not None:
+            spec = EXPORT_FORMATS[export_format]
+            with open(view["export"][1], "rb") as f:
+                st.download_button(
+                    label="Завантажити результати прогнозу",
+                    data=f,
+                    file_name=f"churn_predictions{spec['extension']}",
+                    mime=spec["mime"],
+                )
 
     # Візуалізація для кількох клієнтів (датасет)
-    if input_type == "Завантажити дані у форматі CSV" and len(preds) > 1:
+    if input_type == "Завантажити дані у форматі CSV" and 1 < len(preds) <= LARGE_BATCH_THRESHOLD:
         st.subheader("Візуалізація ймовірностей відтоку")
         logger.info("Створюємо гістограму для датасету...")
         plt.style.use("ggplot")
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from compiled_forest import CompiledForest, compile_forest
+from preprocessing import EXPECTED_COLUMNS, NUMERIC_COLS, validate_preprocessing_stats
+
+# Формат і версія пакета артефактів моделі
+BUNDLE_FORMAT = "churn-model-bundle"
+BUNDLE_FORMAT_VERSION = 1
+
+# Масиви пакета: назва -> очікуваний тип даних
+BUNDLE_ARRAYS = {
+    "features": "int64",
+    "thresholds": "float64",
+    "missing_go_left": "bool",
+    "leaf_values": "float64",
+    "scaler_mean": "float64",
+    "scaler_scale": "float64",
+    "scaler_var": "float64",
+}
+
+
+def save_bundle(model, scaler, stats, path):
+    """
+    Збереження моделі, scaler та статистик препроцесингу як пакета сирих масивів.
+
+    Пакет - каталог з файлами .npy (по одному на масив) та manifest.json зі схемою,
+    порядком ознак, статистиками препроцесингу та версією (хешем вмісту). Каталог
+    записується поруч і замінюється цілком, тому читач не побачить частковий пакет.
+
+    Args:
+        model: RandomForestClassifier або CompiledForest.
+        scaler (StandardScaler): Навчений StandardScaler.
+        stats (dict): Статистики препроцесингу.
+        path (str): Шлях до каталогу пакета (наприклад, model_bundle).
+
+    Returns:
+        str: Версія пакета.
+    """
+    if not isinstance(model, CompiledForest):
+        model = compile_forest(model)
+
+    arrays = {
+        "features": model.features.astype(np.int64),
+        "thresholds": model.thresholds,
+        "missing_go_left": model.missing_go_left,
+        "leaf_values": model.leaf_values,
+        "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+        "scaler_var": np.asarray(scaler.var_, dtype=np.float64),
+    }
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "feature_names": [str(name) for name in model.feature_names_in_],
+        "numeric_cols": list(NUMERIC_COLS),
+        "classes": [int(c) for c in model.classes_],
+        "scaler_n_samples_seen": int(scaler.n_samples_seen_),
+        "preprocessing_stats": stats,
+        "arrays": {
+            name: {"file": f"{name}.npy", "dtype": str(a.dtype), "shape": list(a.shape)}
+            for name, a in arrays.items()
+        },
+    }
+
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8"))
+    for name in BUNDLE_ARRAYS:
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    manifest["version"] = digest.hexdigest()[:12]
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, a in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), a)
+    with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return manifest["version"]
+
+
+def read_manifest(path):
+    """
+    Читання та перевірка manifest.json пакета.
+
+    Args:
+        path (str): Шлях до каталогу пакета.
+
+    Returns:
+        dict: Маніфест пакета.
+
+    Raises:
+        ValueError: Якщо формат, версія формату або порядок ознак не підтримуються.
+    """
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Невідомий формат пакета: {manifest.get('format')}.")
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Непідтримувана версія формату пакета: {manifest.get('format_version')}. "
+            f"Очікується {BUNDLE_FORMAT_VERSION}."
+        )
+    if manifest.get("feature_names") != EXPECTED_COLUMNS:
+        raise ValueError("Порядок ознак у пакеті не збігається з EXPECTED_COLUMNS.")
+    if manifest.get("numeric_cols") != NUMERIC_COLS:
+        raise ValueError("Числові ознаки у пакеті не збігаються з NUMERIC_COLS.")
+    missing = set(BUNDLE_ARRAYS) - set(manifest.get("arrays", {}))
+    if missing:
+        raise ValueError(f"У пакеті відсутні масиви: {sorted(missing)}.")
+    return manifest
+
+
+def load_bundle(path, mmap=True):
+    """
+    Завантаження пакета артефактів моделі.
+
+    При mmap=True масиви відображаються у пам'ять лише для читання, тож процеси, що
+    завантажують той самий пакет, спільно використовують сторінки пам'яті.
+
+    Args:
+        path (str): Шлях до каталогу пакета.
+        mmap (bool, optional): Відображати масиви у пам'ять замість читання.
+
+    Returns:
+        tuple: (CompiledForest, StandardScaler, stats, version).
+
+    Raises:
+        ValueError: Якщо схема пакета або масивів некоректна.
+    """
+    manifest = read_manifest(path)
+
+    arrays = {}
+    for name, dtype in BUNDLE_ARRAYS.items():
+        spec = manifest["arrays"][name]
+        a = np.load(os.path.join(path, spec["file"]), mmap_mode="r" if mmap else None)
+        if str(a.dtype) != dtype or list(a.shape) != spec["shape"]:
+            raise ValueError(
+                f"Масив '{name}' має тип {a.dtype} і форму {a.shape}, "
+                f"очікується {dtype} і {tuple(spec['shape'])}."
+            )
+        arrays[name] = a
+
+    n_trees = arrays["features"].shape[0]
+    n_numeric = len(NUMERIC_COLS)
+    if (
+        arrays["thresholds"].shape != arrays["features"].shape
+        or arrays["missing_go_left"].shape != arrays["features"].shape
+        or arrays["leaf_values"].shape != (n_trees, arrays["features"].shape[1] + 1)
+        or any(arrays[f"scaler_{p}"].shape != (n_numeric,) for p in ["mean", "scale", "var"])
+    ):
+        raise ValueError("Форми масивів пакета не узгоджені між собою.")
+    if arrays["features"].size and arrays["features"].max() >= len(EXPECTED_COLUMNS):
+        raise ValueError("Індекси ознак у пакеті виходять за межі EXPECTED_COLUMNS.")
+
+    model = CompiledForest(
+        arrays["features"],
+        arrays["thresholds"],
+        arrays["missing_go_left"],
+        arrays["leaf_values"],
+        n_features_in_=len(EXPECTED_COLUMNS),
+        feature_names_in_=manifest["feature_names"],
+        classes_=manifest["classes"],
+    )
+
+    scaler = StandardScaler()
+    scaler.mean_ = arrays["scaler_mean"]
+    scaler.scale_ = arrays["scaler_scale"]
+    scaler.var_ = arrays["scaler_var"]
+    scaler.n_samples_seen_ = manifest["scaler_n_samples_seen"]
+    scaler.n_features_in_ = n_numeric
+    scaler.feature_names_in_ = np.asarray(NUMERIC_COLS, dtype=object)
+
+    stats = manifest["preprocessing_stats"]
+    stats["bounds"] = {col: tuple(b) for col, b in stats["bounds"].items()}
+    return model, scaler, validate_preprocessing_stats(stats), manifest["version"]
+
+
+def _current_rss_kb():
+    # Поточний RSS процесу (Linux); інакше - піковий RSS
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure(kind, project_root):
+    # Час завантаження та приріст RSS в окремому процесі
+    import pickle
+    import time
+
+    rss_before = _current_rss_kb()
+    start = time.perf_counter()
+    if kind == "pickle":
+        with open(os.path.join(project_root, "model.pkl"), "rb") as f:
+            pickle.load(f)
+        with open(os.path.join(project_root, "scaler.pkl"), "rb") as f:
+            pickle.load(f)
+    else:
+        load_bundle(os.path.join(project_root, "model_bundle"), mmap=kind == "bundle-mmap")
+    elapsed = time.perf_counter() - start
+    rss_after = _current_rss_kb()
+    print(json.dumps({"seconds": elapsed, "rss_kb": rss_after - rss_before}))
+
+
+if __name__ == "__main__":
+    # Конвертація model.pkl у пакет та порівняння часу завантаження і RSS з pickle
+    import subprocess
+    import sys
+
+    from registry import ModelRegistry
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if len(sys.argv) > 2 and sys.argv[1] == "--measure":
+        _measure(sys.argv[2], project_root)
+        sys.exit(0)
+
+    model, scaler, stats, _ = ModelRegistry(project_root).get()
+    bundle_path = os.path.join(project_root, "model_bundle")
+    version = save_bundle(model, scaler, stats, bundle_path)
+    print(f"Пакет збережено у {bundle_path}, версія {version}")
+
+    for kind in ["pickle", "bundle", "bundle-mmap"]:
+        runs = [
+            json.loads(
+                subprocess.run(
+                    [sys.executable, __file__, "--measure", kind],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                ).stdout
+            )
+            for _ in range(5)
+        ]
+        seconds = np.median([r["seconds"] for r in runs])
+        rss_kb = np.median([r["rss_kb"] for r in runs])
+        print(f"{kind:>12}: завантаження {seconds * 1000:7.1f} мс, приріст RSS {rss_kb:8.0f} КБ")
@@ -0,0 +1,182 @@
+from sklearn.ensemble import RandomForestClassifier
+
+# Гіперпараметри RandomForest
+RF_PARAMS = {
+    "n_estimators": 368,
+    "max_depth": 3,
+    "min_samples_split": 14,
+    "min_samples_leaf": 9,
+    "max_features": "sqrt",
+    "bootstrap": False,
+    "random_state": 42,
+}
+
+# Гіперпараметри моделей для кожного бекенду
+BACKEND_PARAMS = {
+    "random_forest": RF_PARAMS,
+    "lightgbm": {
+        "n_estimators": 300,
+        "learning_rate": 0.05,
+        "num_leaves": 31,
+        "min_child_samples": 20,
+        "subsample": 0.8,
+        "subsample_freq": 1,
+        "colsample_bytree": 0.8,
+        "random_state": 42,
+        "verbose": -1,
+    },
+    "xgboost": {
+        "n_estimators": 300,
+        "learning_rate": 0.05,
+        "max_depth": 6,
+        "subsample": 0.8,
+        "colsample_bytree": 0.8,
+        "tree_method": "hist",
+        "random_state": 42,
+    },
+}
+
+# Бекенд за замовчуванням
+DEFAULT_BACKEND = "random_forest"
+
+# Модуль бібліотеки кожного бекенду (для версій та визначення бекенду моделі)
+_BACKEND_MODULES = {"random_forest": "sklearn", "lightgbm": "lightgbm", "xgboost": "xgboost"}
+
+
+def make_estimator(backend=DEFAULT_BACKEND, params=None, n_jobs=None):
+    """
+    Створення класифікатора заданого бекенду з API scikit-learn.
+
+    Усі бекенди мають predict_proba та feature_names_in_ після навчання на DataFrame,
+    тому predict_churn і реєстр моделі працюють з ними однаково. LightGBM та XGBoost
+    імпортуються лише при виборі відповідного бекенду.
+
+    Args:
+        backend (str, optional): "random_forest", "lightgbm" або "xgboost".
+        params (dict, optional): Гіперпараметри; за замовчуванням BACKEND_PARAMS[backend].
+        n_jobs (int, optional): Кількість потоків навчання та прогнозування.
+
+    Returns:
+        Ненавчений класифікатор.
+
+    Raises:
+        ValueError: Якщо бекенд невідомий або його бібліотека не встановлена.
+    """
+    if backend not in BACKEND_PARAMS:
+        raise ValueError(f"Невідомий бекенд: {backend}. Доступні: {list(BACKEND_PARAMS)}.")
+    params = dict(BACKEND_PARAMS[backend] if params is None else params)
+    if n_jobs is not None:
+        params["n_jobs"] = n_jobs
+
+    if backend == "random_forest":
+        return RandomForestClassifier(**params)
+    try:
+        if backend == "lightgbm":
+            from lightgbm import LGBMClassifier
+
+            return LGBMClassifier(**params)
+        from xgboost import XGBClassifier
+
+        return XGBClassifier(**params)
+    except ImportError as e:
+        raise ValueError(f"Бекенд {backend} недоступний: {e}")
+
+
+def backend_of(model):
+    """
+    Бекенд навченої моделі.
+
+    Args:
+        model: Навчена модель.
+
+    Returns:
+        str: Назва бекенду або None, якщо модель не належить жодному з них.
+    """
+    if isinstance(model, RandomForestClassifier):
+        return "random_forest"
+    module = type(model).__module__.split(".")[0]
+    for backend, name in _BACKEND_MODULES.items():
+        if backend != "random_forest" and module == name:
+            return backend
+    return None
+
+
+def backend_version(backend):
+    """
+    Версія бібліотеки бекенду.
+
+    Args:
+        backend (str): Назва бекенду.
+
+    Returns:
+        str: Версія бібліотеки.
+    """
+    import importlib
+
+    return importlib.import_module(_BACKEND_MODULES[backend]).__version__
+
+
+if __name__ == "__main__":
+    # Порівняння бекендів: навчання, пропускна здатність, затримка одного рядка, якість
+    import argparse
+    import logging
+    import time
+
+    import numpy as np
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    from compiled_forest import compile_forest
+    from inference import predict_churn
+    from preprocessing import preprocess_data
+
+    parser = argparse.ArgumentParser(description="Порівняння бекендів моделі відтоку.")
+    parser.add_argument(
+        "--rows", type=int, default=100_000, help="Рядків для пропускної здатності."
+    )
+    parser.add_argument("--threads", type=int, default=1, help="Потоків на модель.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    data = preprocess_data()
+    X = data.drop(columns=["churn"])
+    y = data["churn"]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    batch = X_test.sample(args.rows, replace=True, random_state=42)
+    single = X_test.iloc[[0]]
+
+    print(
+        f"{'бекенд':>14} {'навчання, с':>12} {'рядків/с':>12} {'1 рядок, мс':>12} "
+        f"{'accuracy':>9} {'ROC AUC':>8}"
+    )
+    variants = []
+    for backend in BACKEND_PARAMS:
+        try:
+            model = make_estimator(backend, n_jobs=args.threads)
+        except ValueError as e:
+            print(f"{backend:>14} {e}")
+            continue
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        train_seconds = time.perf_counter() - start
+        variants.append((backend, model, train_seconds))
+        if backend == "random_forest":
+            variants.append(("rf_compiled", compile_forest(model), train_seconds))
+
+    for backend, model, train_seconds in variants:
+        start = time.perf_counter()
+        predict_churn(model, batch)
+        throughput = len(batch) / (time.perf_counter() - start)
+
+        timings = []
+        for _ in range(200):
+            start = time.perf_counter()
+            predict_churn(model, single)
+            timings.append(time.perf_counter() - start)
+
+        proba = predict_churn(model, X_test)
+        print(
+            f"{backend:>14} {train_seconds:12.2f} {throughput:12.0f} "
+            f"{np.median(timings) * 1000:12.3f} {accuracy_score(y_test, proba > 0.5):9.4f} "
+            f"{roc_auc_score(y_test, proba):8.4f}"
+        )
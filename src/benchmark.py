@@ -0,0 +1,339 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from compiled_forest import compile_forest
+from dataset import DATASET_SCHEMA
+from inference import build_feature_matrix, load_artifacts, predict_churn, preprocess_input
+from preprocessing import preprocess_data
+
+# Розміри вхідних даних за замовчуванням
+DEFAULT_SIZES = [1, 1_000, 100_000, 10_000_000]
+
+# Етапи, що вимірюються
+STAGES = [
+    "preprocess_data",
+    "preprocess_input",
+    "build_feature_matrix",
+    "predict_churn",
+    "predict_churn_compiled",
+    "train",
+]
+
+# Частки аномалій у синтетичних даних
+MISSING_CONTRACT_RATE = 0.3
+MISSING_USAGE_RATE = 0.005
+NEGATIVE_AGE_RATE = 0.001
+OUTLIER_RATE = 0.01
+
+# Розподіл download_over_limit у реальному датасеті
+DOWNLOAD_OVER_LIMIT_P = [0.946, 0.0106, 0.0077, 0.0069, 0.0063, 0.0059, 0.0095, 0.0071]
+
+# Різниця в часі, меншу за яку не вважаємо регресією (шум вимірювання), с
+NOISE_FLOOR_SECONDS = 0.002
+
+# Мінімальний розмір виділення пам'яті, що враховується count_allocations, байт
+MIN_ALLOCATION_BYTES = 64 * 1024
+
+
+def generate_synthetic(n_rows, seed=42):
+    """
+    Генерація синтетичних даних зі схемою internet_service_churn.csv.
+
+    Розподіли наближені до реального датасету; дані містять пропуски
+    (reamining_contract, download_avg/upload_avg), від'ємні subscription_age та викиди
+    у download_avg, upload_avg і bill_avg.
+
+    Args:
+        n_rows (int): Кількість рядків.
+        seed (int, optional): Зерно генератора випадкових чисел.
+
+    Returns:
+        pd.DataFrame: Дані з типами з DATASET_SCHEMA.
+    """
+    rng = np.random.default_rng(seed)
+
+    age = np.round(rng.gamma(2.0, 1.25, n_rows), 2)
+    negative = rng.random(n_rows) < NEGATIVE_AGE_RATE
+    age[negative] = -np.round(rng.uniform(0.01, 0.5, negative.sum()), 2)
+
+    bill = np.round(rng.gamma(3.0, 6.3, n_rows))
+    contract = np.round(rng.uniform(0.0, 2.92, n_rows), 2)
+    contract[rng.random(n_rows) < MISSING_CONTRACT_RATE] = np.nan
+
+    download = np.round(rng.lognormal(3.3, 1.0, n_rows), 1)
+    upload = np.round(download * 0.1 * rng.lognormal(0.0, 0.3, n_rows), 1)
+    for values in [bill, download, upload]:
+        outliers = rng.random(n_rows) < OUTLIER_RATE
+        values[outliers] *= 50
+    missing = rng.random(n_rows) < MISSING_USAGE_RATE
+    download[missing] = np.nan
+    upload[missing] = np.nan
+
+    data = {
+        "id": np.arange(1, n_rows + 1),
+        "is_tv_subscriber": rng.random(n_rows) < 0.815,
+        "is_movie_package_subscriber": rng.random(n_rows) < 0.335,
+        "subscription_age": age,
+        "bill_avg": bill,
+        "reamining_contract": contract,
+        "service_failure_count": rng.poisson(0.27, n_rows),
+        "download_avg": download,
+        "upload_avg": upload,
+        "download_over_limit": rng.choice(8, n_rows, p=DOWNLOAD_OVER_LIMIT_P),
+        "churn": rng.random(n_rows) < 0.554,
+    }
+    return pd.DataFrame(
+        {col: np.asarray(values).astype(DATASET_SCHEMA[col]) for col, values in data.items()}
+    )
+
+
+def _prepare(stage, data, model, scaler, stats, compiled):
+    # Вхідні дані та функція етапу; підготовка входу не входить у вимірювання
+    if stage == "preprocess_data":
+        return lambda: preprocess_data(df=data)
+    if stage == "preprocess_input":
+        return lambda: preprocess_input(data, scaler=scaler, stats=stats)
+    if stage == "build_feature_matrix":
+        return lambda: build_feature_matrix(data, scaler, stats)
+    if stage in ("predict_churn", "predict_churn_compiled"):
+        processed = build_feature_matrix(data, scaler, stats)
+        stage_model = compiled if stage == "predict_churn_compiled" else model
+        return lambda: predict_churn(stage_model, processed)
+    if stage == "train":
+        from sklearn.ensemble import RandomForestClassifier
+
+        from model import RF_PARAMS
+
+        cleaned = preprocess_data(df=data)
+        X = cleaned.drop(columns=["churn"])
+        y = cleaned["churn"]
+        return lambda: RandomForestClassifier(**RF_PARAMS).fit(X, y)
+    raise ValueError(f"Невідомий етап: {stage}")
+
+
+def measure(fn, repeats=1):
+    """
+    Вимірювання часу та пікової пам'яті виклику.
+
+    Час - мінімум з repeats запусків без трасування; пікова пам'ять вимірюється
+    окремим запуском під tracemalloc (він відстежує буфери NumPy, але сповільнює код).
+
+    Args:
+        fn (callable): Функція без аргументів.
+        repeats (int, optional): Кількість запусків для вимірювання часу.
+
+    Returns:
+        tuple: (секунди, пікова пам'ять у байтах).
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def count_allocations(fn, min_bytes=MIN_ALLOCATION_BYTES):
+    """
+    Підрахунок великих виділень пам'яті під час виклику.
+
+    Python не надає сумарного лічильника виділень NumPy, тому під tracemalloc на межах
+    викликів функцій (Python і C) фіксується зростання відстежуваної пам'яті щонайменше
+    на min_bytes. Кілька виділень усередині одного C-виклику рахуються як одне, тож
+    результат - нижня оцінка кількості великих тимчасових масивів.
+
+    Args:
+        fn (callable): Функція без аргументів.
+        min_bytes (int, optional): Мінімальне зростання пам'яті, що вважається виділенням.
+
+    Returns:
+        tuple: (кількість виділень, пікова пам'ять у байтах).
+    """
+    count = 0
+    last = 0
+
+    def profile(frame, event, arg):
+        nonlocal count, last
+        current, _ = tracemalloc.get_traced_memory()
+        if current - last >= min_bytes:
+            count += 1
+        last = current
+
+    tracemalloc.start()
+    sys.setprofile(profile)
+    try:
+        fn()
+    finally:
+        sys.setprofile(None)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return count, peak
+
+
+def run_benchmarks(
+    sizes=None, stages=None, max_train_rows=100_000, project_root=None, allocations=False
+):
+    """
+    Запуск бенчмарків етапів на синтетичних даних різного розміру.
+
+    Args:
+        sizes (list[int], optional): Розміри вхідних даних.
+        stages (list[str], optional): Етапи з STAGES.
+        max_train_rows (int, optional): Найбільший розмір, на якому вимірюється навчання.
+        project_root (str, optional): Корінь проєкту з артефактами моделі.
+        allocations (bool, optional): Додатково рахувати виділення пам'яті щонайменше
+            по байту на рядок (count_allocations; окремий, повільніший запуск).
+
+    Returns:
+        dict: Метадані запуску та результати для кожної пари (етап, розмір).
+    """
+    import sklearn
+
+    sizes = sizes or DEFAULT_SIZES
+    stages = stages or STAGES
+    model, scaler, stats = load_artifacts(project_root)
+    compiled = compile_forest(model) if "predict_churn_compiled" in stages else None
+
+    results = []
+    for n_rows in sizes:
+        data = generate_synthetic(n_rows)
+        for stage in stages:
+            if stage == "train" and n_rows > max_train_rows:
+                continue
+            fn = _prepare(stage, data, model, scaler, stats, compiled)
+            seconds, peak = measure(fn, repeats=5 if n_rows <= 1_000 else 1)
+            result = {
+                "stage": stage,
+                "rows": n_rows,
+                "seconds": seconds,
+                "rows_per_sec": n_rows / seconds if seconds else None,
+                "peak_mb": peak / 2**20,
+            }
+            if allocations:
+                result["allocations"], _ = count_allocations(
+                    fn, min_bytes=max(n_rows, MIN_ALLOCATION_BYTES)
+                )
+            results.append(result)
+            print(
+                f"{stage:>24} {n_rows:>10} рядків: {seconds * 1000:10.2f} мс, "
+                f"{result['rows_per_sec'] or 0:12.0f} рядків/с, пік {result['peak_mb']:8.1f} МБ"
+                + (f", виділень {result['allocations']}" if allocations else "")
+            )
+            del fn
+        del data
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scikit-learn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare_results(current, baseline, threshold=0.2):
+    """
+    Пошук регресій відносно попереднього запуску.
+
+    Регресією вважається зростання часу або пікової пам'яті більш ніж на threshold
+    (частка) для однакових етапу та розміру. Для часу різниця також повинна
+    перевищувати NOISE_FLOOR_SECONDS.
+
+    Args:
+        current (dict): Результати поточного запуску (run_benchmarks).
+        baseline (dict): Результати базового запуску.
+        threshold (float, optional): Допустиме відносне погіршення.
+
+    Returns:
+        list[dict]: Регресії: етап, розмір, метрика, базове і поточне значення, відношення.
+    """
+    reference = {(r["stage"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        base = reference.get((result["stage"], result["rows"]))
+        if base is None:
+            continue
+        for metric in ["seconds", "peak_mb"]:
+            old, new = base[metric], result[metric]
+            if not old or new <= old * (1 + threshold):
+                continue
+            if metric == "seconds" and new - old < NOISE_FLOOR_SECONDS:
+                continue
+            regressions.append(
+                {
+                    "stage": result["stage"],
+                    "rows": result["rows"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": new / old,
+                }
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк препроцесингу, інференсу та навчання.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Розміри вхідних даних."
+    )
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Етапи.")
+    parser.add_argument(
+        "--max-train-rows", type=int, default=100_000, help="Максимум рядків для навчання."
+    )
+    parser.add_argument(
+        "--allocations", action="store_true", help="Рахувати великі виділення пам'яті."
+    )
+    parser.add_argument("--output", help="Шлях до JSON з результатами.")
+    parser.add_argument("--baseline", help="JSON попереднього запуску для порівняння.")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Допустиме відносне погіршення."
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    report = run_benchmarks(
+        args.sizes, args.stages, args.max_train_rows, project_root, args.allocations
+    )
+
+    output = args.output or os.path.join(
+        project_root, "benchmarks", f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Результати збережено у {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_results(report, json.load(f), args.threshold)
+        for r in regressions:
+            print(
+                f"РЕГРЕСІЯ {r['stage']} ({r['rows']} рядків), {r['metric']}: "
+                f"{r['baseline']:.4g} -> {r['current']:.4g} (x{r['ratio']:.2f})"
+            )
+        if regressions:
+            sys.exit(1)
+        print("Регресій не виявлено.")
@@ -0,0 +1,400 @@
+import numpy as np
+import pandas as pd
+import time
+import os
+from statistics import NormalDist
+
+# Кількість рядків, що обробляються за один прохід по деревах
+BLOCK_SIZE = 2048
+
+# Максимальна глибина дерев, для якої листок шукається за таблицею кодів рішень
+MAX_TABLE_DEPTH = 3
+
+# Максимальна глибина дерев, які можна скомпілювати (дерева доповнюються до повних)
+MAX_COMPILE_DEPTH = 12
+
+# Кількість дерев, що обчислюються за один крок прогнозу з ранньою зупинкою
+EARLY_EXIT_CHUNK_TREES = 32
+
+
+class CompiledForest:
+    """
+    Скомпільований RandomForestClassifier у вигляді неперервних масивів NumPy.
+
+    Кожне дерево доповнюється до повного бінарного дерева глибини max_depth і
+    зберігається у порядку купи: внутрішні вузли 0..2**depth-2, листки після них.
+    Унікальні розбиття (ознака, поріг) обчислюються один раз для всього батчу, після
+    чого всі дерева обходяться одночасно: для неглибоких дерев листок знаходиться за
+    таблицею кодів рішень, для глибших - рівень за рівнем.
+
+    Attributes:
+        features (np.ndarray): Індекси ознак внутрішніх вузлів, форма (n_trees, n_internal).
+        thresholds (np.ndarray): Пороги внутрішніх вузлів, форма (n_trees, n_internal).
+        missing_go_left (np.ndarray): Напрямок для пропусків (NaN) у внутрішніх вузлах.
+        leaf_values (np.ndarray): Ймовірності класу 1 у листках, форма (n_trees, n_leaves).
+        depth (int): Глибина дерев.
+        n_features_in_ (int): Кількість ознак, на яких навчена модель.
+        feature_names_in_ (np.ndarray або None): Назви ознак, на яких навчена модель.
+        classes_ (np.ndarray): Класи моделі.
+    """
+
+    def __init__(
+        self,
+        features,
+        thresholds,
+        missing_go_left,
+        leaf_values,
+        n_features_in_,
+        feature_names_in_=None,
+        classes_=(0, 1),
+    ):
+        self.features = np.ascontiguousarray(features, dtype=np.intp)
+        self.thresholds = np.ascontiguousarray(thresholds, dtype=np.float64)
+        self.missing_go_left = np.ascontiguousarray(missing_go_left, dtype=bool)
+        self.leaf_values = np.ascontiguousarray(leaf_values, dtype=np.float64)
+        self.n_features_in_ = int(n_features_in_)
+        self.feature_names_in_ = (
+            None if feature_names_in_ is None else np.asarray(feature_names_in_, dtype=object)
+        )
+        self.classes_ = np.asarray(classes_)
+        self.n_estimators, n_internal = self.features.shape
+        self.depth = int(np.log2(self.leaf_values.shape[1]))
+
+        # Унікальні розбиття та індекс розбиття для кожного вузла
+        splits, node_split = np.unique(
+            np.column_stack(
+                [self.features.ravel(), self.thresholds.ravel(), self.missing_go_left.ravel()]
+            ),
+            axis=0,
+            return_inverse=True,
+        )
+        self._split_features = splits[:, 0].astype(np.intp)
+        self._split_thresholds = splits[:, 1][:, None]
+        self._split_missing_go_left = splits[:, 2].astype(bool)[:, None]
+        self._node_split = node_split.ravel().astype(np.intp)
+        self._node_offsets = (np.arange(self.n_estimators) * n_internal)[:, None]
+
+        if self.depth <= MAX_TABLE_DEPTH:
+            # Таблиця: код з біт рішень усіх внутрішніх вузлів дерева -> значення листка
+            codes = np.arange(2**n_internal)
+            pos = np.zeros_like(codes)
+            for _ in range(self.depth):
+                pos = 2 * pos + 1 + ((codes >> pos) & 1)
+            self._leaf_positions = pos - n_internal
+            self._leaf_table = self.leaf_values[:, self._leaf_positions].ravel()
+            self._table_offsets = (np.arange(self.n_estimators) * 2**n_internal)[:, None]
+        else:
+            self._leaf_table = None
+        self._leaf_offsets = (np.arange(self.n_estimators) * self.leaf_values.shape[1])[:, None]
+        # Частини лісу для ранньої зупинки, за кількістю дерев у частині
+        self._tree_chunks = {}
+
+    def _validate(self, X):
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names_in_ is not None and list(X.columns) != list(
+                self.feature_names_in_
+            ):
+                raise ValueError(
+                    "Назви або порядок ознак не збігаються з тими, на яких навчена модель."
+                )
+            X = X.to_numpy()
+        # Як і sklearn, дерева порівнюють значення float32 з порогами float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Очікується {self.n_features_in_} ознак, отримано форму {X.shape}.")
+        return X
+
+    def _split_decisions(self, X):
+        # Рішення "праворуч" для кожного унікального розбиття, форма (n_splits, n_rows)
+        values = np.ascontiguousarray(X.T).take(self._split_features, axis=0)
+        go_right = ~(values <= self._split_thresholds)
+        if np.isnan(X).any():
+            go_right &= ~(np.isnan(values) & self._split_missing_go_left)
+        return go_right.view(np.uint8)
+
+    def _leaves(self, X):
+        # Значення листків усіх дерев для блоку рядків, форма (n_trees, n_rows)
+        n_rows = X.shape[0]
+        decisions = self._split_decisions(X)
+
+        if self._leaf_table is not None:
+            code = self._leaf_codes(decisions, n_rows)
+            leaf = self._leaf_table.take(code + self._table_offsets)
+        else:
+            # Обхід рівень за рівнем для глибоких дерев
+            idx = self._leaf_index(decisions, n_rows)
+            idx += self._leaf_offsets
+            leaf = self.leaf_values.ravel().take(idx)
+        return leaf
+
+    def _leaf_codes(self, decisions, n_rows):
+        # Код з біт рішень усіх внутрішніх вузлів кожного дерева, форма (n_trees, n_rows)
+        n_internal = self.features.shape[1]
+        bits = decisions.take(self._node_split, axis=0).reshape(
+            self.n_estimators, n_internal, n_rows
+        )
+        code = bits[:, 0, :].copy()
+        for k in range(1, n_internal):
+            code |= bits[:, k, :] << k
+        return code.astype(np.intp)
+
+    def _leaf_index(self, decisions, n_rows):
+        # Номери листків (0..2**depth-1) усіх дерев за рішеннями розбиттів,
+        # форма (n_trees, n_rows)
+        if self._leaf_table is not None:
+            return self._leaf_positions.take(self._leaf_codes(decisions, n_rows))
+        decisions = decisions.ravel()
+        rows = np.arange(n_rows)
+        idx = np.zeros((self.n_estimators, n_rows), dtype=np.intp)
+        for _ in range(self.depth):
+            split = self._node_split.take(idx + self._node_offsets)
+            idx *= 2
+            idx += 1
+            idx += decisions.take(split * n_rows + rows)
+        idx -= self.features.shape[1]
+        return idx
+
+    def _apply_block(self, X):
+        # Номери листків усіх дерев для блоку рядків, форма (n_trees, n_rows)
+        return self._leaf_index(self._split_decisions(X), X.shape[0])
+
+    def _predict_block(self, X):
+        # Сума по деревах у порядку дерев, як у sklearn
+        return self._leaves(X).sum(axis=0) / self.n_estimators
+
+    def _chunks(self, chunk_trees):
+        # Послідовні частини лісу по chunk_trees дерев (кожна - окремий CompiledForest
+        # з власними унікальними розбиттями), будуються один раз
+        if chunk_trees not in self._tree_chunks:
+            chunks = []
+            for start in range(0, self.n_estimators, chunk_trees):
+                trees = slice(start, start + chunk_trees)
+                chunks.append(
+                    CompiledForest(
+                        self.features[trees],
+                        self.thresholds[trees],
+                        self.missing_go_left[trees],
+                        self.leaf_values[trees],
+                        self.n_features_in_,
+                        self.feature_names_in_,
+                        self.classes_,
+                    )
+                )
+            self._tree_chunks[chunk_trees] = chunks
+        return self._tree_chunks[chunk_trees]
+
+    def predict_proba_early_exit(
+        self, X, tolerance=0.01, thresholds=(0.3, 0.5, 0.7), chunk_trees=EARLY_EXIT_CHUNK_TREES
+    ):
+        """
+        Наближені ймовірності класу 1 з ранньою зупинкою обходу дерев.
+
+        Дерева обчислюються частинами по chunk_trees. Після кожної частини для рядка
+        оцінюється стандартна похибка поточного середнього по деревах (з поправкою на
+        скінченну кількість дерев, що залишилися). Рядок зупиняється, якщо відстань від
+        середнього до найближчого порогу (категорій ризику та класу 0.5) перевищує
+        z * похибку, де z - квантиль нормального розподілу рівня 1 - tolerance. Для
+        зупинених рядків повертається поточне середнє, для решти - точна ймовірність
+        усього лісу.
+
+        Args:
+            X (pd.DataFrame або np.ndarray): Оброблені ознаки у порядку feature_names_in_.
+            tolerance (float, optional): Допустима ймовірність того, що зупинений рядок
+                опиниться по інший бік порогу, ніж у повного лісу.
+            thresholds (tuple, optional): Пороги, відносно яких рядок повинен бути визначений.
+            chunk_trees (int, optional): Кількість дерев у частині.
+
+        Returns:
+            tuple: (ймовірності класу 1, кількість обчислених дерев для кожного рядка).
+
+        Raises:
+            ValueError: Якщо tolerance не належить (0, 1) або chunk_trees < 2.
+        """
+        if not 0.0 < tolerance < 1.0:
+            raise ValueError("Допустима похибка повинна бути в інтервалі (0, 1).")
+        if chunk_trees < 2:
+            raise ValueError("Частина лісу повинна містити щонайменше 2 дерева.")
+        X = self._validate(X)
+        z = NormalDist().inv_cdf(1.0 - tolerance)
+        bands = np.asarray(thresholds, dtype=np.float64)
+        chunks = self._chunks(chunk_trees)
+
+        n_rows = X.shape[0]
+        total = np.zeros(n_rows)
+        squares = np.zeros(n_rows)
+        n_trees = np.zeros(n_rows, dtype=np.intp)
+        for start in range(0, n_rows, BLOCK_SIZE):
+            active = np.arange(start, min(start + BLOCK_SIZE, n_rows))
+            done_trees = 0
+            for chunk in chunks:
+                leaves = chunk._leaves(X[active])
+                total[active] += leaves.sum(axis=0)
+                squares[active] += np.square(leaves).sum(axis=0)
+                done_trees += chunk.n_estimators
+                n_trees[active] = done_trees
+                remaining = self.n_estimators - done_trees
+                if remaining == 0:
+                    break
+
+                mean = total[active] / done_trees
+                variance = np.maximum(squares[active] / done_trees - mean**2, 0.0)
+                stderr = np.sqrt(variance / done_trees * remaining / max(self.n_estimators - 1, 1))
+                margin = np.abs(mean[:, None] - bands).min(axis=1)
+                active = active[margin <= z * stderr]
+                if len(active) == 0:
+                    break
+        return total / n_trees, n_trees
+
+    def predict_proba(self, X):
+        """
+        Ймовірності класів для батчу.
+
+        Args:
+            X (pd.DataFrame або np.ndarray): Оброблені ознаки у порядку feature_names_in_.
+
+        Returns:
+            np.ndarray: Масив форми (n, 2) з ймовірностями класів 0 та 1.
+        """
+        X = self._validate(X)
+        proba = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], BLOCK_SIZE):
+            end = start + BLOCK_SIZE
+            proba[start:end] = self._predict_block(X[start:end])
+        return np.column_stack([1.0 - proba, proba])
+
+    def apply(self, X):
+        """
+        Номери листків, у які потрапляє кожен рядок у кожному дереві.
+
+        Листки нумеруються зліва направо в доповненому до повного дереві (0..2**depth-1),
+        тож номер листка однаково визначає шлях від кореня для всіх дерев.
+
+        Args:
+            X (pd.DataFrame або np.ndarray): Оброблені ознаки у порядку feature_names_in_.
+
+        Returns:
+            np.ndarray: Масив форми (n, n_trees) з номерами листків.
+        """
+        X = self._validate(X)
+        leaves = np.empty((X.shape[0], self.n_estimators), dtype=np.intp)
+        for start in range(0, X.shape[0], BLOCK_SIZE):
+            end = start + BLOCK_SIZE
+            leaves[start:end] = self._apply_block(X[start:end]).T
+        return leaves
+
+    def predict(self, X):
+        """
+        Передбачення класу для батчу.
+
+        Args:
+            X (pd.DataFrame або np.ndarray): Оброблені ознаки.
+
+        Returns:
+            np.ndarray: Передбачені класи.
+        """
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def compile_forest(model):
+    """
+    Компіляція навченого RandomForestClassifier у CompiledForest.
+
+    Args:
+        model (RandomForestClassifier): Навчена модель бінарної класифікації.
+
+    Returns:
+        CompiledForest: Скомпільована модель.
+
+    Raises:
+        ValueError: Якщо модель не навчена, не є бінарним класифікатором або дерева
+            занадто глибокі.
+    """
+    if not hasattr(model, "estimators_"):
+        raise ValueError("Модель повинна бути навченим RandomForestClassifier.")
+    if len(model.classes_) != 2:
+        raise ValueError("Підтримуються лише моделі бінарної класифікації.")
+
+    depth = max(max(est.tree_.max_depth for est in model.estimators_), 1)
+    if depth > MAX_COMPILE_DEPTH:
+        raise ValueError(
+            f"Глибина дерев {depth} перевищує максимально допустиму {MAX_COMPILE_DEPTH}."
+        )
+    n_internal = 2**depth - 1
+    n_trees = len(model.estimators_)
+
+    features = np.zeros((n_trees, n_internal), dtype=np.intp)
+    # Фіктивні вузли завжди ведуть ліворуч; усі листки під ними мають однакове значення
+    thresholds = np.full((n_trees, n_internal), np.inf)
+    missing_go_left = np.zeros((n_trees, n_internal), dtype=bool)
+    leaf_values = np.empty((n_trees, 2**depth), dtype=np.float64)
+
+    for t, est in enumerate(model.estimators_):
+        tree = est.tree_
+        value = tree.value[:, 0, :]
+        normalizer = value.sum(axis=1)
+        normalizer[normalizer == 0.0] = 1.0
+        proba = value[:, 1] / normalizer
+
+        stack = [(0, 0, 0)]  # (вузол sklearn, позиція у купі, глибина)
+        while stack:
+            node, pos, level = stack.pop()
+            left, right = tree.children_left[node], tree.children_right[node]
+            if left == -1:
+                first = pos
+                for _ in range(depth - level):
+                    first = 2 * first + 1
+                first -= n_internal
+                last = first + 2 ** (depth - level)
+                leaf_values[t, first:last] = proba[node]
+                continue
+            features[t, pos] = tree.feature[node]
+            thresholds[t, pos] = tree.threshold[node]
+            missing_go_left[t, pos] = tree.missing_go_to_left[node]
+            stack.append((left, 2 * pos + 1, level + 1))
+            stack.append((right, 2 * pos + 2, level + 1))
+
+    return CompiledForest(
+        features,
+        thresholds,
+        missing_go_left,
+        leaf_values,
+        n_features_in_=model.n_features_in_,
+        feature_names_in_=getattr(model, "feature_names_in_", None),
+        classes_=model.classes_,
+    )
+
+
+if __name__ == "__main__":
+    # Перевірка відповідності predict_proba та бенчмарк на 1, 1k та 1M рядків
+    from inference import load_artifacts, preprocess_input
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    model, scaler, stats = load_artifacts(project_root)
+    compiled = compile_forest(model)
+
+    data = pd.read_csv(os.path.join(project_root, "datasets", "internet_service_churn.csv"))
+    processed = preprocess_input(data.drop(columns=["churn"]), scaler=scaler, stats=stats)
+
+    rng = np.random.default_rng(42)
+    for n_rows in [1, 1_000, 1_000_000]:
+        batch = processed.iloc[rng.integers(0, len(processed), n_rows)]
+        repeats = 20 if n_rows < 1_000_000 else 1
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            expected = model.predict_proba(batch)[:, 1]
+        sklearn_time = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            actual = compiled.predict_proba(batch)[:, 1]
+        compiled_time = (time.perf_counter() - start) / repeats
+
+        max_diff = np.abs(actual - expected).max()
+        assert max_diff < 1e-12, f"Розбіжність з predict_proba: {max_diff}"
+        print(
+            f"{n_rows:>9} рядків: sklearn {sklearn_time * 1000:9.2f} мс, "
+            f"compiled {compiled_time * 1000:9.2f} мс, "
+            f"прискорення x{sklearn_time / compiled_time:.1f}, "
+            f"макс. розбіжність {max_diff:.1e}"
+        )
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Версія формату кешу датасету (змінюється разом зі схемою)
+DATASET_CACHE_VERSION = 1
+
+# Компактна схема датасету: малі цілі для прапорців і лічильників, float32 для вимірів
+DATASET_SCHEMA = {
+    "id": "int32",
+    "is_tv_subscriber": "int8",
+    "is_movie_package_subscriber": "int8",
+    "subscription_age": "float32",
+    "bill_avg": "float32",
+    "reamining_contract": "float32",
+    "service_failure_count": "int16",
+    "download_avg": "float32",
+    "upload_avg": "float32",
+    "download_over_limit": "int8",
+    "churn": "int8",
+}
+
+
+def default_dataset_path():
+    """
+    Шлях до датасету за замовчуванням.
+
+    Returns:
+        str: Шлях до datasets/internet_service_churn.csv.
+    """
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "datasets", "internet_service_churn.csv")
+
+
+def file_hash(path):
+    """
+    SHA-256 вмісту файлу.
+
+    Args:
+        path (str): Шлях до файлу.
+
+    Returns:
+        str: Шістнадцятковий хеш.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_dir(data_path):
+    name = os.path.splitext(os.path.basename(data_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(data_path)), ".cache", name)
+
+
+def parse_dataset(data_path):
+    """
+    Читання CSV з явною компактною схемою.
+
+    Args:
+        data_path (str): Шлях до CSV файлу з даними.
+
+    Returns:
+        pd.DataFrame: Дані з типами з DATASET_SCHEMA (невідомі колонки - за замовчуванням).
+    """
+    header = pd.read_csv(data_path, nrows=0).columns
+    dtype = {col: DATASET_SCHEMA[col] for col in header if col in DATASET_SCHEMA}
+    return pd.read_csv(data_path, dtype=dtype)
+
+
+def _read_cache(path, source_hash):
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if (
+        manifest.get("version") != DATASET_CACHE_VERSION
+        or manifest.get("source_hash") != source_hash
+        or manifest.get("schema") != DATASET_SCHEMA
+    ):
+        return None
+    columns = {
+        col: np.load(os.path.join(path, f"{i}.npy"), allow_pickle=False)
+        for i, col in enumerate(manifest["columns"])
+    }
+    # Кожна колонка - окремий масив, DataFrame використовує їх без копіювання
+    return pd.DataFrame(columns, copy=False)
+
+
+def _write_cache(df, path, source_hash):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for i, col in enumerate(df.columns):
+        np.save(os.path.join(tmp_path, f"{i}.npy"), df[col].to_numpy())
+    manifest = {
+        "version": DATASET_CACHE_VERSION,
+        "source_hash": source_hash,
+        "schema": DATASET_SCHEMA,
+        "columns": [str(col) for col in df.columns],
+        "rows": len(df),
+    }
+    with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def load_dataset(data_path=None, use_cache=True, logger=None):
+    """
+    Завантаження датасету через колонковий кеш.
+
+    CSV читається один раз зі схемою DATASET_SCHEMA, після чого колонки зберігаються
+    як окремі файли .npy у каталозі .cache поруч із CSV. Кеш прив'язаний до хешу
+    вмісту CSV та до схеми: при зміні будь-якого з них CSV читається повторно.
+    Колонки, яких немає у схемі (наприклад, текстові), кешуються лише якщо мають
+    числовий тип; інакше кеш не використовується.
+
+    Args:
+        data_path (str, optional): Шлях до CSV файлу. За замовчуванням - датасет проєкту.
+        use_cache (bool, optional): Якщо False, CSV завжди читається без кешу.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+
+    Returns:
+        pd.DataFrame: Дані з компактними типами.
+
+    Raises:
+        FileNotFoundError: Якщо CSV файл не знайдено.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    if data_path is None:
+        data_path = default_dataset_path()
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Файл не знайдено за шляхом: {data_path}.")
+    if not use_cache:
+        return parse_dataset(data_path)
+
+    source_hash = file_hash(data_path)
+    cache_path = _cache_dir(data_path)
+    try:
+        df = _read_cache(cache_path, source_hash)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Кеш датасету пошкоджено, CSV буде прочитано повторно: {e}")
+        df = None
+    if df is not None:
+        logger.info(f"Датасет завантажено з кешу {cache_path}.")
+        return df
+
+    df = parse_dataset(data_path)
+    if all(dtype.kind in "biuf" for dtype in df.dtypes):
+        try:
+            _write_cache(df, cache_path, source_hash)
+            logger.info(f"Кеш датасету збережено у {cache_path}.")
+        except OSError as e:
+            logger.warning(f"Не вдалося зберегти кеш датасету: {e}")
+    return df
+
+
+def _measure(fn, repeats=3):
+    # Медіанний час без трасування та піковий обсяг пам'яті окремим запуском
+    # (tracemalloc відстежує буфери NumPy, але сповільнює парсинг)
+    import time
+    import tracemalloc
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    df = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df, float(np.median(times)), peak
+
+
+if __name__ == "__main__":
+    # Порівняння часу читання та пікової пам'яті: типовий read_csv, схема, кеш
+    logging.basicConfig(level=logging.ERROR)
+    data_path = default_dataset_path()
+    shutil.rmtree(_cache_dir(data_path), ignore_errors=True)
+
+    runs = [
+        ("read_csv (типово)", lambda: pd.read_csv(data_path)),
+        ("read_csv (схема)", lambda: parse_dataset(data_path)),
+        ("з кешу", lambda: load_dataset(data_path)),
+    ]
+    reference = pd.read_csv(data_path)
+    _, elapsed, _ = _measure(lambda: load_dataset(data_path), repeats=1)
+    print(f"{'перше завантаження':>20}: {elapsed * 1000:8.1f} мс (читання CSV і запис кешу)")
+    for name, fn in runs:
+        df, elapsed, peak = _measure(fn)
+        memory = df.memory_usage(index=False).sum()
+        print(
+            f"{name:>20}: {elapsed * 1000:8.1f} мс, пік {peak / 2**20:6.1f} МБ, "
+            f"DataFrame {memory / 2**20:5.1f} МБ"
+        )
+        # Значення збігаються з типовим читанням з точністю float32
+        for col in reference.columns:
+            np.testing.assert_allclose(
+                df[col].to_numpy(dtype=np.float64), reference[col].to_numpy(), rtol=1e-6
+            )
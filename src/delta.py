@@ -0,0 +1,263 @@
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference import _column_values, build_feature_matrix, predict_churn, risk_category
+from preprocessing import REQUIRED_COLS
+
+# Множник для поєднання хешів колонок у хеш рядка (за модулем 2**64)
+_HASH_MULTIPLIER = np.uint64(1_000_003)
+
+# Колонки файлу знімка
+SNAPSHOT_COLUMNS = ["id", "row_hash", "probability", "model_version"]
+
+# Мінімальна кількість спрогнозованих рядків, за якою вимірюється час прогнозування рядка
+# (на менших батчах переважають фіксовані витрати виклику моделі)
+RATE_MIN_ROWS = 10_000
+
+
+def row_hashes(df):
+    """
+    64-бітні хеші сирих значень ознак кожного рядка.
+
+    Числові колонки хешуються як float64, тож зміна типу колонки між вивантаженнями
+    (наприклад, int64 -> float64 через появу пропуску) не змінює хеш незмінених рядків.
+    Відсутня колонка хешується як колонка пропусків.
+
+    Args:
+        df (pd.DataFrame): Вхідні дані клієнтів.
+
+    Returns:
+        np.ndarray: Хеші uint64, по одному на рядок.
+    """
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    for col in REQUIRED_COLS:
+        if col in df.columns:
+            values = _column_values(df[col])
+            if values.dtype.kind in "biuf":
+                # +0.0 зводить -0.0 до 0.0
+                values = values.astype(np.float64) + 0.0
+        else:
+            values = np.full(len(df), np.nan)
+        hashes = hashes * _HASH_MULTIPLIER ^ pd.util.hash_array(values)
+    return hashes
+
+
+def load_snapshot(path):
+    """
+    Завантаження знімка попереднього запуску.
+
+    Args:
+        path (str): Шлях до файлу знімка (Parquet).
+
+    Returns:
+        pd.DataFrame: Колонки SNAPSHOT_COLUMNS або None, якщо файлу немає.
+    """
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def save_snapshot(snapshot, path):
+    """
+    Атомарне збереження знімка: файл замінюється лише після повного запису.
+
+    Args:
+        snapshot (pd.DataFrame): Знімок з колонками SNAPSHOT_COLUMNS.
+        path (str): Шлях до файлу знімка (Parquet).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    snapshot.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def delta_score(
+    df, model, scaler, stats, model_version, snapshot=None, id_col="id", cache=None, logger=None
+):
+    """
+    Прогнозування лише нових і змінених рядків з перенесенням решти оцінок зі знімка.
+
+    Рядок вважається незміненим, якщо його ID є в попередньому знімку, хеш сирих ознак
+    (row_hashes) збігається, а знімок створено тією самою версією моделі. Оскільки
+    статистики препроцесингу фіксовані, прогноз рядка не залежить від решти батчу,
+    і результат збігається з повним прогнозуванням файлу.
+
+    Args:
+        df (pd.DataFrame): Поточне вивантаження клієнтів.
+        model: Навчена модель.
+        scaler (StandardScaler): Об'єкт StandardScaler для нормалізації.
+        stats (dict): Статистики препроцесингу.
+        model_version (str): Версія моделі.
+        snapshot (pd.DataFrame, optional): Знімок попереднього запуску (load_snapshot).
+        id_col (str, optional): Назва колонки з ID клієнта.
+        cache (PredictionCache, optional): Кеш прогнозів для predict_churn.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+
+    Returns:
+        tuple: (ймовірності у порядку рядків df, новий знімок, звіт) - звіт містить
+            кількість рядків (rows, new, changed, skipped, removed), час виконання та
+            оцінку заощадженого часу; час прогнозування рядка зберігається в атрибутах
+            знімка для оцінки в наступних запусках.
+
+    Raises:
+        ValueError: Якщо колонки ID немає або ID повторюються.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+
+    if id_col not in df.columns:
+        logger.error(f"Для дельта-прогнозування потрібна колонка ID '{id_col}'.")
+        raise ValueError(f"Для дельта-прогнозування потрібна колонка ID '{id_col}'.")
+
+    start = time.perf_counter()
+    ids = df[id_col].to_numpy()
+    if pd.Index(ids).has_duplicates:
+        logger.error("ID клієнтів у вивантаженні повторюються.")
+        raise ValueError("ID клієнтів у вивантаженні повторюються.")
+    hashes = row_hashes(df)
+
+    preds = np.empty(len(df))
+    known = np.zeros(len(df), dtype=bool)
+    unchanged = np.zeros(len(df), dtype=bool)
+    if snapshot is not None and (snapshot["model_version"] == model_version).all():
+        positions = pd.Index(snapshot["id"]).get_indexer(ids)
+        known = positions >= 0
+        prev_hashes = snapshot["row_hash"].to_numpy()
+        unchanged[known] = prev_hashes[positions[known]] == hashes[known]
+        preds[unchanged] = snapshot["probability"].to_numpy()[positions[unchanged]]
+    elif snapshot is not None:
+        logger.info("Знімок створено іншою версією моделі; прогнозуються всі рядки.")
+    lookup_seconds = time.perf_counter() - start
+
+    to_score = np.flatnonzero(~unchanged)
+    score_start = time.perf_counter()
+    if len(to_score):
+        features = build_feature_matrix(df.iloc[to_score], scaler, stats, logger=logger)
+        preds[to_score] = predict_churn(
+            model, features, logger=logger, cache=cache, model_version=model_version
+        )
+    score_seconds = time.perf_counter() - score_start
+
+    n_skipped = int(unchanged.sum())
+    n_known = int(known.sum())
+    # Час прогнозування рядка: з цього запуску, якщо рядків достатньо, інакше - збережений
+    # у знімку з попереднього запуску
+    per_row = None if snapshot is None else snapshot.attrs.get("seconds_per_row")
+    if len(to_score) >= RATE_MIN_ROWS or (per_row is None and len(to_score)):
+        per_row = score_seconds / len(to_score)
+    report = {
+        "rows": len(df),
+        "new": len(df) - n_known,
+        "changed": n_known - n_skipped,
+        "skipped": n_skipped,
+        "removed": 0 if snapshot is None else len(snapshot) - n_known,
+        "seconds": time.perf_counter() - start,
+        "lookup_seconds": lookup_seconds,
+        # Час прогнозування пропущених рядків мінус витрати на хеші та пошук
+        "estimated_seconds_saved": (
+            None if per_row is None else per_row * n_skipped - lookup_seconds
+        ),
+    }
+    new_snapshot = pd.DataFrame(
+        {"id": ids, "row_hash": hashes, "probability": preds, "model_version": model_version}
+    )
+    if per_row is not None:
+        new_snapshot.attrs["seconds_per_row"] = per_row
+    saved = report["estimated_seconds_saved"]
+    logger.info(
+        f"Дельта-прогнозування: {report['rows']} рядків, нових {report['new']}, "
+        f"змінених {report['changed']}, пропущено {n_skipped}, видалених {report['removed']}; "
+        f"{report['seconds']:.2f} с" + ("" if saved is None else f", заощаджено ~{saved:.2f} с")
+    )
+    return preds, new_snapshot, report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from export import export_results, format_for_path
+    from registry import get_registry
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(description="Дельта-прогнозування щоденного вивантаження.")
+    parser.add_argument("input", nargs="?", help="Шлях до вхідного CSV з даними клієнтів.")
+    parser.add_argument(
+        "output", nargs="?", help="Шлях до вихідного файлу (.csv, .csv.gz або .parquet)."
+    )
+    parser.add_argument(
+        "--snapshot",
+        default=os.path.join(project_root, "model_store", "snapshot.parquet"),
+        help="Знімок попереднього запуску; оновлюється після прогнозування.",
+    )
+    parser.add_argument("--id-col", default="id", help="Назва колонки з ID клієнта.")
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="ROWS",
+        help="Порівняти повне та дельта-прогнозування на синтетичних даних.",
+    )
+    parser.add_argument(
+        "--changed", type=float, default=0.03, help="Частка змінених рядків для --benchmark."
+    )
+    args = parser.parse_args()
+
+    model, scaler, stats, model_version = get_registry().get()
+
+    if args.benchmark:
+        from benchmark import generate_synthetic
+
+        logging.getLogger().setLevel(logging.ERROR)
+        yesterday = generate_synthetic(args.benchmark).drop(columns=["churn"])
+        rng = np.random.default_rng(0)
+        today = yesterday.copy()
+        n_changed = int(len(today) * args.changed)
+        # Зміни: частина рядків з новими значеннями, частина видалених і нових клієнтів
+        changed = rng.choice(len(today), n_changed, replace=False)
+        today.loc[changed, "download_avg"] = today.loc[changed, "download_avg"] * 1.5 + 1
+        arrivals = generate_synthetic(n_changed // 3, seed=1).drop(columns=["churn"])
+        arrivals["id"] = arrivals["id"] + 10 * len(today)
+        departed = n_changed // 3
+        today = pd.concat([today.iloc[departed:], arrivals], ignore_index=True)
+
+        _, snapshot, _ = delta_score(yesterday, model, scaler, stats, model_version)
+
+        start = time.perf_counter()
+        full = predict_churn(model, build_feature_matrix(today, scaler, stats))
+        full_seconds = time.perf_counter() - start
+        preds, _, report = delta_score(today, model, scaler, stats, model_version, snapshot)
+        assert np.array_equal(preds, full)
+        print(f"рядків: {report['rows']}, змінено {args.changed:.0%}")
+        print(f"повне прогнозування: {full_seconds:.3f} с")
+        print(
+            f"дельта-прогнозування: {report['seconds']:.3f} с (хеші та пошук "
+            f"{report['lookup_seconds']:.3f} с); нових {report['new']}, "
+            f"змінених {report['changed']}, пропущено {report['skipped']}, "
+            f"видалених {report['removed']}, оцінка заощадженого часу "
+            f"{report['estimated_seconds_saved']:.3f} с"
+        )
+    else:
+        if not args.input or not args.output:
+            parser.error("потрібні input та output (або --benchmark ROWS)")
+        df = pd.read_csv(args.input)
+        preds, snapshot, report = delta_score(
+            df,
+            model,
+            scaler,
+            stats,
+            model_version,
+            load_snapshot(args.snapshot),
+            id_col=args.id_col,
+        )
+        results = pd.DataFrame(
+            {"id": df[args.id_col], "probability": preds, "risk_category": risk_category(preds)}
+        )
+        with open(args.output, "wb") as out:
+            export_results(results, out, format_for_path(args.output))
+        save_snapshot(snapshot, args.snapshot)
@@ -0,0 +1,289 @@
+import logging
+import threading
+
+import numpy as np
+
+import instrumentation
+from instrumentation import stage
+from preprocessing import drift_bin_counts
+
+# Кількість рядків у вікні, після якого розподіл порівнюється з базовим і скидається
+DRIFT_WINDOW_ROWS = 10_000
+
+# Поріг PSI, вище якого ознака вважається зміщеною (0.1-0.2 - помірний дрейф)
+PSI_ALERT = 0.2
+
+# Поріг KS-статистики (максимальна різниця кумулятивних частот кошиків)
+KS_ALERT = 0.1
+
+# Мінімальна частка кошика у PSI (порожні кошики не дають нескінченності)
+PSI_EPSILON = 1e-4
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def psi(expected, actual):
+    """
+    Population Stability Index між двома гістограмами з однаковими кошиками.
+
+    Args:
+        expected (np.ndarray): Лічильники базового розподілу.
+        actual (np.ndarray): Лічильники поточного розподілу.
+
+    Returns:
+        float: PSI (0 - розподіли збігаються).
+    """
+    p = np.maximum(expected / max(expected.sum(), 1), PSI_EPSILON)
+    q = np.maximum(actual / max(actual.sum(), 1), PSI_EPSILON)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def binned_ks(expected, actual):
+    """
+    KS-статистика на кошиках: максимальна різниця кумулятивних частот.
+
+    Args:
+        expected (np.ndarray): Лічильники базового розподілу.
+        actual (np.ndarray): Лічильники поточного розподілу.
+
+    Returns:
+        float: Статистика від 0 до 1.
+    """
+    p = np.cumsum(expected) / max(expected.sum(), 1)
+    q = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.max(np.abs(p - q)))
+
+
+class DriftMonitor:
+    """
+    Потоковий монітор дрейфу сирих ознак відносно базового розподілу навчання.
+
+    Кожен батч додається до лічильників гістограм з фіксованими межами кошиків
+    базового розподілу (fit_drift_baseline), тож пам'ять не залежить від кількості
+    рядків. Коли у вікні набирається window_rows рядків, для кожної ознаки
+    обчислюються PSI та KS, ознаки з перевищенням порогів записуються в лог як
+    попередження, а лічильники вікна скидаються. Результат останнього вікна доступний
+    у snapshot() та у метриках Prometheus (churn_feature_psi, churn_feature_ks,
+    churn_drift_alerts_total).
+
+    Args:
+        baseline (dict): Базовий розподіл (stats["drift"]).
+        window_rows (int, optional): Кількість рядків у вікні порівняння.
+        psi_threshold (float, optional): Поріг PSI для попередження.
+        ks_threshold (float, optional): Поріг KS для попередження.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+    """
+
+    def __init__(
+        self,
+        baseline,
+        window_rows=DRIFT_WINDOW_ROWS,
+        psi_threshold=PSI_ALERT,
+        ks_threshold=KS_ALERT,
+        logger=None,
+    ):
+        self.baseline = baseline
+        self.window_rows = window_rows
+        self.psi_threshold = psi_threshold
+        self.ks_threshold = ks_threshold
+        self.logger = logger or logging.getLogger(__name__)
+        self._edges = {
+            col: np.asarray(spec["edges"], dtype=np.float64)
+            for col, spec in baseline["features"].items()
+        }
+        self._expected = {
+            col: np.asarray(spec["counts"], dtype=np.int64)
+            for col, spec in baseline["features"].items()
+        }
+        self._counts = {col: np.zeros_like(c) for col, c in self._expected.items()}
+        self._rows = 0
+        self._lock = threading.Lock()
+        self.windows = 0
+        self.alerts = 0
+        self.last = None
+
+    def update(self, df):
+        """
+        Додавання батчу сирих даних до поточного вікна.
+
+        Викликається після успішного прогнозування батчу, щоб у вікно потрапляли лише
+        спрогнозовані рядки (і кожен з них один раз).
+
+        Args:
+            df (pd.DataFrame): Сирі дані клієнтів (як на вході preprocess_input).
+
+        Returns:
+            dict: Звіт вікна, якщо воно завершилося на цьому батчі, інакше None.
+        """
+        batch = {}
+        with stage("drift", len(df)):
+            for col, edges in self._edges.items():
+                if col in df.columns:
+                    values = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+                    batch[col] = drift_bin_counts(values, edges)
+                else:
+                    # Відсутня колонка - усі значення пропущені
+                    counts = np.zeros(len(edges) + 2, dtype=np.int64)
+                    counts[-1] = len(df)
+                    batch[col] = counts
+        with self._lock:
+            for col, counts in batch.items():
+                self._counts[col] += counts
+            self._rows += len(df)
+            if self._rows < self.window_rows:
+                return None
+            return self._close_window()
+
+    def _close_window(self):
+        features = {}
+        drifted = []
+        for col, actual in self._counts.items():
+            expected = self._expected[col]
+            features[col] = {"psi": psi(expected, actual), "ks": binned_ks(expected, actual)}
+            if features[col]["psi"] > self.psi_threshold or features[col]["ks"] > self.ks_threshold:
+                drifted.append(col)
+        report = {"rows": self._rows, "features": features, "drifted": drifted}
+        self.windows += 1
+        self.alerts += len(drifted)
+        self.last = report
+        for col in drifted:
+            self.logger.warning(
+                f"Дрейф ознаки '{col}': PSI {features[col]['psi']:.3f}, "
+                f"KS {features[col]['ks']:.3f} на {self._rows} рядках."
+            )
+        for counts in self._counts.values():
+            counts[:] = 0
+        self._rows = 0
+        return report
+
+    def check(self):
+        """
+        Примусове порівняння поточного (неповного) вікна з базовим розподілом.
+
+        Returns:
+            dict: Звіт вікна або None, якщо у вікні немає рядків.
+        """
+        with self._lock:
+            if self._rows == 0:
+                return None
+            return self._close_window()
+
+    def snapshot(self):
+        """
+        Стан монітора для метрик.
+
+        Returns:
+            dict: Кількість вікон і попереджень, рядків у поточному вікні та звіт
+                останнього завершеного вікна.
+        """
+        with self._lock:
+            return {
+                "windows": self.windows,
+                "alerts": self.alerts,
+                "window_rows": self._rows,
+                "last": self.last,
+            }
+
+    def prometheus_text(self):
+        """
+        Метрики дрейфу у текстовому форматі Prometheus.
+
+        Returns:
+            str: Датчики churn_feature_psi і churn_feature_ks з міткою feature та
+                лічильник churn_drift_alerts_total.
+        """
+        state = self.snapshot()
+        lines = [
+            "# HELP churn_drift_alerts_total Попереджень про дрейф ознак.",
+            "# TYPE churn_drift_alerts_total counter",
+            f"churn_drift_alerts_total {state['alerts']}",
+        ]
+        if state["last"] is not None:
+            for metric in ["psi", "ks"]:
+                lines.append(f"# TYPE churn_feature_{metric} gauge")
+                for col, values in state["last"]["features"].items():
+                    lines.append(f'churn_feature_{metric}{{feature="{col}"}} {values[metric]}')
+        return "\n".join(lines) + "\n"
+
+
+def get_drift_monitor(stats, **kwargs):
+    """
+    Спільний для процесу монітор дрейфу для базового розподілу з поточних статистик.
+
+    Якщо базовий розподіл змінився (наприклад, реєстр завантажив нову модель),
+    створюється новий монітор; метрики попередньої моделі відкидаються.
+
+    Args:
+        stats (dict): Статистики препроцесингу активної моделі.
+        **kwargs: Параметри DriftMonitor.
+
+    Returns:
+        DriftMonitor: Монітор або None, якщо статистики не містять базового розподілу
+            (артефакти, збережені до появи монітора).
+    """
+    global _monitor
+    baseline = stats.get("drift") if stats is not None else None
+    if baseline is None:
+        return None
+    with _monitor_lock:
+        if _monitor is None or _monitor.baseline is not baseline:
+            _monitor = DriftMonitor(baseline, **kwargs)
+        return _monitor
+
+
+def _prometheus_collector():
+    monitor = _monitor
+    return "" if monitor is None else monitor.prometheus_text()
+
+
+instrumentation.register_collector(_prometheus_collector)
+
+
+if __name__ == "__main__":
+    # Сценарії дрейфу на реальному датасеті та накладні витрати відносно прогнозування
+    import time
+
+    from dataset import load_dataset
+    from inference import build_feature_matrix, predict_churn
+    from preprocessing import fit_drift_baseline
+    from registry import get_registry
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s - %(message)s")
+    model, scaler, stats, _ = get_registry().get()
+    dataset = load_dataset()
+    # Артефакти, збережені до появи монітора, не містять базового розподілу
+    baseline = stats.get("drift") or fit_drift_baseline(dataset)
+    data = dataset.sample(50_000, random_state=0)
+
+    scenarios = {
+        "без змін": data,
+        "download_avg у ГБ": data.assign(download_avg=data["download_avg"] / 1024),
+        "немає upload_avg": data.drop(columns=["upload_avg"]),
+        "лише нові клієнти": data[data["subscription_age"] < 1],
+    }
+    print(f"{'сценарій':>20} {'макс. PSI':>10} {'макс. KS':>9}  ознаки з дрейфом")
+    for name, df in scenarios.items():
+        monitor = DriftMonitor(baseline, window_rows=len(df), logger=logging.getLogger("demo"))
+        report = monitor.update(df)
+        worst_psi = max(f["psi"] for f in report["features"].values())
+        worst_ks = max(f["ks"] for f in report["features"].values())
+        print(f"{name:>20} {worst_psi:10.3f} {worst_ks:9.3f}  {', '.join(report['drifted'])}")
+
+    batch = dataset.sample(1_000_000, replace=True, random_state=0)
+    monitor = DriftMonitor(baseline)
+    for size in [100, 10_000, 1_000_000]:
+        part = batch.iloc[:size]
+        repeats = max(1, 100_000 // size)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            predict_churn(model, build_feature_matrix(part, scaler, stats))
+        scoring = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            monitor.update(part)
+        overhead = (time.perf_counter() - start) / repeats
+        print(
+            f"{size:>9} рядків: прогноз {scoring * 1000:9.2f} мс, монітор "
+            f"{overhead * 1000:7.3f} мс ({overhead / scoring:.1%})"
+        )
@@ -0,0 +1,222 @@
+import gzip
+import io
+import os
+import tempfile
+
+# Формати експорту результатів: розширення файлу та MIME-тип
+EXPORT_FORMATS = {
+    "csv": {"extension": ".csv", "mime": "text/csv"},
+    "csv.gz": {"extension": ".csv.gz", "mime": "application/gzip"},
+    "parquet": {"extension": ".parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+# Кількість рядків, що форматуються та записуються за один крок
+EXPORT_CHUNK_SIZE = 50_000
+
+# Рівень стиснення gzip (9 - повільно при невеликому виграші в розмірі)
+GZIP_LEVEL = 6
+
+
+def format_for_path(path):
+    """
+    Формат експорту за розширенням файлу.
+
+    Args:
+        path (str): Шлях до вихідного файлу.
+
+    Returns:
+        str: Ключ EXPORT_FORMATS; "csv" для невідомих розширень.
+    """
+    path = path.lower()
+    for fmt, spec in EXPORT_FORMATS.items():
+        if fmt != "csv" and path.endswith(spec["extension"]):
+            return fmt
+    return "csv"
+
+
+class ResultsWriter:
+    """
+    Інкрементальний запис таблиці результатів у CSV, CSV.gz або Parquet.
+
+    Кожна частина одразу кодується та записується у файловий об'єкт, тому пам'ять
+    залежить від розміру частини, а не від кількості рядків. Ймовірності записуються
+    як числа з плаваючою комою (у Parquet - float64, у CSV - без округлення).
+
+    Args:
+        fileobj: Бінарний файловий об'єкт для запису.
+        fmt (str, optional): Ключ EXPORT_FORMATS.
+
+    Raises:
+        ValueError: Якщо формат невідомий або для Parquet не встановлено pyarrow.
+    """
+
+    def __init__(self, fileobj, fmt="csv"):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Невідомий формат експорту: {fmt}. Доступні: {list(EXPORT_FORMATS)}.")
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ValueError(f"Експорт у Parquet недоступний: {e}")
+        self.fmt = fmt
+        self.rows = 0
+        self._out = fileobj
+        self._gzip = None
+        self._parquet = None
+        if fmt == "csv.gz":
+            self._gzip = gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=GZIP_LEVEL)
+            self._out = self._gzip
+
+    def write(self, frame):
+        """
+        Запис чергової частини результатів.
+
+        Схема Parquet фіксується першою частиною; наступні частини приводяться до неї,
+        бо pandas визначає типи окремо для кожної частини (колонка ID з пропуском
+        читається як float64, хоча в попередніх частинах була int64).
+
+        Args:
+            frame (pd.DataFrame): Частина таблиці з однаковими колонками для всіх частин.
+
+        Raises:
+            ValueError: Якщо частину Parquet не можна привести до схеми першої частини
+                (наприклад, дробові значення в цілій колонці).
+        """
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._out, table.schema)
+            elif not table.schema.equals(self._parquet.schema, check_metadata=False):
+                try:
+                    table = table.cast(self._parquet.schema)
+                except pa.ArrowException as e:
+                    raise ValueError(f"Частина результатів несумісна зі схемою файлу Parquet: {e}")
+            self._parquet.write_table(table)
+        else:
+            text = frame.to_csv(header=(self.rows == 0), index=False)
+            self._out.write(text.encode("utf-8"))
+        self.rows += len(frame)
+
+    def close(self):
+        """
+        Завершення файлу (метадані Parquet, трейлер gzip); сам файловий об'єкт не закривається.
+        """
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._gzip is not None:
+            self._gzip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def export_results(results, fileobj=None, fmt="csv", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Експорт таблиці результатів частинами.
+
+    Args:
+        results (pd.DataFrame): Таблиця результатів.
+        fileobj (optional): Бінарний файловий об'єкт; за замовчуванням новий io.BytesIO.
+        fmt (str, optional): Ключ EXPORT_FORMATS.
+        chunk_size (int, optional): Кількість рядків в одній частині.
+
+    Returns:
+        Файловий об'єкт з експортованими даними.
+    """
+    if fileobj is None:
+        fileobj = io.BytesIO()
+    with ResultsWriter(fileobj, fmt) as writer:
+        for start in range(0, max(len(results), 1), chunk_size):
+            end = start + chunk_size
+            writer.write(results.iloc[start:end])
+    return fileobj
+
+
+def export_tempfile(results, fmt="csv", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Експорт таблиці результатів частинами у тимчасовий файл.
+
+    Файл не видаляється автоматично; його видаляє той, хто викликав функцію.
+
+    Args:
+        results (pd.DataFrame): Таблиця результатів.
+        fmt (str, optional): Ключ EXPORT_FORMATS.
+        chunk_size (int, optional): Кількість рядків в одній частині.
+
+    Returns:
+        str: Шлях до файлу з експортованими даними.
+
+    Raises:
+        ValueError: Якщо формат невідомий або недоступний (див. ResultsWriter).
+    """
+    suffix = EXPORT_FORMATS[fmt]["extension"] if fmt in EXPORT_FORMATS else ""
+    fd, path = tempfile.mkstemp(prefix="churn_export_", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            export_results(results, f, fmt, chunk_size)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+if __name__ == "__main__":
+    # Час, пікова пам'ять та розмір експорту 1M рядків порівняно з повним CSV-рядком
+    import time
+    import tracemalloc
+
+    import numpy as np
+    import pandas as pd
+
+    from results_view import build_results_frame
+
+    n_rows = 1_000_000
+    preds = np.random.default_rng(42).random(n_rows)
+    results = build_results_frame(preds)
+
+    def legacy():
+        # Попередній підхід: колонка рядків f"{p:.2f}" та весь CSV у пам'яті
+        frame = results.assign(**{"Ймовірність відтоку": [f"{p:.2f}" for p in preds]})
+        return frame.to_csv(index=False).encode("utf-8")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [("повний CSV-рядок", legacy)]
+        for fmt, spec in EXPORT_FORMATS.items():
+            path = os.path.join(tmp, f"results{spec['extension']}")
+
+            def run(fmt=fmt, path=path):
+                with open(path, "wb") as f:
+                    export_results(results, f, fmt)
+
+            runs.append((f"{fmt} у файл", run))
+
+        print(f"{'експорт':>20} {'час, с':>8} {'пік, МБ':>9} {'розмір, МБ':>11}")
+        for name, fn in runs:
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            payload = fn()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if payload is None:
+                fmt = name.split()[0]
+                path = os.path.join(tmp, f"results{EXPORT_FORMATS[fmt]['extension']}")
+                size = os.path.getsize(path)
+            else:
+                size = len(payload)
+            print(f"{name:>20} {elapsed:8.2f} {peak / 2**20:9.1f} {size / 2**20:11.1f}")
+
+        # Дані з кожного формату збігаються з вихідною таблицею
+        for fmt, spec in EXPORT_FORMATS.items():
+            path = os.path.join(tmp, f"results{spec['extension']}")
+            loaded = pd.read_parquet(path) if fmt == "parquet" else pd.read_csv(path)
+            np.testing.assert_allclose(loaded["Ймовірність відтоку"].to_numpy(), preds)
+            assert (loaded["ID клієнта"].to_numpy() == results["ID клієнта"].to_numpy()).all()
@@ -1,22 +1,100 @@
 import pandas as pd
 import numpy as np
 import logging
+import argparse
+import time
+from preprocessing import EXPECTED_COLUMNS, NUMERIC_COLS, REQUIRED_COLS, fit_preprocessing_stats
+from compiled_forest import CompiledForest, compile_forest
+from parallel import imap_ordered, map_frame
+from registry import get_registry, registry_version
+from backends import backend_of
+from instrumentation import dump_json, stage
+from instrumentation import enable as enable_instrumentation
+from export import ResultsWriter, format_for_path
+from drift import get_drift_monitor
+from explain import TOP_REASONS, get_explainer
 
+# Пороги категорій ризику відтоку
+HIGH_RISK_THRESHOLD = 0.7
+LOW_RISK_THRESHOLD = 0.3
 
-def preprocess_input(df=None, scaler=None, logger=None):
+# Поріг класу "відтік" (predict)
+CLASS_THRESHOLD = 0.5
+
+# Кількість рядків у блоці побудови матриці ознак (обмежує тимчасові масиви)
+FEATURE_BLOCK_ROWS = 65_536
+
+
+def _transform_numeric(X, stats, scaler):
     """
-    Препроцесинг вхідних даних для передбачення.
+    Застосування статистик препроцесингу та нормалізації до числових ознак на місці.
+
+    Заповнення пропусків, заміна від'ємних subscription_age, обмеження викидів IQR та
+    нормалізація виконуються векторизовано над одним масивом без проходів по батчу.
+
+    Args:
+        X (np.ndarray): Масив float64 форми (n, 5) з колонками NUMERIC_COLS.
+        stats (dict): Статистики препроцесингу.
+        scaler (StandardScaler): Об'єкт StandardScaler з параметрами нормалізації.
+
+    Returns:
+        np.ndarray: Той самий масив X після перетворення.
+    """
+    medians = stats["medians"]
+    bounds = stats["bounds"]
+    fill = np.array(
+        [np.nan, 0.0, np.nan, medians["download_avg"], medians["upload_avg"]], dtype=np.float64
+    )
+    lower = np.array(
+        [-np.inf, -np.inf, -np.inf, bounds["download_avg"][0], bounds["upload_avg"][0]]
+    )
+    upper = np.array([np.inf, np.inf, np.inf, bounds["download_avg"][1], bounds["upload_avg"][1]])
+
+    with stage("impute", len(X)):
+        np.copyto(X, fill, where=np.isnan(X))
+        np.copyto(X[:, 0], medians["subscription_age"], where=X[:, 0] < 0)
+    with stage("clip", len(X)):
+        np.clip(X, lower, upper, out=X)
+    with stage("scale", len(X)):
+        X -= scaler.mean_
+        X /= scaler.scale_
+    return X
+
+
+def _column_values(series):
+    # Колонки з типом NumPy повертаються без копіювання, розширені типи pandas
+    # (nullable Int64, Float64) - як float64 з NaN замість пропусків
+    if isinstance(series.dtype, np.dtype):
+        return series.to_numpy()
+    return series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def build_feature_matrix(df=None, scaler=None, stats=None, out=None, dtype=np.float32, logger=None):
+    """
+    Побудова матриці ознак у порядку EXPECTED_COLUMNS без проміжних DataFrame.
+
+    Ознаки записуються безпосередньо у попередньо виділену C-неперервну матрицю.
+    Колонки вхідного DataFrame читаються без копіювання, а заповнення пропусків,
+    обмеження викидів і нормалізація виконуються блоками по FEATURE_BLOCK_ROWS рядків
+    у буфері float64. Тому тимчасова пам'ять не залежить від розміру батчу, а значення
+    float32 побітово збігаються з тими, з якими дерева порівнюють результат
+    preprocess_input.
 
     Args:
         df (pd.DataFrame): Вхідний DataFrame.
         scaler (StandardScaler): Об'єкт StandardScaler для нормалізації.
+        stats (dict, optional): Статистики препроцесингу (медіани та межі IQR), збережені
+            під час навчання. Якщо не передані, обчислюються по вхідному батчу.
+        out (np.ndarray, optional): Матриця форми (len(df), len(EXPECTED_COLUMNS)) для
+            запису результату.
+        dtype (np.dtype, optional): Тип матриці, якщо out не передано.
         logger (logging.Logger, optional): Логер для запису повідомлень.
 
     Returns:
-        pd.DataFrame: Оброблений DataFrame, готовий для передбачення.
+        np.ndarray: C-неперервна матриця ознак.
 
     Raises:
-        ValueError: Якщо дані некоректні або відсутні.
+        ValueError: Якщо дані некоректні або відсутні, або out має невідповідну форму.
     """
     if logger is None:
         logger = logging.getLogger(__name__)
@@ -26,126 +104,160 @@ def preprocess_input(df=None, scaler=None, logger=None):
         logger.error("Вхідний DataFrame не може бути порожнім або None.")
         raise ValueError("Вхідний DataFrame не може бути порожнім або None.")
 
-    # Перевірка наявності необхідних колонок
-    required_cols = [
-        "is_tv_subscriber",
-        "is_movie_package_subscriber",
-        "subscription_age",
-        "reamining_contract",
-        "service_failure_count",
-        "download_avg",
-        "upload_avg",
-        "download_over_limit",
-    ]
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    if missing_cols:
-        logger.warning(
-            f"Відсутні колонки: {missing_cols}. Заповнюємо значеннями за замовчуванням (0)."
+    n_rows = len(df)
+    with stage("validate", n_rows):
+        # Перевірка наявності необхідних колонок
+        missing_cols = [col for col in REQUIRED_COLS if col not in df.columns]
+        if missing_cols:
+            logger.warning(
+                f"Відсутні колонки: {missing_cols}. Заповнюємо значеннями за замовчуванням (0)."
+            )
+
+        # Колонки як масиви без копіювання; відсутні колонки - None (заповнюються нулями)
+        columns = {
+            col: _column_values(df[col]) if col in df.columns else None
+            for col in ["is_tv_subscriber", "is_movie_package_subscriber", "download_over_limit"]
+            + NUMERIC_COLS
+        }
+
+        # Валідація типу даних для download_over_limit
+        if "download_over_limit" in df.columns and not pd.api.types.is_numeric_dtype(
+            df["download_over_limit"]
+        ):
+            logger.error("Колонка 'download_over_limit' містить нечислові значення.")
+            raise ValueError("Колонка 'download_over_limit' повинна містити числові значення.")
+
+        if scaler is None:
+            logger.error("Scaler is required for preprocessing.")
+            raise ValueError("Scaler is required for preprocessing.")
+
+        shape = (n_rows, len(EXPECTED_COLUMNS))
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        elif out.shape != shape or not out.flags.c_contiguous:
+            logger.error(f"Матриця ознак повинна бути C-неперервною форми {shape}.")
+            raise ValueError(f"Матриця ознак повинна бути C-неперервною форми {shape}.")
+
+    # Статистики препроцесингу: без збережених статистик обчислюються по поточному батчу
+    if stats is None:
+        logger.warning("Статистики препроцесингу не передані. Обчислюємо по поточному батчу.")
+        stats_cols = ["download_avg", "upload_avg", "subscription_age"]
+        stats = fit_preprocessing_stats(
+            pd.DataFrame(
+                {
+                    col: df[col] if col in df.columns else pd.Series(0, index=df.index)
+                    for col in stats_cols
+                }
+            )
         )
-        for col in missing_cols:
-            df[col] = 0  # Заповнення відсутніх колонок нулями
 
-    # Валідація типу даних для download_over_limit
-    if not pd.api.types.is_numeric_dtype(df["download_over_limit"]):
-        logger.error("Колонка 'download_over_limit' містить нечислові значення.")
-        raise ValueError("Колонка 'download_over_limit' повинна містити числові значення.")
+    block = np.empty((min(n_rows, FEATURE_BLOCK_ROWS), len(NUMERIC_COLS)), dtype=np.float64)
+    negative_age = False
+    for start in range(0, n_rows, FEATURE_BLOCK_ROWS):
+        end = min(start + FEATURE_BLOCK_ROWS, n_rows)
+        X = block[: end - start]
+        rows = out[start:end]
+
+        # Числові ознаки: заповнення пропусків, викиди та нормалізація у буфері float64
+        with stage("extract", len(X)):
+            for j, col in enumerate(NUMERIC_COLS):
+                values = columns[col]
+                X[:, j] = 0.0 if values is None else values[start:end]
+        negative_age = negative_age or bool((X[:, 0] < 0).any())
+        _transform_numeric(X, stats, scaler)
 
-    # Конвертація до числового типу та обробка некоректних значень
-    df["download_over_limit"] = pd.to_numeric(df["download_over_limit"], errors="coerce")
-    df["download_over_limit"] = df["download_over_limit"].fillna(0).astype(int)
-    # Обмеження значень до діапазону 0-7
-    df["download_over_limit"] = df["download_over_limit"].clip(0, 7)
+        with stage("one_hot", len(X)):
+            for j, col in enumerate(["is_tv_subscriber", "is_movie_package_subscriber"]):
+                values = columns[col]
+                rows[:, j] = 0 if values is None else values[start:end]
+            rows[:, 2:7] = X
 
-    # Обробка пропусків
-    df["reamining_contract"] = df["reamining_contract"].fillna(0)
-    df["download_avg"] = df["download_avg"].fillna(df["download_avg"].median())
-    df["upload_avg"] = df["upload_avg"].fillna(df["upload_avg"].median())
+            # download_over_limit: пропуски - 0, значення обмежуються діапазоном 0-7
+            rows[:, 7:] = 0
+            values = columns["download_over_limit"]
+            if values is None:
+                rows[:, 7] = 1
+            else:
+                level = np.nan_to_num(np.asarray(values[start:end], dtype=np.float64), nan=0.0)
+                np.clip(level, 0, 7, out=level)
+                rows[np.arange(len(rows)), 7 + level.astype(np.intp)] = 1
 
-    # Заміна негативних значень subscription_age на медіану
-    if (df["subscription_age"] < 0).any():
+    if negative_age:
         logger.warning("Знайдено від'ємні значення в 'subscription_age'. Замінюємо на медіану.")
-        median_age = df.loc[df["subscription_age"] >= 0, "subscription_age"].median()
-        df.loc[df["subscription_age"] < 0, "subscription_age"] = median_age
-
-    # Обмеження викидів у download_avg за допомогою IQR
-    Q1 = df["download_avg"].quantile(0.25)
-    Q3 = df["download_avg"].quantile(0.75)
-    IQR = Q3 - Q1
-    lower = Q1 - 1.5 * IQR
-    upper = Q3 + 1.5 * IQR
-    df["download_avg"] = np.where(
-        df["download_avg"] > upper,
-        upper,
-        np.where(df["download_avg"] < lower, lower, df["download_avg"]),
-    )
+    return out
 
-    # Обмеження викидів у upload_avg за допомогою IQR
-    Q1 = df["upload_avg"].quantile(0.25)
-    Q3 = df["upload_avg"].quantile(0.75)
-    IQR = Q3 - Q1
-    lower = Q1 - 1.5 * IQR
-    upper = Q3 + 1.5 * IQR
-    df["upload_avg"] = np.where(
-        df["upload_avg"] > upper,
-        upper,
-        np.where(df["upload_avg"] < lower, lower, df["upload_avg"]),
-    )
 
-    # One-Hot Encoding для download_over_limit
-    for i in range(8):
-        df[f"download_over_limit_{i}"] = (df["download_over_limit"] == i).astype(int)
-    df.drop(columns=["download_over_limit"], errors="ignore", inplace=True)
-
-    # Нормалізація
-    numeric_cols = [
-        "subscription_age",
-        "reamining_contract",
-        "service_failure_count",
-        "download_avg",
-        "upload_avg",
-    ]
-    if scaler is None:
-        logger.error("Scaler is required for preprocessing.")
-        raise ValueError("Scaler is required for preprocessing.")
-    df[numeric_cols] = scaler.transform(df[numeric_cols])
-
-    # Видаляємо зайві колонки
-    df.drop(columns=["id", "bill_avg"], errors="ignore", inplace=True)
-
-    # Забезпечуємо правильний порядок колонок
-    expected_columns = [
-        "is_tv_subscriber",
-        "is_movie_package_subscriber",
-        "subscription_age",
-        "reamining_contract",
-        "service_failure_count",
-        "download_avg",
-        "upload_avg",
-        "download_over_limit_0",
-        "download_over_limit_1",
-        "download_over_limit_2",
-        "download_over_limit_3",
-        "download_over_limit_4",
-        "download_over_limit_5",
-        "download_over_limit_6",
-        "download_over_limit_7",
-    ]
-    df = df.reindex(columns=expected_columns, fill_value=0)
+def preprocess_input(df=None, scaler=None, logger=None, stats=None):
+    """
+    Препроцесинг вхідних даних для передбачення.
+
+    Args:
+        df (pd.DataFrame): Вхідний DataFrame.
+        scaler (StandardScaler): Об'єкт StandardScaler для нормалізації.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+        stats (dict, optional): Статистики препроцесингу (медіани та межі IQR), збережені
+            під час навчання. Якщо не передані, обчислюються по вхідному батчу.
+
+    Returns:
+        pd.DataFrame: Оброблений DataFrame, готовий для передбачення.
+
+    Raises:
+        ValueError: Якщо дані некоректні або відсутні.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+
+    features = build_feature_matrix(df, scaler, stats, dtype=np.float64, logger=logger)
     logger.info("Дані успішно оброблені для передбачення.")
-    return df
+    with stage("frame", len(df)):
+        return pd.DataFrame(features, columns=EXPECTED_COLUMNS, index=df.index, copy=False)
+
+
+def _predict_proba(model, data):
+    # Моделі sklearn, навчені на DataFrame, очікують назви ознак
+    if isinstance(data, np.ndarray) and not isinstance(model, CompiledForest):
+        if getattr(model, "feature_names_in_", None) is not None:
+            data = pd.DataFrame(data, columns=model.feature_names_in_)
+    return model.predict_proba(data)[:, 1]
 
 
-def predict_churn(model, data, logger=None):
+def predict_churn(
+    model,
+    data,
+    logger=None,
+    cache=None,
+    model_version=None,
+    early_exit_tolerance=None,
+    store=None,
+):
     """
     Прогнозування ймовірності відтоку.
 
     Args:
-        model: Навчена модель.
-        data (pd.DataFrame): Оброблені дані.
+        model: Навчена модель (RandomForestClassifier, CompiledForest, LGBMClassifier
+            або XGBClassifier).
+        data (pd.DataFrame або np.ndarray): Оброблені дані у порядку EXPECTED_COLUMNS
+            (preprocess_input або матриця build_feature_matrix).
         logger (logging.Logger, optional): Логер для запису повідомлень.
+        cache (PredictionCache, optional): Кеш прогнозів; до моделі потрапляють лише
+            рядки, яких немає в кеші.
+        model_version (str, optional): Версія моделі для cache або store. Якщо не задана,
+            береться версія реєстру, з якого отримано model (registry_version); для
+            моделі не з реєстру вона обов'язкова разом з cache або store.
+        early_exit_tolerance (float, optional): Якщо задано, RandomForest обчислюється
+            частинами дерев з ранньою зупинкою для рядків, категорія ризику та клас яких
+            уже визначені з цією допустимою ймовірністю помилки
+            (CompiledForest.predict_proba_early_exit). Ймовірності таких рядків
+            наближені. Несумісний з cache.
+        store (ScoreBatch, optional): Якщо задано (ScoreStore.batch(customer_ids)),
+            прогнози записуються у сховище оцінок разом з ID клієнтів і model_version.
 
     Returns:
         np.ndarray: Ймовірності відтоку (клас 1).
+
+    Raises:
+        ValueError: Якщо модель або дані відсутні, версію моделі для cache або store не
+            вдалося визначити, або прогнозування завершилося помилкою.
     """
     if logger is None:
         logger = logging.getLogger(__name__)
@@ -154,14 +266,401 @@ def predict_churn(model, data, logger=None):
         logger.error("Модель не може бути None.")
         raise ValueError("Модель не може бути None.")
 
-    if data is None or data.empty:
+    if data is None or len(data) == 0:
         logger.error("Вхідні дані не можуть бути порожніми або None.")
         raise ValueError("Вхідні дані не можуть бути порожніми або None.")
 
+    if model_version is None and (cache is not None or store is not None):
+        model_version = registry_version(model)
+
+    if cache is not None and model_version is None:
+        logger.error("Для кешу прогнозів потрібна версія моделі.")
+        raise ValueError("Для кешу прогнозів потрібна версія моделі.")
+
+    if store is not None and model_version is None:
+        logger.error("Для сховища оцінок потрібна версія моделі.")
+        raise ValueError("Для сховища оцінок потрібна версія моделі.")
+
+    if early_exit_tolerance is not None:
+        if cache is not None:
+            logger.error("Наближені прогнози з ранньою зупинкою не зберігаються в кеші.")
+            raise ValueError("Наближені прогнози з ранньою зупинкою не зберігаються в кеші.")
+        if not isinstance(model, CompiledForest):
+            if backend_of(model) != "random_forest":
+                logger.error("Рання зупинка підтримується лише для RandomForest.")
+                raise ValueError("Рання зупинка підтримується лише для RandomForest.")
+            # Компіляція займає десятки мілісекунд; реєстр зберігає вже скомпільований ліс
+            model = compile_forest(model)
+
     try:
-        predictions = model.predict_proba(data)[:, 1]
+        if early_exit_tolerance is not None:
+            with stage("predict_proba", len(data)):
+                predictions, n_trees = model.predict_proba_early_exit(
+                    data,
+                    early_exit_tolerance,
+                    (LOW_RISK_THRESHOLD, CLASS_THRESHOLD, HIGH_RISK_THRESHOLD),
+                )
+            logger.info(
+                f"Рання зупинка: у середньому {n_trees.mean():.0f} з {model.n_estimators} дерев."
+            )
+        elif cache is None:
+            with stage("predict_proba", len(data)):
+                predictions = _predict_proba(model, data)
+        else:
+            # Ключ кешу - рядок float32: з такою точністю ознаки порівнюють дерева
+            X = np.ascontiguousarray(data, dtype=np.float32)
+            with stage("cache_lookup", len(X)):
+                predictions, miss = cache.get_many(X, model_version)
+            if miss.any():
+                n_miss = int(miss.sum())
+                with stage("predict_proba", n_miss):
+                    predictions[miss] = _predict_proba(model, X[miss])
+                with stage("cache_store", n_miss):
+                    cache.put_many(X[miss], predictions[miss], model_version)
         logger.info("Передбачення успішно виконано.")
-        return predictions
     except Exception as e:
         logger.error(f"Помилка під час передбачення: {str(e)}")
         raise ValueError(f"Помилка під час передбачення: {str(e)}")
+
+    if store is not None:
+        with stage("score_store", len(predictions)):
+            store.write(predictions, model_version)
+    return predictions
+
+
+def record_features(record, scaler, stats, out=None, logger=None):
+    """
+    Перетворення одного запису клієнта на вектор ознак без pandas.
+
+    Результат побітово збігається з рядком, який повертає preprocess_input для
+    DataFrame з одного цього запису.
+
+    Args:
+        record (dict): Дані клієнта (ключі як колонки вхідного CSV).
+        scaler (StandardScaler): Об'єкт StandardScaler з параметрами нормалізації.
+        stats (dict): Статистики препроцесингу.
+        out (np.ndarray, optional): Попередньо виділений вектор float64 довжини
+            len(EXPECTED_COLUMNS), у який записується результат.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+
+    Returns:
+        np.ndarray: Вектор ознак у порядку EXPECTED_COLUMNS.
+
+    Raises:
+        ValueError: Якщо download_over_limit не є числом.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+
+    missing_cols = [col for col in REQUIRED_COLS if col not in record]
+    if missing_cols:
+        logger.warning(
+            f"Відсутні колонки: {missing_cols}. Заповнюємо значеннями за замовчуванням (0)."
+        )
+
+    download_over_limit = record.get("download_over_limit", 0)
+    if isinstance(download_over_limit, str) or download_over_limit is None:
+        logger.error("Колонка 'download_over_limit' містить нечислові значення.")
+        raise ValueError("Колонка 'download_over_limit' повинна містити числові значення.")
+    download_over_limit = float(download_over_limit)
+    if download_over_limit != download_over_limit:
+        download_over_limit = 0.0
+    download_over_limit = min(max(int(download_over_limit), 0), 7)
+
+    if out is None:
+        out = np.zeros(len(EXPECTED_COLUMNS), dtype=np.float64)
+    else:
+        out[7:] = 0.0
+    out[0] = _record_value(record, "is_tv_subscriber")
+    out[1] = _record_value(record, "is_movie_package_subscriber")
+
+    # Ті самі операції, що й у _transform_numeric, над скалярами float64
+    medians = stats["medians"]
+    bounds = stats["bounds"]
+    fill = (None, 0.0, None, medians["download_avg"], medians["upload_avg"])
+    lower = (None, None, None, bounds["download_avg"][0], bounds["upload_avg"][0])
+    upper = (None, None, None, bounds["download_avg"][1], bounds["upload_avg"][1])
+    for j, col in enumerate(NUMERIC_COLS):
+        x = _record_value(record, col)
+        if x != x and fill[j] is not None:
+            x = fill[j]
+        if j == 0 and x < 0:
+            logger.warning("Знайдено від'ємні значення в 'subscription_age'. Замінюємо на медіану.")
+            x = medians["subscription_age"]
+        if lower[j] is not None:
+            x = min(max(x, lower[j]), upper[j]) if x == x else x
+        out[2 + j] = (x - scaler.mean_[j]) / scaler.scale_[j]
+
+    out[7 + download_over_limit] = 1.0
+    return out
+
+
+def _record_value(record, col):
+    # Відсутні значення - 0, None - пропуск (NaN), як у DataFrame
+    value = record.get(col, 0)
+    return np.nan if value is None else float(value)
+
+
+def score_record(
+    record, model, scaler, stats, logger=None, cache=None, model_version=None, store=None
+):
+    """
+    Прогнозування ймовірності відтоку для одного клієнта без pandas.
+
+    Args:
+        record (dict): Дані клієнта (ключі як колонки вхідного CSV).
+        model: Навчена модель (RandomForestClassifier або CompiledForest).
+        scaler (StandardScaler): Об'єкт StandardScaler з параметрами нормалізації.
+        stats (dict): Статистики препроцесингу.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+        cache (PredictionCache, optional): Кеш прогнозів.
+        model_version (str, optional): Версія моделі для cache або store; за
+            замовчуванням - версія реєстру моделі (див. predict_churn).
+        store (ScoreBatch, optional): Сховище оцінок з прив'язаним ID клієнта.
+
+    Returns:
+        float: Ймовірність відтоку.
+    """
+    features = record_features(record, scaler, stats, logger=logger)
+    preds = predict_churn(
+        model,
+        features[None, :],
+        logger=logger,
+        cache=cache,
+        model_version=model_version,
+        store=store,
+    )
+    return float(preds[0])
+
+
+def risk_category(probabilities):
+    """
+    Визначення категорії ризику відтоку для масиву ймовірностей.
+
+    Args:
+        probabilities (np.ndarray): Ймовірності відтоку.
+
+    Returns:
+        np.ndarray: Категорії ризику ("Висока", "Середня", "Низька").
+    """
+    probabilities = np.asarray(probabilities)
+    return np.select(
+        [probabilities > HIGH_RISK_THRESHOLD, probabilities > LOW_RISK_THRESHOLD],
+        ["Висока", "Середня"],
+        default="Низька",
+    )
+
+
+def load_artifacts(project_root=None):
+    """
+    Завантаження моделі, scaler та статистик препроцесингу з кореня проєкту.
+
+    Args:
+        project_root (str, optional): Корінь проєкту з model.pkl, scaler.pkl та
+            preprocessing_stats.pkl.
+
+    Returns:
+        tuple: (model, scaler, stats).
+    """
+    model, scaler, stats, _ = get_registry(project_root).get()
+    return model, scaler, stats
+
+
+def _score_frame(df, model, scaler, stats):
+    # Препроцесинг і прогноз для однієї частини даних (виконується у воркерах)
+    return predict_churn(model, build_feature_matrix(df, scaler, stats))
+
+
+def _score_explain_frame(df, model, scaler, stats, explainer, n_reasons):
+    # Прогноз і ознаки з найбільшим внеском за однією матрицею ознак
+    features = build_feature_matrix(df, scaler, stats)
+    return predict_churn(model, features), explainer.top_features(features, n_reasons)
+
+
+def score_parallel(data, model, scaler, stats, n_workers=None, chunk_size=50_000):
+    """
+    Паралельне прогнозування для великого DataFrame на кількох ядрах.
+
+    Модель, scaler і дані передаються воркерам один раз (при fork - успадковуються
+    без серіалізації); порядок прогнозів збігається з порядком рядків.
+
+    Args:
+        data (pd.DataFrame): Вхідний DataFrame.
+        model: Навчена модель (RandomForestClassifier або CompiledForest).
+        scaler (StandardScaler): Об'єкт StandardScaler для нормалізації.
+        stats (dict): Статистики препроцесингу.
+        n_workers (int, optional): Кількість процесів. За замовчуванням - кількість ядер.
+        chunk_size (int, optional): Кількість рядків в одному завданні.
+
+    Returns:
+        np.ndarray: Ймовірності відтоку (клас 1).
+    """
+    return map_frame(
+        _score_frame, (model, scaler, stats), data, n_workers=n_workers, chunk_size=chunk_size
+    )
+
+
+def _timed_chunks(reader):
+    # Вимірювання розбору CSV: час отримання кожної частини з ітератора read_csv
+    while True:
+        with stage("parse_csv") as timer:
+            chunk = next(reader, None)
+            if chunk is not None and hasattr(timer, "rows"):
+                timer.rows = len(chunk)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def score_csv(
+    input_path,
+    output_path,
+    model,
+    scaler,
+    stats,
+    chunk_size=100_000,
+    id_col="id",
+    logger=None,
+    n_workers=1,
+    drift=None,
+    explainer=None,
+    n_reasons=TOP_REASONS,
+):
+    """
+    Потокове пакетне прогнозування для великого CSV-файлу.
+
+    Файл читається частинами фіксованого розміру, кожна частина обробляється і
+    прогнозується окремо, а рядки id,probability,risk_category дописуються у вихідний
+    файл (CSV, а для розширень .csv.gz та .parquet - стиснутий CSV або Parquet).
+    Пікове споживання пам'яті залежить від розміру частини, а не від розміру файлу.
+    Оскільки статистики препроцесингу фіксовані, результат збігається з обробкою
+    всього файлу за один раз. При n_workers > 1 частини прогнозуються паралельно
+    у пулі процесів, а порядок рядків у вихідному файлі зберігається.
+
+    Args:
+        input_path (str): Шлях до вхідного CSV.
+        output_path (str): Шлях до вихідного CSV.
+        model: Навчена модель.
+        scaler (StandardScaler): Об'єкт StandardScaler для нормалізації.
+        stats (dict): Статистики препроцесингу.
+        chunk_size (int, optional): Кількість рядків в одній частині.
+        id_col (str, optional): Назва колонки з ID клієнта.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+        n_workers (int, optional): Кількість процесів для прогнозування.
+        drift (DriftMonitor, optional): Монітор дрейфу; кожна частина додається до нього
+            після прогнозування, а неповне останнє вікно порівнюється з базовим розподілом
+            наприкінці.
+        explainer (ForestExplainer, optional): Якщо задано, до результатів додаються
+            колонки reason_1..reason_k та contribution_1..contribution_k
+            (ForestExplainer.top_features).
+        n_reasons (int, optional): Кількість ознак з найбільшим внеском для кожного клієнта.
+
+    Returns:
+        dict: Кількість рядків, час виконання та швидкість (рядків/с).
+
+    Raises:
+        ValueError: Якщо статистики препроцесингу не передані.
+    """
+    if logger is None:
+        logger = logging.getLogger(__name__)
+
+    if stats is None:
+        logger.error("Для потокового прогнозування потрібні статистики препроцесингу.")
+        raise ValueError("Для потокового прогнозування потрібні статистики препроцесингу.")
+
+    start = time.perf_counter()
+    rows = 0
+    chunks = _timed_chunks(pd.read_csv(input_path, chunksize=chunk_size))
+    if explainer is None:
+        scored = imap_ordered(_score_frame, (model, scaler, stats), chunks, n_workers=n_workers)
+    else:
+        scored = imap_ordered(
+            _score_explain_frame,
+            (model, scaler, stats, explainer, n_reasons),
+            chunks,
+            n_workers=n_workers,
+        )
+    with open(output_path, "wb") as out, ResultsWriter(out, format_for_path(output_path)) as writer:
+        for i, (chunk, result) in enumerate(scored):
+            preds, reasons = result if explainer is not None else (result, None)
+            if drift is not None:
+                drift.update(chunk)
+            if id_col in chunk.columns:
+                ids = chunk[id_col].to_numpy()
+            else:
+                ids = np.arange(rows + 1, rows + len(chunk) + 1)
+
+            results = pd.DataFrame(
+                {"id": ids, "probability": preds, "risk_category": risk_category(preds)}
+            )
+            if reasons is not None:
+                results = pd.concat([results, reasons], axis=1)
+            writer.write(results)
+
+            rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            logger.info(f"Оброблено частину {i + 1}: {rows} рядків, {rows / elapsed:.0f} рядків/с")
+
+    if drift is not None:
+        drift.check()
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+    }
+    logger.info(
+        f"Потокове прогнозування завершено: {rows} рядків за {elapsed:.2f} с "
+        f"({summary['rows_per_sec']:.0f} рядків/с)."
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Потокове пакетне прогнозування відтоку.")
+    parser.add_argument("input", help="Шлях до вхідного CSV з даними клієнтів.")
+    parser.add_argument(
+        "output", help="Шлях до вихідного файлу з прогнозами (.csv, .csv.gz або .parquet)."
+    )
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Рядків в одній частині.")
+    parser.add_argument(
+        "--compiled", action="store_true", help="Використовувати скомпільовану модель."
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Кількість процесів.")
+    parser.add_argument(
+        "--metrics-json", help="Зберегти метрики етапів у JSON (вмикає інструментування)."
+    )
+    parser.add_argument(
+        "--drift", action="store_true", help="Порівнювати ознаки з базовим розподілом навчання."
+    )
+    parser.add_argument(
+        "--explain",
+        type=int,
+        metavar="K",
+        help="Додати K ознак з найбільшим внеском у ймовірність відтоку для кожного клієнта.",
+    )
+    args = parser.parse_args()
+    if args.metrics_json:
+        enable_instrumentation()
+
+    model, scaler, stats = load_artifacts()
+    # Пояснювач будується за деревами sklearn, до компіляції моделі
+    explainer = get_explainer(model) if args.explain else None
+    if args.compiled and backend_of(model) == "random_forest":
+        model = compile_forest(model)
+    score_csv(
+        args.input,
+        args.output,
+        model,
+        scaler,
+        stats,
+        chunk_size=args.chunk_size,
+        n_workers=args.workers,
+        drift=get_drift_monitor(stats) if args.drift else None,
+        explainer=explainer,
+        n_reasons=args.explain or TOP_REASONS,
+    )
+    if args.metrics_json:
+        dump_json(args.metrics_json)
@@ -0,0 +1,262 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Межі кошиків гістограми тривалості етапів, с
+DURATION_BUCKETS = [
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+]
+
+# Змінна середовища, що вмикає інструментування під час імпорту
+ENV_VAR = "CHURN_INSTRUMENTATION"
+
+_enabled = os.environ.get(ENV_VAR, "").lower() in ("1", "true", "yes")
+_stages = {}
+_collectors = []
+_lock = threading.Lock()
+
+
+class StageMetrics:
+    """
+    Метрики одного етапу: гістограма тривалості, кількість рядків та помилок.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.bucket_counts = [0] * (len(DURATION_BUCKETS) + 1)
+
+    def record(self, seconds, rows, error):
+        self.count += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.errors += int(error)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+
+class _NoopStage:
+    # Спільний контекст для вимкненого інструментування: жодних вимірювань і алокацій
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Stage:
+    __slots__ = ("name", "rows", "start")
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        with _lock:
+            metrics = _stages.get(self.name)
+            if metrics is None:
+                metrics = _stages[self.name] = StageMetrics()
+            metrics.record(seconds, self.rows, exc_type is not None)
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+def stage(name, rows=0):
+    """
+    Контекст вимірювання етапу обробки.
+
+    Якщо інструментування вимкнене, повертається спільний порожній контекст, тож
+    накладні витрати зводяться до одного виклику функції.
+
+    Args:
+        name (str): Назва етапу (наприклад, "impute").
+        rows (int, optional): Кількість рядків, оброблених етапом.
+
+    Returns:
+        Контекстний менеджер; виняток усередині рахується як помилка етапу.
+    """
+    if not _enabled:
+        return _NOOP
+    return _Stage(name, rows)
+
+
+def enable(enabled=True):
+    """
+    Увімкнення або вимкнення інструментування.
+
+    Args:
+        enabled (bool, optional): Новий стан.
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    """
+    Стан інструментування.
+
+    Returns:
+        bool: True, якщо етапи вимірюються.
+    """
+    return _enabled
+
+
+def reset():
+    """
+    Скидання накопичених метрик.
+    """
+    with _lock:
+        _stages.clear()
+
+
+def snapshot():
+    """
+    Поточні метрики етапів.
+
+    Returns:
+        dict: Для кожного етапу - кількість викликів, сумарний і середній час, рядки,
+            помилки та гістограма тривалості.
+    """
+    labels = [str(b) for b in DURATION_BUCKETS] + ["+Inf"]
+    with _lock:
+        return {
+            name: {
+                "count": m.count,
+                "seconds": m.seconds,
+                "mean_ms": m.seconds / m.count * 1000 if m.count else 0.0,
+                "rows": m.rows,
+                "errors": m.errors,
+                "duration_histogram": dict(zip(labels, m.bucket_counts)),
+            }
+            for name, m in sorted(_stages.items())
+        }
+
+
+def register_collector(collector):
+    """
+    Додаткове джерело метрик для prometheus_text (наприклад, монітор дрейфу).
+
+    Args:
+        collector (callable): Функція без аргументів, що повертає рядок у текстовому
+            форматі Prometheus.
+    """
+    with _lock:
+        _collectors.append(collector)
+
+
+def dump_json(path):
+    """
+    Збереження метрик етапів у JSON.
+
+    Args:
+        path (str): Шлях до файлу.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+
+
+def prometheus_text():
+    """
+    Метрики етапів у текстовому форматі Prometheus.
+
+    Returns:
+        str: Гістограма churn_stage_duration_seconds та лічильники
+            churn_stage_rows_total і churn_stage_errors_total з міткою stage, а також
+            метрики зареєстрованих джерел (register_collector).
+    """
+    lines = [
+        "# HELP churn_stage_duration_seconds Тривалість етапу обробки.",
+        "# TYPE churn_stage_duration_seconds histogram",
+    ]
+    rows = [
+        "# HELP churn_stage_rows_total Рядків оброблено етапом.",
+        "# TYPE churn_stage_rows_total counter",
+    ]
+    errors = [
+        "# HELP churn_stage_errors_total Помилок етапу.",
+        "# TYPE churn_stage_errors_total counter",
+    ]
+    with _lock:
+        for name, m in sorted(_stages.items()):
+            cumulative = 0
+            for bound, n in zip(DURATION_BUCKETS + ["+Inf"], m.bucket_counts):
+                cumulative += n
+                lines.append(
+                    f'churn_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(f'churn_stage_duration_seconds_sum{{stage="{name}"}} {m.seconds}')
+            lines.append(f'churn_stage_duration_seconds_count{{stage="{name}"}} {m.count}')
+            rows.append(f'churn_stage_rows_total{{stage="{name}"}} {m.rows}')
+            errors.append(f'churn_stage_errors_total{{stage="{name}"}} {m.errors}')
+        collectors = list(_collectors)
+    return "\n".join(lines + rows + errors) + "\n" + "".join(c() for c in collectors)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            body, content_type = prometheus_text(), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(snapshot()), "application/json; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=9100, host="127.0.0.1"):
+    """
+    Запуск HTTP-ендпоінта метрик у фоновому потоці та увімкнення інструментування.
+
+    GET /metrics повертає текстовий формат Prometheus, GET /metrics.json - JSON.
+
+    Args:
+        port (int, optional): Порт для прослуховування.
+        host (str, optional): Адреса для прослуховування (за замовчуванням лише локальна).
+
+    Returns:
+        ThreadingHTTPServer: Запущений сервер (server.shutdown() зупиняє його).
+    """
+    enable()
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,373 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from drift import get_drift_monitor
+from explain import get_explainer
+from export import ResultsWriter
+from inference import build_feature_matrix, predict_churn, risk_category
+from registry import get_registry
+
+# Каталог завдань у корені проєкту
+JOBS_DIR = "jobs"
+
+# Кількість рядків, що обробляються завданням за один крок (крок прогресу)
+JOB_CHUNK_SIZE = 50_000
+
+# Колонки, що розпізнаються як ID клієнта (без урахування регістру)
+ID_COLUMNS = ["id", "client_id", "customer_id"]
+
+# Стани завдання
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+# Стани, після яких завдання більше не змінюється
+FINISHED_STATES = {DONE, FAILED, CANCELLED, INTERRUPTED}
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """
+    Завдання скасовано між частинами.
+    """
+
+
+class JobManager:
+    """
+    Фонові завдання пакетного прогнозування з результатами на локальному диску.
+
+    Кожне завдання має каталог jobs/<id> з вхідним CSV (input.csv), станом
+    (status.json, перезаписується атомарно після кожної частини) та результатами
+    (results.parquet: id, probability, risk_category). ID завдання - хеш вмісту файлу,
+    версії моделі та параметрів менеджера (explain, chunk_size), тому повторне
+    завантаження того самого файлу, перезавантаження сторінки або інша сесія
+    отримують готові результати без повторного прогнозування.
+    Завдання виконуються у пулі потоків; скасування - файл-маркер cancel, що
+    перевіряється між частинами, тож скасувати завдання може будь-яка сесія.
+
+    Args:
+        root_dir (str, optional): Каталог завдань; за замовчуванням jobs/ у корені проєкту.
+        registry (ModelRegistry, optional): Реєстр моделі; за замовчуванням спільний.
+        max_workers (int, optional): Кількість одночасних завдань.
+        chunk_size (int, optional): Кількість рядків в одній частині.
+        cache (PredictionCache, optional): Кеш прогнозів для predict_churn.
+        store (ScoreStore, optional): Сховище оцінок, у яке записуються прогнози завдань.
+        explain (bool, optional): Якщо True, до результатів додаються ознаки з найбільшим
+            внеском у ймовірність відтоку (ForestExplainer.top_features).
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+    """
+
+    def __init__(
+        self,
+        root_dir=None,
+        registry=None,
+        max_workers=2,
+        chunk_size=JOB_CHUNK_SIZE,
+        cache=None,
+        store=None,
+        explain=False,
+        logger=None,
+    ):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.root_dir = root_dir or os.path.join(project_root, JOBS_DIR)
+        self.registry = registry or get_registry(project_root)
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.store = store
+        self.explain = explain
+        self.logger = logger or logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._futures = {}
+        os.makedirs(self.root_dir, exist_ok=True)
+        self._mark_interrupted()
+
+    def _path(self, job_id, name=None):
+        path = os.path.join(self.root_dir, job_id)
+        return path if name is None else os.path.join(path, name)
+
+    def _write_status(self, job_id, **fields):
+        status = self.status(job_id) or {}
+        status.update(fields, updated=time.time())
+        tmp_path = self._path(job_id, f"status.json.tmp-{threading.get_ident()}")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(status, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(job_id, "status.json"))
+        return status
+
+    def _mark_interrupted(self):
+        # Незавершені завдання попереднього процесу вже ніхто не виконує
+        for job_id in os.listdir(self.root_dir):
+            status = self.status(job_id)
+            if status is not None and status["state"] not in FINISHED_STATES:
+                self._write_status(job_id, state=INTERRUPTED)
+                self.logger.warning(f"Завдання {job_id} перервано перезапуском процесу.")
+
+    def submit(self, data, filename=None):
+        """
+        Постановка CSV у чергу прогнозування.
+
+        Args:
+            data (bytes): Вміст CSV-файлу.
+            filename (str, optional): Назва файлу для відображення.
+
+        Returns:
+            str: ID завдання. Якщо такий самий файл уже оброблено (або обробляється)
+                поточною версією моделі з тими самими параметрами, повертається ID існуючого
+                завдання.
+
+        Raises:
+            ValueError: Якщо файл порожній.
+        """
+        if not data:
+            self.logger.error("Файл для прогнозування порожній.")
+            raise ValueError("Файл для прогнозування порожній.")
+        version = self.registry.get().version
+        # Параметри, від яких залежать результати, входять до ключа: менеджери з різними
+        # параметрами можуть ділити каталог завдань
+        key = f"{version}:explain={self.explain}:chunk_size={self.chunk_size}"
+        job_id = hashlib.sha256(data + key.encode("utf-8")).hexdigest()[:16]
+
+        with self._lock:
+            status = self.status(job_id)
+            if status is not None and status["state"] not in {FAILED, CANCELLED, INTERRUPTED}:
+                self.logger.info(f"Завдання {job_id} вже існує ({status['state']}).")
+                return job_id
+
+            shutil.rmtree(self._path(job_id), ignore_errors=True)
+            os.makedirs(self._path(job_id))
+            with open(self._path(job_id, "input.csv"), "wb") as f:
+                f.write(data)
+            self._write_status(
+                job_id,
+                id=job_id,
+                state=QUEUED,
+                filename=filename,
+                model_version=version,
+                # Оцінка за кількістю рядків файлу; точне значення - після завершення
+                rows_total=max(data.count(b"\n") - 1, 1),
+                rows_done=0,
+                chunks_done=0,
+                error=None,
+                created=time.time(),
+            )
+            self._futures[job_id] = self._executor.submit(self._run, job_id)
+        self.logger.info(f"Завдання {job_id} поставлено в чергу.")
+        return job_id
+
+    def _check_cancelled(self, job_id):
+        if os.path.exists(self._path(job_id, "cancel")):
+            raise JobCancelled()
+
+    def _run(self, job_id):
+        output_path = self._path(job_id, "results.parquet")
+        tmp_path = f"{output_path}.tmp"
+        try:
+            self._check_cancelled(job_id)
+            bundle = self.registry.get()
+            input_path = self._path(job_id, "input.csv")
+            header = pd.read_csv(input_path, nrows=0).columns
+            id_col = next((col for col in header if col.lower() in ID_COLUMNS), None)
+            self._write_status(job_id, state=RUNNING, model_version=bundle.version)
+            explainer = get_explainer(bundle.model) if self.explain else None
+
+            rows = 0
+            with open(tmp_path, "wb") as out, ResultsWriter(out, "parquet") as writer:
+                for i, chunk in enumerate(pd.read_csv(input_path, chunksize=self.chunk_size)):
+                    self._check_cancelled(job_id)
+                    features = build_feature_matrix(
+                        chunk, bundle.scaler, bundle.stats, logger=self.logger
+                    )
+                    if id_col is not None:
+                        ids = chunk[id_col].to_numpy()
+                    else:
+                        ids = np.arange(rows + 1, rows + len(chunk) + 1)
+                    # Автоматичні номери рядків не ідентифікують клієнтів між файлами,
+                    # тому у сховище потрапляють лише файли з колонкою ID
+                    store = None
+                    if self.store is not None and id_col is not None:
+                        store = self.store.batch(ids)
+                    preds = predict_churn(
+                        bundle.model,
+                        features,
+                        logger=self.logger,
+                        cache=self.cache,
+                        model_version=bundle.version,
+                        store=store,
+                    )
+                    # У монітор дрейфу потрапляють лише успішно спрогнозовані частини
+                    drift = get_drift_monitor(bundle.stats)
+                    if drift is not None:
+                        drift.update(chunk)
+                    results = pd.DataFrame(
+                        {"id": ids, "probability": preds, "risk_category": risk_category(preds)}
+                    )
+                    if explainer is not None:
+                        results = pd.concat([results, explainer.top_features(features)], axis=1)
+                    writer.write(results)
+                    rows += len(chunk)
+                    self._write_status(job_id, rows_done=rows, chunks_done=i + 1)
+            os.replace(tmp_path, output_path)
+            self._write_status(job_id, state=DONE, rows_total=rows, id_column=id_col)
+            self.logger.info(f"Завдання {job_id} завершено: {rows} рядків.")
+        except JobCancelled:
+            self._write_status(job_id, state=CANCELLED)
+            self.logger.info(f"Завдання {job_id} скасовано.")
+        except Exception as e:
+            self._write_status(job_id, state=FAILED, error=str(e))
+            self.logger.error(f"Завдання {job_id} завершилося з помилкою: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock:
+                self._futures.pop(job_id, None)
+
+    def status(self, job_id):
+        """
+        Стан завдання.
+
+        Args:
+            job_id (str): ID завдання.
+
+        Returns:
+            dict: Стан, прогрес (rows_done з rows_total, chunks_done), версія моделі та помилка;
+                None, якщо завдання не існує.
+        """
+        try:
+            with open(self._path(job_id, "status.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def cancel(self, job_id):
+        """
+        Скасування завдання: ще не розпочате не запускається, розпочате зупиняється
+        перед наступною частиною.
+
+        Args:
+            job_id (str): ID завдання.
+
+        Returns:
+            bool: True, якщо завдання ще не завершене і буде скасоване.
+        """
+        status = self.status(job_id)
+        if status is None or status["state"] in FINISHED_STATES:
+            return False
+        open(self._path(job_id, "cancel"), "w").close()
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            # Завдання ще чекало в черзі пулу і вже не запуститься, тож _run не прибере
+            # його з _futures
+            with self._lock:
+                self._futures.pop(job_id, None)
+            self._write_status(job_id, state=CANCELLED)
+        return True
+
+    def results(self, job_id):
+        """
+        Результати завершеного завдання.
+
+        Args:
+            job_id (str): ID завдання.
+
+        Returns:
+            pd.DataFrame: Колонки id, probability, risk_category (та reason_*,
+                contribution_*, якщо менеджер створено з explain=True).
+
+        Raises:
+            ValueError: Якщо завдання не завершене успішно.
+        """
+        status = self.status(job_id)
+        if status is None or status["state"] != DONE:
+            raise ValueError(f"Результати завдання {job_id} недоступні.")
+        return pd.read_parquet(self._path(job_id, "results.parquet"))
+
+    def list_jobs(self):
+        """
+        Стан усіх завдань, від найновішого.
+
+        Returns:
+            list[dict]: Стани завдань.
+        """
+        jobs = [self.status(job_id) for job_id in os.listdir(self.root_dir)]
+        return sorted(
+            (job for job in jobs if job is not None), key=lambda job: -job.get("created", 0)
+        )
+
+    def shutdown(self, wait=True):
+        """
+        Зупинка пулу потоків.
+
+        Args:
+            wait (bool, optional): Чекати завершення завдань, що виконуються.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def get_job_manager(root_dir=None, **kwargs):
+    """
+    Спільний для процесу менеджер фонових завдань.
+
+    Args:
+        root_dir (str, optional): Каталог завдань.
+        **kwargs: Параметри JobManager (при першому виклику).
+
+    Returns:
+        JobManager: Менеджер завдань.
+    """
+    key = os.path.abspath(root_dir) if root_dir else None
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = JobManager(root_dir, **kwargs)
+        return _managers[key]
+
+
+if __name__ == "__main__":
+    # Завдання на синтетичних даних: прогрес по частинах, скасування та повторне використання
+    import io
+    import tempfile
+
+    from benchmark import generate_synthetic
+
+    logging.basicConfig(level=logging.ERROR)
+    buffer = io.BytesIO()
+    generate_synthetic(300_000).drop(columns=["churn"]).to_csv(buffer, index=False)
+    data = buffer.getvalue()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = JobManager(tmp, max_workers=1)
+        start = time.perf_counter()
+        job_id = manager.submit(data, "synthetic.csv")
+        while manager.status(job_id)["state"] not in FINISHED_STATES:
+            status = manager.status(job_id)
+            print(f"{status['state']:>9}: {status['rows_done']} рядків")
+            time.sleep(0.5)
+        print(f"завершено за {time.perf_counter() - start:.2f} с: {manager.status(job_id)}")
+
+        start = time.perf_counter()
+        assert manager.submit(data) == job_id
+        results = manager.results(job_id)
+        print(f"повторне завантаження: {time.perf_counter() - start:.3f} с, {len(results)} рядків")
+
+        other = manager.submit(data + b"\n")
+        time.sleep(0.3)
+        manager.cancel(other)
+        while manager.status(other)["state"] not in FINISHED_STATES:
+            time.sleep(0.1)
+        print(f"скасоване завдання: {manager.status(other)}")
+        manager.shutdown()
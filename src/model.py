@@ -1,70 +1,839 @@
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import ParameterSampler, StratifiedKFold, train_test_split
 from sklearn.ensemble import RandomForestClassifier
-from preprocessing import preprocess_data
+from backends import (
+    BACKEND_PARAMS,
+    DEFAULT_BACKEND,
+    RF_PARAMS,
+    backend_of,
+    backend_version,
+    make_estimator,
+)
+from preprocessing import (
+    NUMERIC_COLS,
+    PREPROCESSING_STATS_VERSION,
+    fit_preprocessing_counts,
+    fit_preprocessing_stats,
+    load_preprocessing_stats,
+    merge_preprocessing_counts,
+    preprocess_data,
+    save_preprocessing_stats,
+    stats_from_counts,
+    update_drift_baseline,
+)
+from artifacts import save_bundle
+from dataset import file_hash, load_dataset
+from inference import predict_churn, preprocess_input, risk_category
+from compiled_forest import EARLY_EXIT_CHUNK_TREES, compile_forest
+from parallel import imap_ordered
+from registry import ARTIFACT_FILES, ARTIFACT_MANIFEST, artifact_version
 import pickle
 from sklearn.metrics import classification_report
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import shutil
+import filecmp
+import hashlib
+import copy
+from types import SimpleNamespace
 
+# Параметри розбиття на навчальну та тестову вибірки
+SPLIT_PARAMS = {"test_size": 0.2, "random_state": 42}
 
-def model_rf():
-    # Визначаємо корінь проєкту (на один рівень вище від src)
-    current_dir = os.path.dirname(os.path.abspath(__file__))  # Поточна директорія (src)
-    project_root = os.path.dirname(current_dir)  # Корінь проєкту (на один рівень вище)
+# Простір пошуку гіперпараметрів (n_estimators - ресурс successive halving)
+SEARCH_SPACE = {
+    "max_depth": [2, 3, 4, 5, 6, 8],
+    "min_samples_split": [2, 5, 10, 14, 20],
+    "min_samples_leaf": [1, 3, 5, 9, 15],
+    "max_features": ["sqrt", "log2", None],
+    "bootstrap": [True, False],
+}
 
-    data_path = os.path.join(project_root, "datasets", "internet_service_churn.csv")
+# Каталог збережених наборів артефактів, по одному на відбиток навчання
+MODEL_STORE_DIR = "model_store"
+
+# Допустимі похибки, для яких будується крива точність/затримка ранньої зупинки
+EARLY_EXIT_TOLERANCES = [0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2]
+
+# Артефакти, що публікуються з набору у корінь проєкту
+PUBLISHED_FILES = ["model.pkl", "scaler.pkl", "preprocessing_stats.pkl", "feature_importance.png"]
+
+
+def training_fingerprint(data_path, backend=DEFAULT_BACKEND):
+    """
+    Відбиток навчання: хеш датасету, бекенду та гіперпараметрів, коду препроцесингу
+    та версій бібліотек.
+
+    Args:
+        data_path (str): Шлях до CSV файлу з даними.
+        backend (str, optional): Бекенд моделі (див. backends.py).
+
+    Returns:
+        tuple: (відбиток, словник вхідних даних відбитку).
+    """
+    import numpy
+    import sklearn
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    inputs = {
+        "dataset_sha256": file_hash(data_path),
+        "backend": backend,
+        "model_params": BACKEND_PARAMS[backend],
+        "split_params": SPLIT_PARAMS,
+        "preprocessing_stats_version": PREPROCESSING_STATS_VERSION,
+        "preprocessing_code_sha256": {
+            name: file_hash(os.path.join(src_dir, name))
+            for name in ["preprocessing.py", "dataset.py"]
+        },
+        "libraries": {
+            "python": "%d.%d" % sys.version_info[:2],
+            "numpy": numpy.__version__,
+            "pandas": pd.__version__,
+            "scikit-learn": sklearn.__version__,
+        },
+    }
+    if backend != "random_forest":
+        inputs["libraries"][backend] = backend_version(backend)
+    payload = json.dumps(inputs, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16], inputs
+
+
+def _copy_atomic(src, dst):
+    # Копіювання через тимчасовий файл, щоб застосунок не прочитав частковий артефакт
+    shutil.copyfile(src, dst + ".tmp")
+    os.replace(dst + ".tmp", dst)
+
+
+def _write_atomic(path, text):
+    # Запис текстового файлу через тимчасовий файл і os.replace
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+def publish_artifacts(store_path, project_root):
+    """
+    Публікація набору артефактів у корінь проєкту, звідки їх читає реєстр моделі.
 
-    cleaned_data, scaler = preprocess_data(data_path, return_scaler=True)
+    Файли, що вже збігаються за вмістом, не переписуються. Кожен файл замінюється
+    атомарно, але набір - ні, тому після всіх файлів атомарно записується маніфест
+    artifacts.json (версія, каталог набору та SHA-256 кожного файлу): реєстр
+    завантажує лише набір, що збігається з маніфестом, і не змішує нову модель
+    зі старим scaler.
+
+    Args:
+        store_path (str): Каталог набору артефактів.
+        project_root (str): Корінь проєкту.
+    """
+    for name in PUBLISHED_FILES:
+        src = os.path.join(store_path, name)
+        dst = os.path.join(project_root, name)
+        if not os.path.exists(dst) or not filecmp.cmp(src, dst, shallow=False):
+            _copy_atomic(src, dst)
+
+    contents = []
+    for name in ARTIFACT_FILES:
+        with open(os.path.join(store_path, name), "rb") as f:
+            contents.append(f.read())
+    manifest = {
+        "version": artifact_version(contents),
+        "source": os.path.basename(store_path),
+        "files": {
+            name: hashlib.sha256(data).hexdigest() for name, data in zip(ARTIFACT_FILES, contents)
+        },
+    }
+    _write_atomic(os.path.join(project_root, ARTIFACT_MANIFEST), json.dumps(manifest, indent=2))
+
+    # Покажчик на опублікований набір (база для інкрементного оновлення)
+    _write_atomic(
+        os.path.join(os.path.dirname(store_path), "CURRENT"), os.path.basename(store_path)
+    )
+
+    bundle_src = os.path.join(store_path, "model_bundle")
+    bundle_dst = os.path.join(project_root, "model_bundle")
+    if not os.path.exists(bundle_src):
+        # Пакет масивів є лише для RandomForest; застарілий пакет іншої моделі видаляється
+        shutil.rmtree(bundle_dst, ignore_errors=True)
+        return
+    if os.path.exists(os.path.join(bundle_dst, "manifest.json")) and filecmp.cmp(
+        os.path.join(bundle_src, "manifest.json"),
+        os.path.join(bundle_dst, "manifest.json"),
+        shallow=False,
+    ):
+        return
+    tmp_path = f"{bundle_dst}.tmp-{os.getpid()}"
+    old_path = f"{bundle_dst}.old-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    shutil.copytree(bundle_src, tmp_path)
+    if os.path.exists(bundle_dst):
+        os.replace(bundle_dst, old_path)
+    os.replace(tmp_path, bundle_dst)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def train_artifacts(data_path, store_path, fingerprint, inputs, backend=DEFAULT_BACKEND):
+    """
+    Навчання моделі та збереження набору артефактів з маніфестом.
+
+    Набір записується у тимчасовий каталог і перейменовується у store_path лише
+    після запису маніфесту, тому перерване навчання не залишає неповний набір.
+
+    Args:
+        data_path (str): Шлях до CSV файлу з даними.
+        store_path (str): Каталог набору артефактів.
+        fingerprint (str): Відбиток навчання.
+        inputs (dict): Вхідні дані відбитку.
+        backend (str, optional): Бекенд моделі (див. backends.py).
+
+    Returns:
+        Навчена модель.
+    """
+    tmp_path = f"{store_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    # Статистики препроцесингу зберігаються поруч зі scaler.pkl
+    stats_path = os.path.join(tmp_path, "preprocessing_stats.pkl")
+    cleaned_data, scaler = preprocess_data(data_path, return_scaler=True, stats_path=stats_path)
 
     X = cleaned_data.drop(columns=["churn"])
     y = cleaned_data["churn"]
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, **SPLIT_PARAMS)
 
-    model = RandomForestClassifier(
-        n_estimators=368,
-        max_depth=3,
-        min_samples_split=14,
-        min_samples_leaf=9,
-        max_features="sqrt",
-        bootstrap=False,
-    )
+    model = make_estimator(backend)
 
     model.fit(X_train, y_train)
 
-    # Зберігаємо модель і scaler у корені проєкту
-    model_path = os.path.join(project_root, "model.pkl")
-    scaler_path = os.path.join(project_root, "scaler.pkl")
-
-    with open(model_path, "wb") as f:
-        pickle.dump(model, f)
-    with open(scaler_path, "wb") as f:
-        pickle.dump(scaler, f)
+    # Частоти значень для інкрементного оновлення статистик (update_model)
+    counts = fit_preprocessing_counts(load_dataset(data_path))
+    _write_model_files(tmp_path, model, scaler, load_preprocessing_stats(stats_path), counts)
 
     y_pred = model.predict(X_test)
     print("Classification Report:")
     print(classification_report(y_test, y_pred))
 
+    manifest = {
+        "fingerprint": fingerprint,
+        "backend": backend,
+        "inputs": inputs,
+        "metrics": classification_report(y_test, y_pred, output_dict=True),
+    }
+    _finalize_store(tmp_path, store_path, manifest)
+    return model
+
+
+def _write_model_files(path, model, scaler, stats, counts):
+    # Модель, scaler, статистики, частоти, пакет масивів та графік важливості ознак
+    # Бібліотеки візуалізації потрібні лише тут (прискорює пропуск навчання)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    for name, obj in [
+        ("model.pkl", model),
+        ("scaler.pkl", scaler),
+        ("preprocessing_counts.pkl", counts),
+    ]:
+        with open(os.path.join(path, name), "wb") as f:
+            pickle.dump(obj, f)
+    save_preprocessing_stats(stats, os.path.join(path, "preprocessing_stats.pkl"))
+
+    # Пакет сирих масивів для швидкого завантаження з відображенням у пам'ять (лише RandomForest)
+    if backend_of(model) == "random_forest":
+        save_bundle(model, scaler, stats, os.path.join(path, "model_bundle"))
+
     # Аналіз важливості ознак
     feature_importance = pd.DataFrame(
-        {"feature": X.columns, "importance": model.feature_importances_}
+        {"feature": model.feature_names_in_, "importance": model.feature_importances_}
     ).sort_values(by="importance", ascending=False)
 
     print("\nFeature Importance:")
     print(feature_importance)
 
-    # Візуалізація важливості ознак (зберігаємо в корені проєкту)
+    # Візуалізація важливості ознак
     plt.figure(figsize=(10, 6))
     sns.barplot(x="importance", y="feature", data=feature_importance)
     plt.title("Feature Importance in Random Forest")
     plt.tight_layout()
-    plt.savefig(os.path.join(project_root, "feature_importance.png"))
+    plt.savefig(os.path.join(path, "feature_importance.png"))
     plt.close()
 
+
+def _finalize_store(tmp_path, store_path, manifest):
+    # Маніфест пишеться останнім, після чого набір атомарно займає своє місце
+    with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(store_path, ignore_errors=True)
+    os.replace(tmp_path, store_path)
+
+
+def update_forest(model, scaler, counts, new_data, n_new_trees=32, retire_oldest=0):
+    """
+    Інкрементне оновлення лісу на нових розмічених рядках.
+
+    Частоти значень доповнюються новими рядками, і статистики препроцесингу
+    перераховуються з них без проходу по історії. Scaler оновлюється через
+    partial_fit, а пороги наявних дерев по числових ознаках перераховуються у нову
+    шкалу нормалізації, тож старі дерева бачать ті самі сирі значення. Після
+    цього, за потреби, відкидаються retire_oldest найстаріших дерев, а ліс
+    доповнюється n_new_trees деревами, навченими лише на нових рядках (warm_start).
+
+    Args:
+        model (RandomForestClassifier): Поточна модель (не змінюється).
+        scaler (StandardScaler): Поточний scaler (не змінюється).
+        counts (dict): Частоти значень історичних даних (fit_preprocessing_counts).
+        new_data (pd.DataFrame): Нові сирі рядки з колонкою churn.
+        n_new_trees (int, optional): Кількість нових дерев.
+        retire_oldest (int, optional): Кількість найстаріших дерев, що відкидаються.
+
+    Returns:
+        tuple: (model, scaler, stats, counts) після оновлення.
+
+    Raises:
+        ValueError: Якщо нові дані не містять усіх класів або в лісі не лишиться дерев.
+    """
+    y = new_data["churn"].to_numpy()
+    if len(np.unique(y)) < len(model.classes_):
+        raise ValueError("Нові дані повинні містити всі класи churn.")
+    if retire_oldest >= len(model.estimators_) + n_new_trees:
+        raise ValueError("Після відкидання старих дерев у лісі не залишиться дерев.")
+
+    counts = merge_preprocessing_counts(counts, fit_preprocessing_counts(new_data))
+    stats = stats_from_counts(counts)
+
+    # Числові ознаки після заповнення пропусків і обмеження викидів, без нормалізації
+    identity = SimpleNamespace(mean_=np.zeros(len(NUMERIC_COLS)), scale_=np.ones(len(NUMERIC_COLS)))
+    X = preprocess_input(new_data, scaler=identity, stats=stats)
+    new_scaler = copy.deepcopy(scaler)
+    new_scaler.partial_fit(X[NUMERIC_COLS])
+    X[NUMERIC_COLS] = new_scaler.transform(X[NUMERIC_COLS])
+
+    model = copy.deepcopy(model)
+    feature_names = list(model.feature_names_in_)
+    indices = [feature_names.index(col) for col in NUMERIC_COLS]
+    for estimator in model.estimators_:
+        # Масив вузлів перезбирається через стан, яким sklearn серіалізує дерево
+        # (__getstate__/__setstate__), а не записом у буфер tree_.threshold
+        state = estimator.tree_.__getstate__()
+        nodes = state["nodes"].copy()
+        for j, index in enumerate(indices):
+            mask = nodes["feature"] == index
+            raw = nodes["threshold"][mask] * scaler.scale_[j] + scaler.mean_[j]
+            nodes["threshold"][mask] = (raw - new_scaler.mean_[j]) / new_scaler.scale_[j]
+        state["nodes"] = nodes
+        estimator.tree_.__setstate__(state)
+
+    if retire_oldest:
+        model.estimators_ = model.estimators_[retire_oldest:]
+    model.n_estimators = len(model.estimators_) + n_new_trees
+    if n_new_trees:
+        model.warm_start = True
+        model.fit(X, y)
+        model.warm_start = False
+    return model, new_scaler, stats, counts
+
+
+def update_model(new_data_path, base=None, n_new_trees=32, retire_oldest=0):
+    """
+    Оновлення опублікованої моделі на нових розмічених даних без повного навчання.
+
+    Оновлений набір зберігається у model_store/<відбиток> (відбиток - хеш бази, нових
+    даних і параметрів оновлення) з маніфестом і публікується у корінь проєкту.
+
+    Args:
+        new_data_path (str): CSV з новими розміченими рядками.
+        base (str, optional): Відбиток набору, що оновлюється. За замовчуванням -
+            опублікований набір (model_store/CURRENT).
+        n_new_trees (int, optional): Кількість нових дерев.
+        retire_oldest (int, optional): Кількість найстаріших дерев, що відкидаються.
+
+    Returns:
+        RandomForestClassifier: Оновлена модель.
+
+    Raises:
+        ValueError: Якщо базовий набір не містить частот значень або модель не є
+            RandomForest.
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    store_dir = os.path.join(project_root, MODEL_STORE_DIR)
+    if base is None:
+        with open(os.path.join(store_dir, "CURRENT")) as f:
+            base = f.read().strip()
+    base_path = os.path.join(store_dir, base)
+    if not os.path.exists(os.path.join(base_path, "preprocessing_counts.pkl")):
+        raise ValueError(f"Набір {base} не містить частот значень; перенавчіть модель (--force).")
+
+    update = {
+        "base": base,
+        "new_data_sha256": file_hash(new_data_path),
+        "n_new_trees": n_new_trees,
+        "retire_oldest": retire_oldest,
+    }
+    payload = json.dumps(update, sort_keys=True).encode("utf-8")
+    fingerprint = hashlib.sha256(payload).hexdigest()[:16]
+    store_path = os.path.join(store_dir, fingerprint)
+
+    if os.path.exists(os.path.join(store_path, "manifest.json")):
+        print(f"Оновлення {fingerprint} вже виконано, використовується збережений набір.")
+        with open(os.path.join(store_path, "model.pkl"), "rb") as f:
+            model = pickle.load(f)
+        publish_artifacts(store_path, project_root)
+        return model
+
+    loaded = []
+    for name in ["model.pkl", "scaler.pkl", "preprocessing_counts.pkl"]:
+        with open(os.path.join(base_path, name), "rb") as f:
+            loaded.append(pickle.load(f))
+    if backend_of(loaded[0]) != "random_forest":
+        raise ValueError("Інкрементне оновлення підтримується лише для RandomForest.")
+    new_data = load_dataset(new_data_path)
+
+    start = time.perf_counter()
+    model, scaler, stats, counts = update_forest(
+        *loaded, new_data, n_new_trees=n_new_trees, retire_oldest=retire_oldest
+    )
+    seconds = time.perf_counter() - start
+    # Базовий розподіл для монітора дрейфу доповнюється новими рядками з тими самими кошиками
+    base_stats = load_preprocessing_stats(os.path.join(base_path, "preprocessing_stats.pkl"))
+    if "drift" in base_stats:
+        stats["drift"] = update_drift_baseline(base_stats["drift"], new_data)
+    print(
+        f"Модель оновлено на {len(new_data)} рядках за {seconds:.2f} с: "
+        f"{len(model.estimators_)} дерев, {counts['rows']} рядків в історії статистик."
+    )
+
+    tmp_path = f"{store_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    _write_model_files(tmp_path, model, scaler, stats, counts)
+    manifest = {
+        "fingerprint": fingerprint,
+        "parent": base,
+        "update": {**update, "rows": len(new_data), "n_estimators": len(model.estimators_)},
+        "seconds": seconds,
+    }
+    _finalize_store(tmp_path, store_path, manifest)
+    publish_artifacts(store_path, project_root)
+    return model
+
+
+def compare_update_with_retrain(n_new=5000, n_new_trees=32, retire_oldest=0):
+    """
+    Порівняння інкрементного оновлення з повним перенавчанням.
+
+    Навчальна частина датасету ділиться на історію та n_new "нових" рядків. Базова
+    модель навчається на історії, після чого оновлюється на нових рядках
+    (update_forest) або перенавчається з нуля на історії та нових рядках. Для кожного
+    варіанта вимірюються час і якість на відкладеній вибірці.
+
+    Args:
+        n_new (int, optional): Кількість нових рядків.
+        n_new_trees (int, optional): Кількість нових дерев.
+        retire_oldest (int, optional): Кількість найстаріших дерев, що відкидаються.
+
+    Returns:
+        dict: Для base, update та retrain - час (с), accuracy та ROC AUC.
+    """
+    from sklearn.metrics import accuracy_score, roc_auc_score
+
+    data = load_dataset()
+    rest, holdout = train_test_split(data, **SPLIT_PARAMS)
+    history, new_data = rest.iloc[:-n_new], rest.iloc[-n_new:]
+
+    def fit(df):
+        cleaned, fitted_scaler = preprocess_data(df=df, return_scaler=True)
+        forest = RandomForestClassifier(**RF_PARAMS)
+        forest.fit(cleaned.drop(columns=["churn"]), cleaned["churn"])
+        return forest, fitted_scaler, fit_preprocessing_stats(df)
+
+    base = fit(history)
+
+    start = time.perf_counter()
+    updated = update_forest(
+        base[0],
+        base[1],
+        fit_preprocessing_counts(history),
+        new_data,
+        n_new_trees=n_new_trees,
+        retire_oldest=retire_oldest,
+    )[:3]
+    update_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    retrained = fit(pd.concat([history, new_data]))
+    retrain_seconds = time.perf_counter() - start
+
+    report = {}
+    for name, (forest, fitted_scaler, stats), seconds in [
+        ("base", base, 0.0),
+        ("update", updated, update_seconds),
+        ("retrain", retrained, retrain_seconds),
+    ]:
+        preds = predict_churn(forest, preprocess_input(holdout, scaler=fitted_scaler, stats=stats))
+        report[name] = {
+            "seconds": seconds,
+            "n_estimators": len(forest.estimators_),
+            "accuracy": accuracy_score(holdout["churn"], preds > 0.5),
+            "roc_auc": roc_auc_score(holdout["churn"], preds),
+        }
+        print(
+            f"{name:>8}: {seconds:7.2f} с, {report[name]['n_estimators']:4d} дерев, "
+            f"accuracy {report[name]['accuracy']:.4f}, ROC AUC {report[name]['roc_auc']:.4f}"
+        )
+    return report
+
+
+def _evaluate_fold(task, X, y, folds):
+    # Навчання на одному фолді: точність на валідації та затримка predict_proba на 1000 рядків
+    params, fold = task
+    train_idx, val_idx = folds[fold]
+    model = RandomForestClassifier(**params, n_jobs=1)
+    model.fit(X[train_idx], y[train_idx])
+    X_val = X[val_idx]
+    accuracy = float((model.predict(X_val) == y[val_idx]).mean())
+
+    batch = X_val[:1000]
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        timings.append(time.perf_counter() - start)
+    return {"accuracy": accuracy, "latency_ms_per_1k": min(timings) * 1000 * 1000 / len(batch)}
+
+
+def _task_key(data_key, params, fold, cv):
+    payload = json.dumps([data_key, params, fold, cv], sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def search_hyperparameters(
+    n_candidates=27,
+    factor=3,
+    min_estimators=32,
+    max_estimators=512,
+    cv=3,
+    latency_weight=0.001,
+    n_workers=None,
+):
+    """
+    Паралельний пошук гіперпараметрів RandomForest методом successive halving.
+
+    На кожному раунді всі кандидати оцінюються крос-валідацією з поточною кількістю
+    дерев; до наступного раунду переходить 1/factor найкращих, а кількість дерев
+    множиться на factor. Ціль - середня точність мінус latency_weight * затримка
+    predict_proba у мс на 1000 рядків, тож дешевші в обслуговуванні моделі мають
+    перевагу. Дані препроцесуються один раз, фолди навчаються на всіх ядрах, а
+    результат кожного фолду дописується у model_store/search_cache.jsonl, тому
+    перерваний пошук продовжується з місця зупинки. Підсумок зберігається у
+    model_store/search_results.json.
+
+    Args:
+        n_candidates (int, optional): Кількість випадкових кандидатів на першому раунді.
+        factor (int, optional): Коефіцієнт відсіву та зростання кількості дерев.
+        min_estimators (int, optional): Кількість дерев на першому раунді.
+        max_estimators (int, optional): Максимальна кількість дерев.
+        cv (int, optional): Кількість фолдів крос-валідації.
+        latency_weight (float, optional): Штраф цілі за 1 мс затримки на 1000 рядків.
+        n_workers (int, optional): Кількість процесів. За замовчуванням - кількість ядер.
+
+    Returns:
+        dict: Найкращі гіперпараметри та їхні метрики.
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_path = os.path.join(project_root, "datasets", "internet_service_churn.csv")
+    store_dir = os.path.join(project_root, MODEL_STORE_DIR)
+    os.makedirs(store_dir, exist_ok=True)
+    cache_path = os.path.join(store_dir, "search_cache.jsonl")
+
+    # Ключ даних: усе, що впливає на матрицю ознак, крім гіперпараметрів моделі
+    _, inputs = training_fingerprint(data_path)
+    inputs.pop("backend")
+    inputs.pop("model_params")
+    data_key = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+    # Препроцесинг один раз; пошук лише на навчальній частині, тестова не використовується
+    cleaned_data = preprocess_data(data_path)
+    X = cleaned_data.drop(columns=["churn"])
+    y = cleaned_data["churn"]
+    X_train, _, y_train, _ = train_test_split(X, y, **SPLIT_PARAMS)
+    X_train = np.ascontiguousarray(X_train.to_numpy(dtype=np.float32))
+    y_train = y_train.to_numpy()
+    folds = list(
+        StratifiedKFold(cv, shuffle=True, random_state=SPLIT_PARAMS["random_state"]).split(
+            X_train, y_train
+        )
+    )
+
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # недописаний рядок перерваного пошуку
+                cache[entry["key"]] = entry["result"]
+
+    candidates = list(
+        ParameterSampler(SEARCH_SPACE, n_candidates, random_state=RF_PARAMS["random_state"])
+    )
+    n_estimators = min_estimators
+    history = []
+    while True:
+        params_list = [
+            {**c, "n_estimators": n_estimators, "random_state": RF_PARAMS["random_state"]}
+            for c in candidates
+        ]
+        tasks = [(params, fold) for params in params_list for fold in range(cv)]
+        pending = [task for task in tasks if _task_key(data_key, *task, cv) not in cache]
+        print(
+            f"Раунд {len(history) + 1}: {len(params_list)} кандидатів, {n_estimators} дерев, "
+            f"{len(pending)} з {len(tasks)} фолдів до навчання"
+        )
+        with open(cache_path, "a", encoding="utf-8") as f:
+            for task, result in imap_ordered(
+                _evaluate_fold, (X_train, y_train, folds), pending, n_workers
+            ):
+                key = _task_key(data_key, *task, cv)
+                cache[key] = result
+                f.write(json.dumps({"key": key, "params": task[0], "result": result}) + "\n")
+                f.flush()
+
+        scored = []
+        for params in params_list:
+            results = [cache[_task_key(data_key, params, fold, cv)] for fold in range(cv)]
+            accuracy = float(np.mean([r["accuracy"] for r in results]))
+            latency = float(np.mean([r["latency_ms_per_1k"] for r in results]))
+            scored.append(
+                {
+                    "params": params,
+                    "accuracy": accuracy,
+                    "latency_ms_per_1k": latency,
+                    "objective": accuracy - latency_weight * latency,
+                }
+            )
+        scored.sort(key=lambda r: r["objective"], reverse=True)
+        history.append({"n_estimators": n_estimators, "results": scored})
+
+        if len(candidates) == 1 or n_estimators >= max_estimators:
+            break
+        n_keep = max(1, len(scored) // factor)
+        candidates = [
+            {k: v for k, v in r["params"].items() if k in SEARCH_SPACE} for r in scored[:n_keep]
+        ]
+        n_estimators = min(n_estimators * factor, max_estimators)
+
+    best = history[-1]["results"][0]
+    summary = {
+        "data_key": data_key,
+        "settings": {
+            "n_candidates": n_candidates,
+            "factor": factor,
+            "min_estimators": min_estimators,
+            "max_estimators": max_estimators,
+            "cv": cv,
+            "latency_weight": latency_weight,
+        },
+        "best": best,
+        "history": history,
+    }
+    with open(os.path.join(store_dir, "search_results.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(
+        f"Найкращі параметри: {best['params']}\n"
+        f"Точність (CV): {best['accuracy']:.4f}, затримка: "
+        f"{best['latency_ms_per_1k']:.2f} мс / 1000 рядків"
+    )
+    return best
+
+
+def early_exit_curve(tolerances=None, chunk_trees=EARLY_EXIT_CHUNK_TREES, repeats=3):
+    """
+    Крива точність/затримка прогнозу з ранньою зупинкою на тестовій вибірці model_rf().
+
+    Опублікована модель (model.pkl) компілюється, тестова вибірка відтворюється тим
+    самим розбиттям SPLIT_PARAMS, що й під час навчання. Для кожної допустимої похибки
+    вимірюються час прогнозу, середня кількість обчислених дерев, accuracy, ROC AUC,
+    частка рядків з тією ж категорією ризику, що й у повного лісу, та максимальна
+    розбіжність ймовірностей. Результат зберігається у model_store/early_exit_curve.json.
+
+    Args:
+        tolerances (list[float], optional): Допустимі похибки; за замовчуванням
+            EARLY_EXIT_TOLERANCES.
+        chunk_trees (int, optional): Кількість дерев у частині.
+        repeats (int, optional): Кількість запусків для вимірювання часу (береться мінімум).
+
+    Returns:
+        list[dict]: Точка кривої для повного лісу та для кожної похибки.
+
+    Raises:
+        ValueError: Якщо опублікована модель не є RandomForest.
+    """
+    from sklearn.metrics import accuracy_score, roc_auc_score
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(os.path.join(project_root, "model.pkl"), "rb") as f:
+        model = pickle.load(f)
+    if backend_of(model) != "random_forest":
+        raise ValueError("Рання зупинка підтримується лише для RandomForest.")
+    forest = compile_forest(model)
+
+    data = preprocess_data()
+    X = data.drop(columns=["churn"])
+    _, X_test, _, y_test = train_test_split(X, data["churn"], **SPLIT_PARAMS)
+    X_test = np.ascontiguousarray(X_test, dtype=np.float32)
+
+    def timed(fn):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - start)
+        return result, min(timings)
+
+    exact, exact_seconds = timed(lambda: forest.predict_proba(X_test)[:, 1])
+    exact_category = risk_category(exact)
+    points = []
+    for tolerance in [None] + list(tolerances or EARLY_EXIT_TOLERANCES):
+        if tolerance is None:
+            preds, seconds = exact, exact_seconds
+            n_trees = np.full(len(preds), forest.n_estimators)
+        else:
+            (preds, n_trees), seconds = timed(
+                lambda: forest.predict_proba_early_exit(X_test, tolerance, chunk_trees=chunk_trees)
+            )
+        point = {
+            "tolerance": tolerance,
+            "mean_trees": float(n_trees.mean()),
+            "ms_per_1k_rows": seconds * 1000 * 1000 / len(X_test),
+            "speedup": exact_seconds / seconds,
+            "accuracy": accuracy_score(y_test, preds > 0.5),
+            "roc_auc": roc_auc_score(y_test, preds),
+            "category_agreement": float((risk_category(preds) == exact_category).mean()),
+            "max_abs_diff": float(np.abs(preds - exact).max()),
+        }
+        points.append(point)
+        label = "повний ліс" if tolerance is None else f"{tolerance:g}"
+        print(
+            f"{label:>11}: {point['mean_trees']:6.1f} дерев, "
+            f"{point['ms_per_1k_rows']:7.2f} мс/1000 рядків (x{point['speedup']:.2f}), "
+            f"accuracy {point['accuracy']:.4f}, ROC AUC {point['roc_auc']:.4f}, "
+            f"збіг категорій {point['category_agreement']:.4%}, "
+            f"макс. розбіжність {point['max_abs_diff']:.3f}"
+        )
+
+    store_dir = os.path.join(project_root, MODEL_STORE_DIR)
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, "early_exit_curve.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {"chunk_trees": chunk_trees, "rows": len(X_test), "points": points},
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+    return points
+
+
+def model_rf(force=False, backend=DEFAULT_BACKEND):
+    """
+    Навчання моделі відтоку, якщо для поточних даних і коду ще немає артефактів.
+
+    Відбиток навчання (див. training_fingerprint) визначає каталог набору артефактів
+    model_store/<відбиток>. Якщо набір уже існує, навчання пропускається і набір лише
+    публікується у корінь проєкту.
+
+    Args:
+        force (bool, optional): Якщо True, модель навчається повторно навіть при
+            збігу відбитку.
+        backend (str, optional): Бекенд моделі: "random_forest", "lightgbm" або "xgboost".
+
+    Returns:
+        Навчена модель.
+    """
+    # Визначаємо корінь проєкту (на один рівень вище від src)
+    current_dir = os.path.dirname(os.path.abspath(__file__))  # Поточна директорія (src)
+    project_root = os.path.dirname(current_dir)  # Корінь проєкту (на один рівень вище)
+
+    data_path = os.path.join(project_root, "datasets", "internet_service_churn.csv")
+
+    fingerprint, inputs = training_fingerprint(data_path, backend)
+    store_path = os.path.join(project_root, MODEL_STORE_DIR, fingerprint)
+
+    if not force and os.path.exists(os.path.join(store_path, "manifest.json")):
+        print(f"Артефакти для відбитку {fingerprint} вже існують, навчання пропущено.")
+        with open(os.path.join(store_path, "model.pkl"), "rb") as f:
+            model = pickle.load(f)
+    else:
+        model = train_artifacts(data_path, store_path, fingerprint, inputs, backend)
+
+    # Зберігаємо модель і scaler у корені проєкту
+    publish_artifacts(store_path, project_root)
     return model
 
 
 if __name__ == "__main__":
-    model_rf()
+    parser = argparse.ArgumentParser(description="Навчання моделі відтоку.")
+    parser.add_argument(
+        "--force", action="store_true", help="Навчити модель навіть при збігу відбитку."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=list(BACKEND_PARAMS),
+        default=DEFAULT_BACKEND,
+        help="Бекенд моделі.",
+    )
+    parser.add_argument(
+        "--search", action="store_true", help="Пошук гіперпараметрів замість навчання."
+    )
+    parser.add_argument("--candidates", type=int, default=27, help="Кандидатів у пошуку.")
+    parser.add_argument("--workers", type=int, default=None, help="Кількість процесів пошуку.")
+    parser.add_argument(
+        "--latency-weight",
+        type=float,
+        default=0.001,
+        help="Штраф цілі пошуку за 1 мс затримки на 1000 рядків.",
+    )
+    parser.add_argument("--update", help="CSV з новими розміченими рядками для оновлення.")
+    parser.add_argument(
+        "--base", help="Відбиток набору, що оновлюється (за замовчуванням CURRENT)."
+    )
+    parser.add_argument("--new-trees", type=int, default=32, help="Нових дерев при оновленні.")
+    parser.add_argument("--retire", type=int, default=0, help="Старих дерев, що відкидаються.")
+    parser.add_argument(
+        "--compare-update",
+        type=int,
+        metavar="N_NEW",
+        help="Порівняти оновлення на N_NEW рядках з повним перенавчанням.",
+    )
+    parser.add_argument(
+        "--early-exit-curve",
+        action="store_true",
+        help="Крива точність/затримка прогнозу з ранньою зупинкою на тестовій вибірці.",
+    )
+    parser.add_argument(
+        "--chunk-trees",
+        type=int,
+        default=EARLY_EXIT_CHUNK_TREES,
+        help="Дерев у частині для ранньої зупинки.",
+    )
+    args = parser.parse_args()
+
+    if args.early_exit_curve:
+        early_exit_curve(chunk_trees=args.chunk_trees)
+    elif args.compare_update:
+        compare_update_with_retrain(args.compare_update, args.new_trees, args.retire)
+    elif args.update:
+        update_model(args.update, args.base, args.new_trees, args.retire)
+    elif args.search:
+        search_hyperparameters(
+            n_candidates=args.candidates,
+            latency_weight=args.latency_weight,
+            n_workers=args.workers,
+        )
+    else:
+        model_rf(force=args.force, backend=args.backend)
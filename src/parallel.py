@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Стан процесу-воркера: функція обробки, її спільні аргументи та спільні дані
+_worker_fn = None
+_worker_args = ()
+_shared_data = None
+
+
+def _init_worker(fn, args):
+    global _worker_fn, _worker_args
+    _worker_fn = fn
+    _worker_args = args
+
+
+def _run_item(item):
+    return _worker_fn(item, *_worker_args)
+
+
+def _run_range(bounds):
+    start, end = bounds
+    return _worker_fn(_shared_data.iloc[start:end], *_worker_args)
+
+
+def _context():
+    # fork дозволяє воркерам успадкувати модель і дані без серіалізації
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+def default_workers():
+    """
+    Кількість воркерів за замовчуванням (кількість доступних ядер).
+
+    Returns:
+        int: Кількість воркерів.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def imap_ordered(fn, args, items, n_workers=None, max_pending=None):
+    """
+    Паралельна обробка потоку елементів із збереженням порядку.
+
+    Спільні аргументи (наприклад, модель і scaler) передаються воркерам один раз під
+    час створення пулу (при fork - успадковуються без серіалізації), а не з кожним
+    завданням. Кількість завдань у роботі обмежена max_pending, тому вхідний потік
+    не зчитується наперед повністю.
+
+    Args:
+        fn (callable): Функція fn(item, *args) рівня модуля.
+        args (tuple): Спільні аргументи для fn.
+        items (iterable): Вхідні елементи (наприклад, частини DataFrame).
+        n_workers (int, optional): Кількість процесів. За замовчуванням - кількість ядер.
+        max_pending (int, optional): Максимум завдань у роботі (за замовчуванням 2 * n_workers).
+
+    Yields:
+        tuple: (item, result) у порядку вхідних елементів.
+    """
+    n_workers = n_workers or default_workers()
+    if n_workers == 1:
+        for item in items:
+            yield item, fn(item, *args)
+        return
+
+    max_pending = max_pending or 2 * n_workers
+    with _context().Pool(n_workers, initializer=_init_worker, initargs=(fn, args)) as pool:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.apply_async(_run_item, (item,))))
+            if len(pending) >= max_pending:
+                item, result = pending.popleft()
+                yield item, result.get()
+        while pending:
+            item, result = pending.popleft()
+            yield item, result.get()
+
+
+def map_frame(fn, args, data, n_workers=None, chunk_size=50_000):
+    """
+    Паралельна обробка DataFrame частинами із збереженням порядку рядків.
+
+    При fork DataFrame успадковується воркерами (copy-on-write), і завдання містять
+    лише межі рядків; інакше частини DataFrame передаються воркерам.
+
+    Args:
+        fn (callable): Функція fn(chunk, *args) рівня модуля, що повертає np.ndarray.
+        args (tuple): Спільні аргументи для fn.
+        data (pd.DataFrame): Вхідний DataFrame.
+        n_workers (int, optional): Кількість процесів. За замовчуванням - кількість ядер.
+        chunk_size (int, optional): Кількість рядків в одному завданні.
+
+    Returns:
+        np.ndarray: Об'єднані результати у порядку рядків data.
+    """
+    global _shared_data
+
+    n_workers = n_workers or default_workers()
+    bounds = [
+        (start, min(start + chunk_size, len(data))) for start in range(0, len(data), chunk_size)
+    ]
+    if n_workers == 1:
+        return np.concatenate([fn(data.iloc[start:end], *args) for start, end in bounds])
+
+    context = _context()
+    if context.get_start_method() != "fork":
+        chunks = (data.iloc[start:end] for start, end in bounds)
+        return np.concatenate([result for _, result in imap_ordered(fn, args, chunks, n_workers)])
+
+    _shared_data = data
+    try:
+        with context.Pool(n_workers, initializer=_init_worker, initargs=(fn, args)) as pool:
+            return np.concatenate(pool.map(_run_range, bounds))
+    finally:
+        _shared_data = None
+
+
+if __name__ == "__main__":
+    # Бенчмарк масштабування від 1 до N воркерів
+    import argparse
+    import logging
+
+    from inference import load_artifacts, score_parallel
+
+    parser = argparse.ArgumentParser(description="Бенчмарк паралельного прогнозування.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Кількість рядків.")
+    parser.add_argument("--max-workers", type=int, default=default_workers(), help="Максимум N.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    model, scaler, stats = load_artifacts(project_root)
+    data = pd.read_csv(os.path.join(project_root, "datasets", "internet_service_churn.csv"))
+    data = data.sample(args.rows, replace=True, random_state=42).reset_index(drop=True)
+
+    workers = sorted({1, *[2**i for i in range(1, 8) if 2**i < args.max_workers], args.max_workers})
+    baseline = None
+    for n_workers in workers:
+        start = time.perf_counter()
+        preds = score_parallel(data, model, scaler, stats, n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline, reference = elapsed, preds
+        assert np.array_equal(preds, reference), "Результати залежать від кількості воркерів"
+        print(
+            f"{n_workers:>3} воркерів: {elapsed:7.2f} с, {len(data) / elapsed:10.0f} рядків/с, "
+            f"прискорення x{baseline / elapsed:.2f}"
+        )
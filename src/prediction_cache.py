@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+class PredictionCache:
+    """
+    Обмежений LRU-кеш прогнозів, ключ - оброблений рядок ознак і версія моделі.
+
+    Ключем є байтове представлення рядка ознак float32 після препроцесингу. Кеш
+    пам'ятає версію моделі, для якої збережені прогнози, і повністю очищується,
+    щойно запит надходить з іншою версією.
+
+    Args:
+        max_size (int, optional): Максимальна кількість збережених прогнозів.
+    """
+
+    def __init__(self, max_size=100_000):
+        if max_size <= 0:
+            raise ValueError("Розмір кешу повинен бути додатним.")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(X):
+        return [row.tobytes() for row in X]
+
+    def _check_version(self, model_version):
+        if model_version != self._version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._version = model_version
+
+    def get_many(self, X, model_version):
+        """
+        Пошук прогнозів для батчу.
+
+        Args:
+            X (np.ndarray): Оброблені ознаки float32, форма (n, n_features).
+            model_version (str): Версія моделі.
+
+        Returns:
+            tuple: (прогнози з NaN для промахів, булева маска промахів).
+        """
+        keys = self._keys(X)
+        preds = np.full(len(keys), np.nan)
+        miss = np.zeros(len(keys), dtype=bool)
+        with self._lock:
+            self._check_version(model_version)
+            for i, key in enumerate(keys):
+                value = self._data.get(key)
+                if value is None:
+                    miss[i] = True
+                else:
+                    self._data.move_to_end(key)
+                    preds[i] = value
+            n_miss = int(miss.sum())
+            self.misses += n_miss
+            self.hits += len(keys) - n_miss
+        return preds, miss
+
+    def put_many(self, X, preds, model_version):
+        """
+        Збереження прогнозів для батчу з витісненням найдавніше використаних.
+
+        Args:
+            X (np.ndarray): Оброблені ознаки float32, форма (n, n_features).
+            preds (np.ndarray): Прогнози для рядків X.
+            model_version (str): Версія моделі.
+        """
+        keys = self._keys(X)
+        with self._lock:
+            self._check_version(model_version)
+            for key, value in zip(keys, preds):
+                self._data[key] = float(value)
+                self._data.move_to_end(key)
+            overflow = len(self._data) - self.max_size
+            for _ in range(max(overflow, 0)):
+                self._data.popitem(last=False)
+            self.evictions += max(overflow, 0)
+
+    def clear(self):
+        """
+        Очищення кешу.
+        """
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def hit_rate(self):
+        """
+        Частка запитів, обслужених з кешу.
+
+        Returns:
+            float: Частка влучань.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """
+        Лічильники кешу.
+
+        Returns:
+            dict: Розмір, влучання, промахи, частка влучань, витіснення та скидання.
+        """
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "model_version": self._version,
+        }
+
+
+def get_prediction_cache(max_size=100_000):
+    """
+    Спільний для процесу кеш прогнозів.
+
+    Args:
+        max_size (int, optional): Максимальна кількість прогнозів (при першому виклику).
+
+    Returns:
+        PredictionCache: Кеш прогнозів.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PredictionCache(max_size)
+        return _default_cache
@@ -1,76 +1,374 @@
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler
+import pickle
 import sys
 import os
 
+from dataset import default_dataset_path, load_dataset
 
-def preprocess_data(data_path=None, df=None, return_scaler=False):
+# Версія формату статистик препроцесингу
+PREPROCESSING_STATS_VERSION = 1
+
+# Колонки, необхідні для передбачення
+REQUIRED_COLS = [
+    "is_tv_subscriber",
+    "is_movie_package_subscriber",
+    "subscription_age",
+    "reamining_contract",
+    "service_failure_count",
+    "download_avg",
+    "upload_avg",
+    "download_over_limit",
+]
+
+# Числові ознаки, що нормалізуються StandardScaler
+NUMERIC_COLS = [
+    "subscription_age",
+    "reamining_contract",
+    "service_failure_count",
+    "download_avg",
+    "upload_avg",
+]
+
+# Кількість квантильних кошиків гістограм базового розподілу ознак (монітор дрейфу)
+DRIFT_BINS = 10
+
+# Порядок ознак, на яких навчена модель
+EXPECTED_COLUMNS = [
+    "is_tv_subscriber",
+    "is_movie_package_subscriber",
+    "subscription_age",
+    "reamining_contract",
+    "service_failure_count",
+    "download_avg",
+    "upload_avg",
+    "download_over_limit_0",
+    "download_over_limit_1",
+    "download_over_limit_2",
+    "download_over_limit_3",
+    "download_over_limit_4",
+    "download_over_limit_5",
+    "download_over_limit_6",
+    "download_over_limit_7",
+]
+
+
+def fit_preprocessing_stats(df):
+    """
+    Обчислення статистик препроцесингу (медіани та межі IQR).
+
+    Статистики обчислюються так само, як у preprocess_data: медіани для заповнення
+    пропусків, медіана невід'ємних значень subscription_age та межі IQR, обчислені
+    після заповнення пропусків.
+
+    Args:
+        df (pd.DataFrame): DataFrame з колонками download_avg, upload_avg, subscription_age.
+
+    Returns:
+        dict: Статистики препроцесингу.
+    """
+    medians = {}
+    bounds = {}
+    for col in ["download_avg", "upload_avg"]:
+        medians[col] = float(df[col].median())
+        filled = df[col].fillna(medians[col])
+        Q1 = filled.quantile(0.25)
+        Q3 = filled.quantile(0.75)
+        IQR = Q3 - Q1
+        bounds[col] = (float(Q1 - 1.5 * IQR), float(Q3 + 1.5 * IQR))
+    medians["subscription_age"] = float(
+        df.loc[df["subscription_age"] >= 0, "subscription_age"].median()
+    )
+    return {
+        "version": PREPROCESSING_STATS_VERSION,
+        "medians": medians,
+        "bounds": bounds,
+    }
+
+
+def drift_bin_counts(values, edges):
+    """
+    Кількість значень у кошиках гістограми з фіксованими межами.
+
+    Args:
+        values (np.ndarray): Значення ознаки (NaN - пропуск).
+        edges (array-like): Внутрішні межі кошиків за зростанням.
+
+    Returns:
+        np.ndarray: len(edges) + 2 лічильники: кошики (-inf, e0), [e0, e1), ..., [ek, inf)
+            та останній - пропуски.
+    """
+    # Порівняння у float32: датасет зберігається у float32, а CSV на інференсі читається
+    # у float64, тож значення на межі кошика інакше потрапляли б у різні кошики
+    values = np.asarray(values, dtype=np.float32)
+    idx = np.searchsorted(np.asarray(edges, dtype=np.float32), values, side="right")
+    # NaN після searchsorted потрапляє в останній кошик значень; переносимо його до пропусків
+    idx[np.isnan(values)] = len(edges) + 1
+    return np.bincount(idx, minlength=len(edges) + 2)
+
+
+def fit_drift_baseline(df, bins=DRIFT_BINS):
+    """
+    Базовий розподіл сирих ознак для монітора дрейфу.
+
+    Для кожної ознаки REQUIRED_COLS межі кошиків - квантилі непорожніх значень, а для
+    дискретних ознак (не більше 2 * bins різних значень) - самі значення; лічильники -
+    кількість рядків у кожному кошику та кількість пропусків. Межі й лічильники
+    зберігаються списками, тож базовий розподіл серіалізується разом зі статистиками
+    (pickle і JSON).
+
+    Args:
+        df (pd.DataFrame): Сирі дані до заповнення пропусків.
+        bins (int, optional): Кількість квантильних кошиків.
+
+    Returns:
+        dict: Кількість рядків і межі та лічильники для кожної ознаки.
+    """
+    features = {}
+    for col in REQUIRED_COLS:
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = values[~np.isnan(values)]
+        unique = np.unique(valid)
+        if len(unique) <= 2 * bins:
+            # Дискретна ознака (прапорці, лічильники): кожне значення - окремий кошик
+            edges = unique
+        else:
+            edges = np.unique(np.quantile(valid, np.arange(1, bins) / bins))
+        features[col] = {
+            "edges": edges.tolist(),
+            "counts": drift_bin_counts(values, edges).tolist(),
+        }
+    return {"rows": len(df), "features": features}
+
+
+def update_drift_baseline(baseline, df):
+    """
+    Додавання нових рядків до базового розподілу з тими самими межами кошиків.
+
+    Args:
+        baseline (dict): Базовий розподіл (fit_drift_baseline).
+        df (pd.DataFrame): Нові сирі дані.
+
+    Returns:
+        dict: Новий базовий розподіл.
+    """
+    features = {}
+    for col, spec in baseline["features"].items():
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        counts = np.asarray(spec["counts"]) + drift_bin_counts(values, spec["edges"])
+        features[col] = {"edges": list(spec["edges"]), "counts": counts.tolist()}
+    return {"rows": baseline["rows"] + len(df), "features": features}
+
+
+def fit_preprocessing_counts(df):
+    """
+    Частоти значень, з яких обчислюються статистики препроцесингу.
+
+    На відміну від самих медіан і квантилів, частоти можна об'єднувати
+    (merge_preprocessing_counts), тому статистики оновлюються на нових даних без
+    повторного проходу по всій історії. Значення записані з фіксованою точністю, тож
+    розмір таблиці частот обмежений кількістю різних значень.
+
+    Args:
+        df (pd.DataFrame): DataFrame з колонками download_avg, upload_avg, subscription_age.
+
+    Returns:
+        dict: Кількість рядків, частоти непорожніх значень і кількість пропусків.
+    """
+    counts = {"rows": len(df), "values": {}, "missing": {}}
+    for col in ["download_avg", "upload_avg"]:
+        values = df[col].to_numpy(dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        counts["values"][col] = np.unique(valid, return_counts=True)
+        counts["missing"][col] = int(len(values) - len(valid))
+    age = df["subscription_age"].to_numpy(dtype=np.float64)
+    counts["values"]["subscription_age"] = np.unique(age[age >= 0], return_counts=True)
+    return counts
+
+
+def merge_preprocessing_counts(a, b):
+    """
+    Об'єднання частот значень двох частин даних.
+
+    Args:
+        a (dict): Частоти першої частини (fit_preprocessing_counts).
+        b (dict): Частоти другої частини.
+
+    Returns:
+        dict: Частоти об'єднаних даних.
+    """
+    merged = {"rows": a["rows"] + b["rows"], "values": {}, "missing": {}}
+    for col in a["values"]:
+        values = np.concatenate([a["values"][col][0], b["values"][col][0]])
+        weights = np.concatenate([a["values"][col][1], b["values"][col][1]])
+        unique, inverse = np.unique(values, return_inverse=True)
+        merged["values"][col] = (unique, np.bincount(inverse, weights=weights).astype(np.int64))
+    for col in a["missing"]:
+        merged["missing"][col] = a["missing"][col] + b["missing"][col]
+    return merged
+
+
+def _quantile_from_counts(values, counts, q):
+    # Лінійна інтерполяція між порядковими статистиками, як у pandas.Series.quantile
+    n = int(counts.sum())
+    position = q * (n - 1)
+    lo = int(np.floor(position))
+    cumulative = np.cumsum(counts)
+    x_lo = values[np.searchsorted(cumulative, lo, side="right")]
+    x_hi = values[np.searchsorted(cumulative, min(lo + 1, n - 1), side="right")]
+    return float(x_lo + (x_hi - x_lo) * (position - lo))
+
+
+def stats_from_counts(counts):
+    """
+    Статистики препроцесингу з частот значень.
+
+    Результат збігається з fit_preprocessing_stats для тих самих даних (з точністю
+    до округлення float64).
+
+    Args:
+        counts (dict): Частоти значень (fit_preprocessing_counts).
+
+    Returns:
+        dict: Статистики препроцесингу.
+    """
+    medians = {}
+    bounds = {}
+    for col in ["download_avg", "upload_avg"]:
+        values, weights = counts["values"][col]
+        medians[col] = _quantile_from_counts(values, weights, 0.5)
+        # Межі IQR обчислюються після заповнення пропусків медіаною
+        filled = np.concatenate([values, [medians[col]]])
+        filled_weights = np.concatenate([weights, [counts["missing"][col]]])
+        order = np.argsort(filled, kind="stable")
+        Q1 = _quantile_from_counts(filled[order], filled_weights[order], 0.25)
+        Q3 = _quantile_from_counts(filled[order], filled_weights[order], 0.75)
+        IQR = Q3 - Q1
+        bounds[col] = (float(Q1 - 1.5 * IQR), float(Q3 + 1.5 * IQR))
+    medians["subscription_age"] = _quantile_from_counts(*counts["values"]["subscription_age"], 0.5)
+    return {
+        "version": PREPROCESSING_STATS_VERSION,
+        "medians": medians,
+        "bounds": bounds,
+    }
+
+
+def save_preprocessing_stats(stats, path):
+    """
+    Збереження статистик препроцесингу у файл.
+
+    Args:
+        stats (dict): Статистики препроцесингу.
+        path (str): Шлях до файлу (наприклад, preprocessing_stats.pkl).
+    """
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(stats, f)
+    os.replace(path + ".tmp", path)
+
+
+def load_preprocessing_stats(path):
+    """
+    Завантаження статистик препроцесингу з файлу.
+
+    Args:
+        path (str): Шлях до файлу зі статистиками.
+
+    Returns:
+        dict: Статистики препроцесингу.
+
+    Raises:
+        ValueError: Якщо версія статистик не підтримується.
+    """
+    with open(path, "rb") as f:
+        return validate_preprocessing_stats(pickle.load(f))
+
+
+def validate_preprocessing_stats(stats):
+    """
+    Перевірка версії статистик препроцесингу.
+
+    Args:
+        stats (dict): Статистики препроцесингу.
+
+    Returns:
+        dict: Ті самі статистики.
+
+    Raises:
+        ValueError: Якщо версія статистик не підтримується.
+    """
+    if stats.get("version") != PREPROCESSING_STATS_VERSION:
+        raise ValueError(
+            f"Непідтримувана версія статистик препроцесингу: {stats.get('version')}. "
+            f"Очікується {PREPROCESSING_STATS_VERSION}."
+        )
+    return stats
+
+
+def preprocess_data(data_path=None, df=None, return_scaler=False, stats_path=None):
     """
     Препроцесинг даних для моделі відтоку клієнтів.
 
     Args:
-        data_path (str, optional): Шлях до CSV файлу з даними.
+        data_path (str, optional): Шлях до CSV файлу з даними. Файл читається через
+            колонковий кеш load_dataset з компактними типами.
         df (pd.DataFrame, optional): Вхідний DataFrame, якщо дані вже завантажені.
+            Використовується, якщо data_path не вказано.
         return_scaler (bool, optional): Якщо True, повертає DataFrame і StandardScaler.
+        stats_path (str, optional): Якщо вказано, зберігає статистики препроцесингу
+            (медіани, межі IQR та базовий розподіл ознак для монітора дрейфу) у цей файл
+            для використання під час інференсу.
 
     Returns:
         pd.DataFrame: Оброблений DataFrame, готовий для моделювання.
         StandardScaler (optional): Об'єкт StandardScaler, якщо return_scaler=True.
     """
-    # Визначення базового каталогу проєкту
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    default_data_path = os.path.join(base_dir, "datasets", "internet_service_churn.csv")
-
-    # Використовуємо data_path, якщо вказано, інакше беремо за замовчуванням
-    if data_path is None:
-        data_path = default_data_path
-
-    # Завантаження даних
-    if os.path.exists(data_path):
-        df = pd.read_csv(data_path)
-    elif df is None:
-        raise FileNotFoundError(
-            f"Файл не знайдено за шляхом: {data_path}. Перевір шлях або передай df."
-        )
-    elif df is not None:
+    # Завантаження даних: завантажений з кешу DataFrame вже є власною копією,
+    # переданий df копіюється один раз, щоб не змінювати дані викликача.
+    # Переданий df без data_path має пріоритет над датасетом за замовчуванням.
+    if df is not None and data_path is None:
         df = df.copy()
+    else:
+        if data_path is None:
+            data_path = default_dataset_path()
+        if os.path.exists(data_path):
+            df = load_dataset(data_path)
+        elif df is None:
+            raise FileNotFoundError(
+                f"Файл не знайдено за шляхом: {data_path}. Перевір шлях або передай df."
+            )
+        else:
+            df = df.copy()
+
+    df_churn = df
 
-    df_churn = df.copy()
+    # Статистики препроцесингу (зберігаються для інференсу) та базовий розподіл сирих
+    # ознак для монітора дрейфу (drift.py)
+    stats = fit_preprocessing_stats(df_churn)
+    stats["drift"] = fit_drift_baseline(df_churn)
+    medians = stats["medians"]
+    bounds = stats["bounds"]
+    if stats_path is not None:
+        save_preprocessing_stats(stats, stats_path)
 
     # Обробка пропусків
     df_churn["reamining_contract"] = df_churn["reamining_contract"].fillna(0)
-    df_churn["download_avg"] = df_churn["download_avg"].fillna(df_churn["download_avg"].median())
-    df_churn["upload_avg"] = df_churn["upload_avg"].fillna(df_churn["upload_avg"].median())
+    df_churn["download_avg"] = df_churn["download_avg"].fillna(medians["download_avg"])
+    df_churn["upload_avg"] = df_churn["upload_avg"].fillna(medians["upload_avg"])
 
     # Заміна негативних значень subscription_age на медіану
     if (df_churn["subscription_age"] < 0).any():
-        median_age = df_churn.loc[df_churn["subscription_age"] >= 0, "subscription_age"].median()
-        df_churn.loc[df["subscription_age"] < 0, "subscription_age"] = median_age
-
-    # Обмеження викидів у download_avg за допомогою IQR
-    Q1 = df_churn["download_avg"].quantile(0.25)
-    Q3 = df_churn["download_avg"].quantile(0.75)
-    IQR = Q3 - Q1
-    lower = Q1 - 1.5 * IQR
-    upper = Q3 + 1.5 * IQR
-    df_churn["download_avg"] = np.where(
-        df_churn["download_avg"] > upper,
-        upper,
-        np.where(df_churn["download_avg"] < lower, lower, df_churn["download_avg"]),
-    )
+        median_age = medians["subscription_age"]
+        df_churn.loc[df_churn["subscription_age"] < 0, "subscription_age"] = median_age
 
-    # Обмеження викидів у upload_avg за допомогою IQR
-    Q1 = df_churn["upload_avg"].quantile(0.25)
-    Q3 = df_churn["upload_avg"].quantile(0.75)
-    IQR = Q3 - Q1
-    lower = Q1 - 1.5 * IQR
-    upper = Q3 + 1.5 * IQR
-    df_churn["upload_avg"] = np.where(
-        df_churn["upload_avg"] > upper,
-        upper,
-        np.where(df_churn["upload_avg"] < lower, lower, df_churn["upload_avg"]),
-    )
+    # Обмеження викидів у download_avg та upload_avg за межами IQR
+    for col in ["download_avg", "upload_avg"]:
+        lower, upper = bounds[col]
+        df_churn[col] = np.where(
+            df_churn[col] > upper,
+            upper,
+            np.where(df_churn[col] < lower, lower, df_churn[col]),
+        )
 
     # Видалення екстремальних значень bill_avg
     bill_upper = df_churn["bill_avg"].quantile(0.99)
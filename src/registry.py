@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import namedtuple
+
+from artifacts import load_bundle
+from backends import backend_of
+from compiled_forest import compile_forest
+from preprocessing import validate_preprocessing_stats
+
+# Файли артефактів моделі у корені проєкту
+ARTIFACT_FILES = ["model.pkl", "scaler.pkl", "preprocessing_stats.pkl"]
+
+# Маніфест опублікованого набору у корені проєкту: версія та SHA-256 кожного файлу
+# ARTIFACT_FILES (записується атомарно останнім, див. model.publish_artifacts)
+ARTIFACT_MANIFEST = "artifacts.json"
+
+# Каталог пакета сирих масивів (див. artifacts.py)
+BUNDLE_DIR = "model_bundle"
+
+# Узгоджений набір артефактів однієї версії
+ModelBundle = namedtuple("ModelBundle", ["model", "scaler", "stats", "version"])
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def artifact_version(contents):
+    """
+    Версія набору артефактів за вмістом файлів.
+
+    Args:
+        contents (list[bytes]): Вміст файлів ARTIFACT_FILES у тому самому порядку.
+
+    Returns:
+        str: Перші 12 символів SHA-256 від об'єднаного вмісту.
+    """
+    return hashlib.sha256(b"".join(contents)).hexdigest()[:12]
+
+
+class ModelRegistry:
+    """
+    Реєстр моделі: завантажує артефакти один раз на процес і підміняє їх при зміні файлів.
+
+    Версія моделі - хеш вмісту model.pkl, scaler.pkl та preprocessing_stats.pkl (або
+    версія з маніфесту пакета model_bundle при use_bundle=True). Не
+    частіше ніж раз на check_interval секунд реєстр перевіряє час зміни та розмір
+    файлів і, якщо вони змінилися, завантажує новий набір. Набір замінюється цілком,
+    тому прогноз, що вже отримав ModelBundle, працює з узгодженими моделлю та scaler.
+
+    Файли публікуються по одному, тож під час публікації на диску можуть бути нова
+    модель і старий scaler. Якщо в корені є маніфест artifacts.json, набір
+    завантажується лише тоді, коли хеші всіх файлів збігаються з маніфестом; інакше
+    реєстр залишає попередню версію і повторює спробу при наступній перевірці.
+
+    Args:
+        project_root (str, optional): Каталог з артефактами моделі.
+        check_interval (float, optional): Мінімальний інтервал між перевірками файлів, с.
+        compiled (bool, optional): Якщо True, модель RandomForest компілюється у
+            CompiledForest (моделі інших бекендів використовуються як є).
+        use_bundle (bool, optional): Якщо True, артефакти відображаються у пам'ять з
+            пакета model_bundle (модель завжди скомпільована).
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+    """
+
+    def __init__(
+        self, project_root=None, check_interval=2.0, compiled=False, use_bundle=False, logger=None
+    ):
+        if project_root is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.project_root = project_root
+        self.check_interval = check_interval
+        self.compiled = compiled
+        self.use_bundle = use_bundle
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._bundle = None
+        self._signature = None
+        self._last_check = 0.0
+
+    def _paths(self):
+        if self.use_bundle:
+            return [os.path.join(self.project_root, BUNDLE_DIR, "manifest.json")]
+        paths = [os.path.join(self.project_root, name) for name in ARTIFACT_FILES]
+        manifest_path = os.path.join(self.project_root, ARTIFACT_MANIFEST)
+        if os.path.exists(manifest_path):
+            paths.append(manifest_path)
+        return paths
+
+    def _file_signature(self):
+        stats = [os.stat(path) for path in self._paths()]
+        return tuple((st.st_mtime_ns, st.st_size) for st in stats)
+
+    def _load(self):
+        if self.use_bundle:
+            return ModelBundle(*load_bundle(os.path.join(self.project_root, BUNDLE_DIR)))
+
+        manifest_path = os.path.join(self.project_root, ARTIFACT_MANIFEST)
+        manifest = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        contents = []
+        for name in ARTIFACT_FILES:
+            with open(os.path.join(self.project_root, name), "rb") as f:
+                contents.append(f.read())
+        if manifest is not None:
+            digests = {
+                name: hashlib.sha256(data).hexdigest()
+                for name, data in zip(ARTIFACT_FILES, contents)
+            }
+            if digests != manifest["files"]:
+                raise OSError("Артефакти не відповідають маніфесту (публікація ще триває).")
+        version = artifact_version(contents)
+        if self._bundle is not None and version == self._bundle.version:
+            return self._bundle
+
+        model = pickle.loads(contents[0])
+        scaler = pickle.loads(contents[1])
+        stats = validate_preprocessing_stats(pickle.loads(contents[2]))
+        # Компілюється лише RandomForest; інші бекенди прогнозують власним predict_proba
+        if self.compiled and backend_of(model) == "random_forest":
+            model = compile_forest(model)
+        return ModelBundle(model, scaler, stats, version)
+
+    def get(self):
+        """
+        Поточний набір артефактів; при зміні файлів на диску завантажує нову версію.
+
+        Returns:
+            ModelBundle: (model, scaler, stats, version).
+
+        Raises:
+            FileNotFoundError: Якщо артефакти відсутні під час першого завантаження.
+        """
+        now = time.monotonic()
+        if self._bundle is not None and now - self._last_check < self.check_interval:
+            return self._bundle
+
+        with self._lock:
+            if self._bundle is not None and now - self._last_check < self.check_interval:
+                return self._bundle
+            self._last_check = now
+            try:
+                signature = self._file_signature()
+                if signature != self._signature:
+                    bundle = self._load()
+                    # Файли змінилися під час читання (наприклад, модель ще зберігається)
+                    if self._file_signature() != signature:
+                        raise OSError("Артефакти змінилися під час завантаження.")
+                    if self._bundle is None or bundle.version != self._bundle.version:
+                        self.logger.info(f"Завантажено модель версії {bundle.version}.")
+                    self._bundle = bundle
+                    self._signature = signature
+            except Exception as e:
+                if self._bundle is None:
+                    raise
+                self.logger.error(
+                    f"Не вдалося оновити модель, використовується версія "
+                    f"{self._bundle.version}: {e}"
+                )
+        return self._bundle
+
+    @property
+    def version(self):
+        """
+        Версія активної моделі.
+
+        Returns:
+            str: Хеш вмісту артефактів.
+        """
+        return self.get().version
+
+
+def registry_version(model):
+    """
+    Версія моделі за вже створеними реєстрами процесу (без завантаження артефактів).
+
+    Args:
+        model: Модель, отримана з ModelRegistry.get().
+
+    Returns:
+        str: Версія набору, якому належить модель, або None, якщо модель не з реєстру.
+    """
+    with _registries_lock:
+        registries = list(_registries.values())
+    for registry in registries:
+        bundle = registry._bundle
+        if bundle is not None and bundle.model is model:
+            return bundle.version
+    return None
+
+
+def get_registry(project_root=None, compiled=False, use_bundle=False):
+    """
+    Спільний для процесу реєстр моделі для заданого каталогу артефактів.
+
+    Args:
+        project_root (str, optional): Каталог з артефактами моделі.
+        compiled (bool, optional): Якщо True, модель компілюється у CompiledForest.
+        use_bundle (bool, optional): Якщо True, артефакти завантажуються з model_bundle.
+
+    Returns:
+        ModelRegistry: Реєстр моделі.
+    """
+    if project_root is None:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    key = (os.path.abspath(project_root), compiled, use_bundle)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(project_root, compiled=compiled, use_bundle=use_bundle)
+        return _registries[key]
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+
+from inference import HIGH_RISK_THRESHOLD, LOW_RISK_THRESHOLD, risk_category
+
+# Кількість клієнтів, вище якої результати показуються зведено, а не по кожному клієнту
+LARGE_BATCH_THRESHOLD = 50
+
+# Розмір сторінки таблиці результатів
+PAGE_SIZE = 100
+
+# Кількість клієнтів у списку найвищого ризику
+TOP_K = 20
+
+# Кількість кошиків гістограми ймовірностей
+HISTOGRAM_BINS = 20
+
+# Колонки таблиці результатів
+ID_COLUMN = "ID клієнта"
+PROBABILITY_COLUMN = "Ймовірність відтоку"
+CATEGORY_COLUMN = "Категорія ризику"
+REASONS_COLUMN = "Основні чинники ризику"
+
+# Порядок категорій ризику для підсумків
+RISK_LEVELS = ["Висока", "Середня", "Низька"]
+
+
+def format_reasons(reasons):
+    """
+    Текстовий опис ознак, що найбільше підвищують ймовірність відтоку.
+
+    Args:
+        reasons (pd.DataFrame): Колонки reason_1..reason_k та contribution_1..contribution_k
+            (ForestExplainer.top_features).
+
+    Returns:
+        np.ndarray: Для кожного клієнта рядок на кшталт "reamining_contract (+0.15),
+            download_avg (+0.08)"; ознаки, внесок яких після округлення не додатний,
+            не показуються.
+    """
+    text = np.full(len(reasons), "", dtype=object)
+    j = 1
+    while f"reason_{j}" in reasons.columns:
+        names = pd.Categorical(reasons[f"reason_{j}"])
+        # Внесок у сотих; рядки форматуються лише для унікальних пар (ознака, внесок)
+        cents = np.rint(reasons[f"contribution_{j}"].to_numpy() * 100).astype(np.int64)
+        codes, keys = pd.factorize(
+            names.codes.astype(np.int64) * 1000 + np.clip(cents, -100, 100) + 500
+        )
+        labels = np.array(
+            [f"{names.categories[key // 1000]} ({(key % 1000 - 500) / 100:+.2f})" for key in keys],
+            dtype=object,
+        )
+        shown = cents > 0
+        separator = np.where(text[shown] == "", "", ", ")
+        text[shown] = text[shown] + separator + labels[codes[shown]]
+        j += 1
+    return text
+
+
+def build_results_frame(preds, client_ids=None, reasons=None):
+    """
+    Таблиця результатів прогнозу: ID клієнта, ймовірність та категорія ризику.
+
+    Args:
+        preds (np.ndarray): Ймовірності відтоку.
+        client_ids (array-like, optional): ID клієнтів; за замовчуванням 1..N.
+        reasons (pd.DataFrame, optional): Ознаки з найбільшим внеском
+            (ForestExplainer.top_features); якщо задано, додається колонка REASONS_COLUMN.
+
+    Returns:
+        pd.DataFrame: Таблиця з числовою колонкою ймовірності.
+    """
+    preds = np.asarray(preds, dtype=np.float64)
+    if client_ids is None:
+        client_ids = np.arange(1, len(preds) + 1)
+    results = pd.DataFrame(
+        {
+            ID_COLUMN: np.asarray(client_ids),
+            PROBABILITY_COLUMN: preds,
+            CATEGORY_COLUMN: risk_category(preds),
+        }
+    )
+    if reasons is not None:
+        results[REASONS_COLUMN] = format_reasons(reasons)
+    return results
+
+
+def risk_counts(preds):
+    """
+    Кількість клієнтів у кожній категорії ризику.
+
+    Args:
+        preds (np.ndarray): Ймовірності відтоку.
+
+    Returns:
+        dict: Категорія ризику -> кількість клієнтів (у порядку RISK_LEVELS).
+    """
+    preds = np.asarray(preds)
+    high = int(np.count_nonzero(preds > HIGH_RISK_THRESHOLD))
+    medium = int(np.count_nonzero(preds > LOW_RISK_THRESHOLD)) - high
+    return {"Висока": high, "Середня": medium, "Низька": len(preds) - high - medium}
+
+
+def probability_histogram(preds, bins=HISTOGRAM_BINS):
+    """
+    Гістограма ймовірностей відтоку з фіксованими кошиками на [0, 1].
+
+    Args:
+        preds (np.ndarray): Ймовірності відтоку.
+        bins (int, optional): Кількість кошиків.
+
+    Returns:
+        tuple: (кількості у кошиках, межі кошиків).
+    """
+    return np.histogram(np.asarray(preds), bins=bins, range=(0.0, 1.0))
+
+
+def top_k(results, k=TOP_K):
+    """
+    Клієнти з найвищою ймовірністю відтоку.
+
+    Використовується часткове впорядкування (argpartition), тож повне сортування
+    таблиці не потрібне.
+
+    Args:
+        results (pd.DataFrame): Таблиця build_results_frame.
+        k (int, optional): Кількість клієнтів.
+
+    Returns:
+        pd.DataFrame: k рядків, упорядкованих за спаданням ймовірності.
+    """
+    preds = results[PROBABILITY_COLUMN].to_numpy()
+    k = min(k, len(preds))
+    if k == 0:
+        return results.iloc[:0]
+    idx = np.argpartition(-preds, k - 1)[:k]
+    idx = idx[np.argsort(-preds[idx], kind="stable")]
+    return results.iloc[idx]
+
+
+def sort_order(results, sort_by=PROBABILITY_COLUMN, ascending=False):
+    """
+    Порядок рядків таблиці результатів для заданої колонки сортування.
+
+    Args:
+        results (pd.DataFrame): Таблиця build_results_frame.
+        sort_by (str, optional): Колонка сортування.
+        ascending (bool, optional): Напрям сортування.
+
+    Returns:
+        np.ndarray: Позиції рядків у порядку сортування.
+
+    Raises:
+        ValueError: Якщо колонки немає в таблиці.
+    """
+    if sort_by not in results.columns:
+        raise ValueError(f"Невідома колонка сортування: {sort_by}.")
+    if sort_by == CATEGORY_COLUMN:
+        # Категорія монотонна за ймовірністю, тож рівень ризику, а не алфавіт, задає порядок
+        sort_by = PROBABILITY_COLUMN
+    values = results[sort_by].to_numpy()
+    if ascending:
+        return np.argsort(values, kind="stable")
+    if values.dtype.kind in "biuf":
+        # Стабільне сортування за спаданням зберігає вихідний порядок рівних значень
+        return np.argsort(-values, kind="stable")
+    return np.argsort(values, kind="stable")[::-1]
+
+
+def page_count(n_rows, page_size=PAGE_SIZE):
+    """
+    Кількість сторінок таблиці.
+
+    Args:
+        n_rows (int): Кількість рядків.
+        page_size (int, optional): Розмір сторінки.
+
+    Returns:
+        int: Кількість сторінок (щонайменше 1).
+    """
+    return max(1, -(-n_rows // page_size))
+
+
+def results_page(results, order, page, page_size=PAGE_SIZE):
+    """
+    Одна сторінка таблиці результатів у заданому порядку.
+
+    Args:
+        results (pd.DataFrame): Таблиця build_results_frame.
+        order (np.ndarray): Порядок рядків (sort_order).
+        page (int): Номер сторінки, починаючи з 1.
+        page_size (int, optional): Розмір сторінки.
+
+    Returns:
+        pd.DataFrame: Не більше page_size рядків.
+    """
+    start = (page - 1) * page_size
+    end = start + page_size
+    return results.iloc[order[start:end]]
+
+
+if __name__ == "__main__":
+    # Час побудови зведеного подання та обсяг даних, що передається у браузер
+    import time
+
+    rng = np.random.default_rng(42)
+    print(
+        f"{'рядків':>10} {'таблиця, мс':>12} {'зведення, мс':>13} {'сортування, мс':>15} "
+        f"{'рядків у UI':>12}"
+    )
+    for n_rows in [1_000, 50_000, 1_000_000]:
+        preds = rng.random(n_rows)
+
+        start = time.perf_counter()
+        results = build_results_frame(preds)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        counts = risk_counts(preds)
+        hist, _ = probability_histogram(preds)
+        top = top_k(results)
+        summary = time.perf_counter() - start
+
+        start = time.perf_counter()
+        order = sort_order(results)
+        page = results_page(results, order, page_count(n_rows))
+        paging = time.perf_counter() - start
+
+        # Перевірка проти повного сортування pandas
+        expected = results.sort_values(PROBABILITY_COLUMN, ascending=False, kind="stable")
+        assert top[ID_COLUMN].tolist() == expected[ID_COLUMN].head(TOP_K).tolist()
+        assert (
+            results_page(results, order, 1)[ID_COLUMN].head(TOP_K).tolist()
+            == top[ID_COLUMN].tolist()
+        )
+        assert sum(counts.values()) == hist.sum() == n_rows
+        shown = len(hist) + len(top) + PAGE_SIZE + len(counts)
+        print(
+            f"{n_rows:>10} {build * 1000:12.2f} {summary * 1000:13.2f} {paging * 1000:15.2f} "
+            f"{shown:>12}"
+        )
@@ -0,0 +1,385 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference import risk_category
+
+# Файл сховища оцінок у корені проєкту
+SCORE_STORE_FILE = "scores.db"
+
+# Кількість рядків в одному executemany (обмежує список кортежів у пам'яті)
+WRITE_BATCH_ROWS = 100_000
+
+# Колонки результатів запитів
+RESULT_COLUMNS = ["customer_id", "model_version", "probability", "risk_category", "scored_at"]
+
+# Розмір кешу сторінок SQLite на з'єднання, КБ (вставки в індекси не впираються в диск)
+CACHE_SIZE_KB = 65_536
+
+# Схема: одна (остання) оцінка клієнта для кожної версії моделі. Версії зберігаються
+# окремо і в таблиці оцінок мають цілий ID. Унікальний індекс (customer_id, version_id)
+# обслуговує заміну оцінки та пошук клієнта, індекс (version_id, probability) - топ-K
+# та поріг без сортування таблиці
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    version_id INTEGER PRIMARY KEY,
+    model_version TEXT NOT NULL UNIQUE,
+    last_scored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scores (
+    customer_id TEXT NOT NULL,
+    version_id INTEGER NOT NULL REFERENCES versions (version_id),
+    probability REAL NOT NULL,
+    risk_category TEXT NOT NULL,
+    scored_at REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS scores_by_customer ON scores (customer_id, version_id);
+CREATE INDEX IF NOT EXISTS scores_by_probability ON scores (version_id, probability);
+"""
+
+# Колонки запитів у порядку RESULT_COLUMNS
+_SELECT = """
+SELECT s.customer_id, v.model_version, s.probability, s.risk_category, s.scored_at
+FROM scores AS s JOIN versions AS v ON v.version_id = s.version_id
+"""
+
+_default_stores = {}
+_default_stores_lock = threading.Lock()
+
+
+def _customer_key(customer_id):
+    # Цілий ID у float (колонка pandas з пропусками) зберігається як ціле: 123.0 -> "123"
+    if isinstance(customer_id, (float, np.floating)) and float(customer_id).is_integer():
+        return str(int(customer_id))
+    return str(customer_id)
+
+
+def _customer_keys(customer_ids):
+    # Векторизований _customer_key для частини масиву ID
+    if customer_ids.dtype.kind == "f":
+        keys = customer_ids.astype(str).astype(object)
+        integral = np.isfinite(customer_ids) & (np.mod(customer_ids, 1) == 0)
+        integral &= np.abs(customer_ids) < 2**53
+        keys[integral] = customer_ids[integral].astype(np.int64).astype(str)
+        return keys.tolist()
+    if customer_ids.dtype.kind == "O":
+        return [_customer_key(cid) for cid in customer_ids.tolist()]
+    return customer_ids.astype(str).tolist()
+
+
+class ScoreStore:
+    """
+    Локальне сховище оцінок відтоку в SQLite.
+
+    Для кожної пари (версія моделі, ID клієнта) зберігається остання ймовірність,
+    категорія ризику та час оцінки, тож повторна оцінка того самого файлу не дублює
+    рядки. Запис виконується пакетами в одній транзакції; запити топ-K і "вище порогу"
+    читають індекс (version_id, probability) від найбільших значень і не
+    залежать від розміру таблиці, крім кількості повернених рядків. Кожен потік має
+    власне з'єднання; журнал WAL дозволяє читати під час запису.
+
+    Args:
+        path (str, optional): Шлях до файлу бази; за замовчуванням scores.db у корені проєкту.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+    """
+
+    def __init__(self, path=None, logger=None):
+        if path is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            path = os.path.join(project_root, SCORE_STORE_FILE)
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+            self._local.conn = conn
+        return conn
+
+    def write(self, customer_ids, probabilities, model_version, scored_at=None):
+        """
+        Пакетний запис оцінок; існуюча оцінка клієнта для цієї версії моделі замінюється.
+
+        Рядки без ID (NaN, None) не записуються: вони не ідентифікують клієнта і
+        замінювали б оцінки одне одного під спільним ключем. Кількість пропущених
+        рядків записується в лог.
+
+        Args:
+            customer_ids (array-like): ID клієнтів (зберігаються як рядки; цілі значення
+                float, наприклад 123.0, - як цілі).
+            probabilities (np.ndarray): Ймовірності відтоку.
+            model_version (str): Версія моделі.
+            scored_at (float, optional): Час оцінки (Unix); за замовчуванням поточний.
+
+        Returns:
+            int: Кількість записаних рядків (без пропущених рядків без ID).
+
+        Raises:
+            ValueError: Якщо кількість ID не збігається з кількістю ймовірностей.
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        customer_ids = np.asarray(customer_ids)
+        if len(customer_ids) != len(probabilities):
+            self.logger.error("Кількість ID клієнтів не збігається з кількістю прогнозів.")
+            raise ValueError("Кількість ID клієнтів не збігається з кількістю прогнозів.")
+        missing = pd.isna(customer_ids)
+        n_skipped = int(missing.sum())
+        if n_skipped:
+            customer_ids = customer_ids[~missing]
+            probabilities = probabilities[~missing]
+        if n_skipped and not len(probabilities):
+            self.logger.warning(f"Оцінки не збережено: пропущено {n_skipped} рядків без ID.")
+            return 0
+        if scored_at is None:
+            scored_at = time.time()
+
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute(
+                "INSERT INTO versions (model_version, last_scored_at) VALUES (?, ?) "
+                "ON CONFLICT (model_version) DO UPDATE SET last_scored_at = ?",
+                (model_version, scored_at, scored_at),
+            )
+            version_id = conn.execute(
+                "SELECT version_id FROM versions WHERE model_version = ?", (model_version,)
+            ).fetchone()[0]
+            for start in range(0, len(probabilities), WRITE_BATCH_ROWS):
+                end = start + WRITE_BATCH_ROWS
+                preds = probabilities[start:end]
+                rows = zip(
+                    _customer_keys(customer_ids[start:end]),
+                    preds.tolist(),
+                    risk_category(preds).tolist(),
+                )
+                conn.executemany(
+                    "INSERT INTO scores VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (customer_id, version_id) DO UPDATE SET "
+                    "probability = excluded.probability, risk_category = excluded.risk_category, "
+                    "scored_at = excluded.scored_at",
+                    ((cid, version_id, p, cat, scored_at) for cid, p, cat in rows),
+                )
+        self.logger.info(
+            f"Збережено {len(probabilities)} оцінок для моделі {model_version}"
+            + (f", пропущено {n_skipped} рядків без ID." if n_skipped else ".")
+        )
+        return len(probabilities)
+
+    def batch(self, customer_ids):
+        """
+        Прив'язка ID клієнтів для запису з predict_churn(..., store=...).
+
+        Args:
+            customer_ids (array-like): ID клієнтів у порядку рядків даних.
+
+        Returns:
+            ScoreBatch: Об'єкт для аргументу store функції predict_churn.
+        """
+        return ScoreBatch(self, customer_ids)
+
+    def latest_version(self):
+        """
+        Версія моделі, оцінки якої записано останніми.
+
+        Returns:
+            str: Версія моделі або None для порожнього сховища.
+        """
+        row = (
+            self._connection()
+            .execute("SELECT model_version FROM versions ORDER BY last_scored_at DESC LIMIT 1")
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+    def _version_id(self, model_version):
+        model_version = model_version or self.latest_version()
+        row = (
+            self._connection()
+            .execute("SELECT version_id FROM versions WHERE model_version = ?", (model_version,))
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+    def _query(self, where, params):
+        rows = self._connection().execute(_SELECT + where, params).fetchall()
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+    def top_k(self, k=20, model_version=None):
+        """
+        Клієнти з найвищою ймовірністю відтоку.
+
+        Args:
+            k (int, optional): Кількість клієнтів.
+            model_version (str, optional): Версія моделі; за замовчуванням latest_version().
+
+        Returns:
+            pd.DataFrame: До k рядків за спаданням ймовірності.
+        """
+        return self._query(
+            "WHERE s.version_id = ? ORDER BY s.probability DESC LIMIT ?",
+            (self._version_id(model_version), k),
+        )
+
+    def above(self, threshold, model_version=None, limit=None):
+        """
+        Клієнти з ймовірністю відтоку вище порогу.
+
+        Args:
+            threshold (float): Поріг ймовірності (строго більше).
+            model_version (str, optional): Версія моделі; за замовчуванням latest_version().
+            limit (int, optional): Максимальна кількість рядків.
+
+        Returns:
+            pd.DataFrame: Рядки за спаданням ймовірності.
+        """
+        return self._query(
+            "WHERE s.version_id = ? AND s.probability > ? ORDER BY s.probability DESC LIMIT ?",
+            (self._version_id(model_version), threshold, -1 if limit is None else limit),
+        )
+
+    def count_above(self, threshold, model_version=None):
+        """
+        Кількість клієнтів з ймовірністю відтоку вище порогу.
+
+        Args:
+            threshold (float): Поріг ймовірності (строго більше).
+            model_version (str, optional): Версія моделі; за замовчуванням latest_version().
+
+        Returns:
+            int: Кількість клієнтів.
+        """
+        return (
+            self._connection()
+            .execute(
+                "SELECT COUNT(*) FROM scores WHERE version_id = ? AND probability > ?",
+                (self._version_id(model_version), threshold),
+            )
+            .fetchone()[0]
+        )
+
+    def lookup(self, customer_id):
+        """
+        Оцінки клієнта для всіх версій моделі.
+
+        Args:
+            customer_id: ID клієнта.
+
+        Returns:
+            pd.DataFrame: Рядки від найновішої оцінки.
+        """
+        return self._query(
+            "WHERE s.customer_id = ? ORDER BY s.scored_at DESC", (_customer_key(customer_id),)
+        )
+
+
+class ScoreBatch:
+    """
+    ID клієнтів, прив'язані до сховища, для запису результатів predict_churn.
+
+    Args:
+        store (ScoreStore): Сховище оцінок.
+        customer_ids (array-like): ID клієнтів у порядку рядків даних.
+    """
+
+    def __init__(self, store, customer_ids):
+        self.store = store
+        self.customer_ids = customer_ids
+
+    def write(self, probabilities, model_version):
+        """
+        Запис прогнозів для прив'язаних ID.
+
+        Args:
+            probabilities (np.ndarray): Ймовірності відтоку.
+            model_version (str): Версія моделі.
+
+        Returns:
+            int: Кількість записаних рядків.
+        """
+        return self.store.write(self.customer_ids, probabilities, model_version)
+
+
+def get_score_store(path=None):
+    """
+    Спільне для процесу сховище оцінок.
+
+    Args:
+        path (str, optional): Шлях до файлу бази.
+
+    Returns:
+        ScoreStore: Сховище оцінок.
+    """
+    key = os.path.abspath(path) if path else None
+    with _default_stores_lock:
+        if key not in _default_stores:
+            _default_stores[key] = ScoreStore(path)
+        return _default_stores[key]
+
+
+if __name__ == "__main__":
+    # Запис і запити на мільйонах рядків: час запису, топ-K, поріг, пошук клієнта
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Бенчмарк сховища оцінок.")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Кількість клієнтів.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    ids = np.arange(1, args.rows + 1)
+    preds = rng.beta(2, 5, args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScoreStore(os.path.join(tmp, "scores.db"))
+        start = time.perf_counter()
+        store.write(ids, preds, "v1")
+        elapsed = time.perf_counter() - start
+        print(f"запис {args.rows} рядків: {elapsed:.2f} с ({args.rows / elapsed:.0f} рядків/с)")
+        start = time.perf_counter()
+        store.write(ids, preds, "v1")
+        elapsed = time.perf_counter() - start
+        print(f"повторний запис (заміна): {elapsed:.2f} с")
+        size = os.path.getsize(store.path) + os.path.getsize(f"{store.path}-wal")
+        print(f"розмір бази: {size / 2**20:.0f} МБ")
+
+        expected = np.sort(preds)[::-1]
+        queries = [
+            ("топ-20", lambda: store.top_k(20)),
+            ("топ-1000", lambda: store.top_k(1000)),
+            ("вище 0.9", lambda: store.above(0.9)),
+            ("вище 0.7, перші 100", lambda: store.above(0.7, limit=100)),
+            ("кількість вище 0.7", lambda: store.count_above(0.7)),
+            ("пошук клієнта", lambda: store.lookup(args.rows // 2)),
+        ]
+        for name, query in queries:
+            query()
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                result = query()
+                timings.append(time.perf_counter() - start)
+            rows = result if isinstance(result, int) else len(result)
+            print(f"{name:>20}: {np.median(timings) * 1000:8.2f} мс, {rows} рядків")
+
+        assert np.allclose(store.top_k(20)["probability"].to_numpy(), expected[:20])
+        assert store.count_above(0.7) == int((preds > 0.7).sum())
+        assert len(store.above(0.9)) == int((preds > 0.9).sum())
+        assert store.lookup(7)["probability"].iloc[0] == preds[6]
+        assert store.count_above(0.0) == args.rows
+        for name, sql in [
+            ("топ-K", "WHERE s.version_id = 1 ORDER BY s.probability DESC LIMIT 20"),
+            ("пошук клієнта", "WHERE s.customer_id = '7'"),
+        ]:
+            plan = store._connection().execute("EXPLAIN QUERY PLAN " + _SELECT + sql).fetchall()
+            print(f"план ({name}): {'; '.join(row[-1] for row in plan)}")
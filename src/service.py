@@ -0,0 +1,353 @@
+import asyncio
+import argparse
+import json
+import logging
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from inference import build_feature_matrix, predict_churn, risk_category
+from drift import get_drift_monitor
+import instrumentation
+from prediction_cache import PredictionCache
+from registry import get_registry
+
+# Межі кошиків для розподілу розмірів мікробатчів
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+
+# Кількість останніх запитів, за якими рахуються перцентилі затримки
+LATENCY_WINDOW = 10_000
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class ServiceMetrics:
+    """
+    Метрики сервісу: розподіл розмірів мікробатчів та перцентилі затримки.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.rows = 0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.rows += size
+        self.batch_size_counts[np.searchsorted(BATCH_SIZE_BUCKETS, size)] += 1
+
+    def record_request(self, latency, error=False):
+        self.requests += 1
+        self.errors += int(error)
+        self.latencies.append(latency)
+
+    def snapshot(self, queue_depth):
+        """
+        Поточний стан метрик.
+
+        Args:
+            queue_depth (int): Кількість запитів, що очікують у черзі.
+
+        Returns:
+            dict: Метрики у форматі, придатному для JSON.
+        """
+        labels = [f"<={b}" for b in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        latency_ms = {}
+        if self.latencies:
+            p50, p90, p99 = np.percentile(np.array(self.latencies) * 1000, [50, 90, 99])
+            latency_ms = {"p50": p50, "p90": p90, "p99": p99}
+        return {
+            "queue_depth": queue_depth,
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "batch_size_distribution": dict(zip(labels, self.batch_size_counts)),
+            "latency_ms": latency_ms,
+        }
+
+
+class MicroBatcher:
+    """
+    Об'єднання одночасних запитів у мікробатчі для одного виклику моделі.
+
+    Перший запит у черзі відкриває батч; батч закривається, коли набирається
+    max_batch_size рядків або минає max_wait_ms. Модель береться з реєстру один раз на
+    батч, тож підміна моделі на диску не змішує версії всередині батчу.
+
+    Args:
+        registry (ModelRegistry): Реєстр моделі.
+        cache (PredictionCache, optional): Кеш прогнозів перед моделлю.
+        max_batch_size (int, optional): Максимальна кількість рядків у мікробатчі.
+        max_wait_ms (float, optional): Максимальний час очікування наповнення батчу.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+    """
+
+    def __init__(self, registry, cache=None, max_batch_size=256, max_wait_ms=5.0, logger=None):
+        self.registry = registry
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.logger = logger or logging.getLogger(__name__)
+        self.metrics = ServiceMetrics()
+        self.queue = asyncio.Queue()
+
+    async def predict(self, records):
+        """
+        Постановка записів у чергу та очікування прогнозів.
+
+        Args:
+            records (list[dict]): Дані клієнтів.
+
+        Returns:
+            np.ndarray: Ймовірності відтоку.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        return await future
+
+    def _score(self, records, bundle):
+        data = pd.DataFrame.from_records(records)
+        processed = build_feature_matrix(data, bundle.scaler, bundle.stats, logger=self.logger)
+        preds = predict_churn(
+            bundle.model,
+            processed,
+            logger=self.logger,
+            cache=self.cache,
+            model_version=bundle.version,
+        )
+        # Монітор дрейфу оновлюється лише спрогнозованими рядками: якщо батч не вдався,
+        # його рядки враховуються один раз під час повторного прогнозу по запитах
+        drift = get_drift_monitor(bundle.stats)
+        if drift is not None:
+            drift.update(data)
+        return preds
+
+    def _score_batch(self, items):
+        bundle = self.registry.get()
+        try:
+            preds = self._score([record for records, _ in items for record in records], bundle)
+        except Exception:
+            # Некоректний запит (зокрема з нескалярними значеннями, що дають TypeError)
+            # не повинен зривати прогноз для інших запитів батчу
+            results = []
+            for records, _ in items:
+                try:
+                    results.append(self._score(records, bundle))
+                except Exception as e:
+                    results.append(e)
+            return results
+        bounds = np.cumsum([len(records) for records, _ in items])[:-1]
+        return np.split(preds, bounds)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            size = len(items[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                size += len(item[0])
+
+            self.metrics.record_batch(size)
+            # Модель виконується в окремому потоці, щоб не блокувати прийом запитів
+            try:
+                results = await loop.run_in_executor(None, self._score_batch, items)
+            except Exception as e:
+                # Помилка батчу передається всім запитам, а цикл продовжує роботу
+                self.logger.error(f"Помилка під час прогнозування мікробатчу: {e}")
+                results = [e] * len(items)
+            for (_, future), result in zip(items, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class ScoringService:
+    """
+    HTTP-сервіс прогнозування відтоку на asyncio без зовнішніх залежностей.
+
+    Ендпоінти:
+        POST /predict - один запис клієнта (JSON-об'єкт).
+        POST /predict/batch - список записів (JSON-масив або {"records": [...]}).
+        GET /metrics - глибина черги, розподіл розмірів батчів, перцентилі затримки,
+            стан монітора дрейфу ознак.
+        GET /health - перевірка стану.
+
+    Args:
+        batcher (MicroBatcher): Мікробатчер для прогнозування.
+        logger (logging.Logger, optional): Логер для запису повідомлень.
+    """
+
+    def __init__(self, batcher, logger=None):
+        self.batcher = batcher
+        self.logger = logger or logging.getLogger(__name__)
+
+    async def _predict(self, records):
+        preds = await self.batcher.predict(records)
+        categories = risk_category(preds)
+        return [
+            {"id": record.get("id"), "probability": float(p), "risk_category": str(c)}
+            for record, p, c in zip(records, preds, categories)
+        ]
+
+    async def _route(self, method, path, body):
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "model_version": self.batcher.registry.version}
+        if path == "/metrics" and method == "GET":
+            metrics = self.batcher.metrics.snapshot(self.batcher.queue.qsize())
+            metrics["model_version"] = self.batcher.registry.version
+            if self.batcher.cache is not None:
+                metrics["cache"] = self.batcher.cache.stats()
+            if instrumentation.is_enabled():
+                metrics["stages"] = instrumentation.snapshot()
+            monitor = get_drift_monitor(self.batcher.registry.get().stats)
+            if monitor is not None:
+                metrics["drift"] = monitor.snapshot()
+            return 200, metrics
+        if path not in ("/predict", "/predict/batch"):
+            return 404, {"error": f"Невідомий шлях: {path}"}
+        if method != "POST":
+            return 405, {"error": "Очікується метод POST."}
+
+        payload = json.loads(body or b"null")
+        if path == "/predict":
+            if not isinstance(payload, dict):
+                raise ValueError("Очікується JSON-об'єкт з даними клієнта.")
+            return 200, (await self._predict([payload]))[0]
+
+        if isinstance(payload, dict):
+            payload = payload.get("records")
+        if not isinstance(payload, list) or not payload:
+            raise ValueError("Очікується непорожній список записів клієнтів.")
+        if not all(isinstance(record, dict) for record in payload):
+            raise ValueError("Кожен запис повинен бути JSON-об'єктом.")
+        return 200, {"predictions": await self._predict(payload)}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                start = time.perf_counter()
+                try:
+                    status, response = await self._route(method, path.split("?")[0], body)
+                except ValueError as e:
+                    status, response = 400, {"error": str(e)}
+                except Exception as e:
+                    self.logger.error(f"Помилка під час обробки запиту {path}: {e}")
+                    status, response = 500, {"error": f"Внутрішня помилка сервера: {e}"}
+                if path.startswith("/predict"):
+                    self.batcher.metrics.record_request(
+                        time.perf_counter() - start, error=status != 200
+                    )
+
+                data = json.dumps(response, ensure_ascii=False).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode(
+                        "latin-1"
+                    )
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            self.logger.warning(f"Некоректний HTTP-запит або розірване з'єднання: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        """
+        Запуск HTTP-сервера та циклу мікробатчингу.
+
+        Args:
+            host (str, optional): Адреса для прослуховування.
+            port (int, optional): Порт для прослуховування.
+        """
+        batch_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        self.logger.info(f"Сервіс прогнозування запущено на http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batch_task.cancel()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="HTTP-сервіс прогнозування відтоку.")
+    parser.add_argument("--host", default="127.0.0.1", help="Адреса для прослуховування.")
+    parser.add_argument("--port", type=int, default=8000, help="Порт для прослуховування.")
+    parser.add_argument(
+        "--max-batch-size", type=int, default=256, help="Максимум рядків у мікробатчі."
+    )
+    parser.add_argument(
+        "--max-wait-ms", type=float, default=5.0, help="Максимальне очікування батчу, мс."
+    )
+    parser.add_argument(
+        "--compiled", action="store_true", help="Використовувати скомпільовану модель."
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=0, help="Розмір кешу прогнозів (0 - без кешу)."
+    )
+    parser.add_argument(
+        "--stage-metrics-port",
+        type=int,
+        default=None,
+        help="Порт ендпоінта метрик етапів у форматі Prometheus (вмикає інструментування).",
+    )
+    args = parser.parse_args()
+
+    logger = logging.getLogger("service")
+    if args.stage_metrics_port is not None:
+        instrumentation.start_metrics_server(args.stage_metrics_port)
+        logger.info(f"Метрики етапів: http://127.0.0.1:{args.stage_metrics_port}/metrics")
+    batcher = MicroBatcher(
+        get_registry(compiled=args.compiled),
+        cache=PredictionCache(args.cache_size) if args.cache_size > 0 else None,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        logger=logger,
+    )
+    asyncio.run(ScoringService(batcher, logger=logger).serve(args.host, args.port))
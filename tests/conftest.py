@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модулі проєкту імпортуються з src без встановлення пакета, як у скриптах src
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
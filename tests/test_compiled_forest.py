@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from compiled_forest import MAX_TABLE_DEPTH, compile_forest
+from dataset import load_dataset
+from inference import build_feature_matrix
+from registry import get_registry
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    model, scaler, stats, _ = get_registry().get()
+    return model, scaler, stats
+
+
+@pytest.fixture(scope="module")
+def features(artifacts):
+    model, scaler, stats = artifacts
+    dataset = load_dataset().drop(columns=["churn"])
+    X = build_feature_matrix(dataset.sample(5_000, random_state=0), scaler, stats)
+    return pd.DataFrame(X, columns=model.feature_names_in_)
+
+
+def _forest_with_missing(max_depth):
+    # Пропуски в навчальних даних, щоб sklearn обирав напрямок для NaN у вузлах
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2_000, 4))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    X[rng.random(X.shape) < 0.2] = np.nan
+    y[np.isnan(X[:, 0])] = 1
+    model = RandomForestClassifier(n_estimators=20, max_depth=max_depth, random_state=0)
+    return model.fit(X, y), X
+
+
+def test_matches_committed_model(artifacts, features):
+    model = artifacts[0]
+    forest = compile_forest(model)
+    # Відрізняється лише порядок підсумовування дерев
+    np.testing.assert_allclose(
+        forest.predict_proba(features), model.predict_proba(features), rtol=0, atol=1e-12
+    )
+    np.testing.assert_array_equal(forest.predict(features), model.predict(features))
+
+
+def test_nan_inputs_match_committed_model(artifacts, features):
+    model = artifacts[0]
+    forest = compile_forest(model)
+    X = features.to_numpy(copy=True)
+    rng = np.random.default_rng(1)
+    X[rng.random(X.shape) < 0.3] = np.nan
+    X[0] = np.nan
+    np.testing.assert_allclose(
+        forest.predict_proba(X),
+        model.predict_proba(pd.DataFrame(X, columns=model.feature_names_in_)),
+        rtol=0,
+        atol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("max_depth", [MAX_TABLE_DEPTH, 6])
+def test_missing_value_routing(max_depth):
+    model, X = _forest_with_missing(max_depth)
+    forest = compile_forest(model)
+    # Обидва напрямки для пропусків справді трапляються у вузлах
+    assert forest.missing_go_left.any() and not forest.missing_go_left.all()
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+
+    all_missing = np.full((1, X.shape[1]), np.nan)
+    np.testing.assert_allclose(
+        forest.predict_proba(all_missing), model.predict_proba(all_missing), rtol=0, atol=1e-12
+    )
+
+
+def test_apply_gives_leaf_per_tree(artifacts, features):
+    forest = compile_forest(artifacts[0])
+    leaves = forest.apply(features)
+    assert leaves.shape == (len(features), forest.n_estimators)
+    proba = forest.leaf_values[np.arange(forest.n_estimators), leaves].mean(axis=1)
+    np.testing.assert_allclose(proba, forest.predict_proba(features)[:, 1], rtol=0, atol=1e-12)
+
+
+def test_rejects_wrong_features(artifacts, features):
+    forest = compile_forest(artifacts[0])
+    with pytest.raises(ValueError):
+        forest.predict_proba(features[features.columns[::-1]])
+    with pytest.raises(ValueError):
+        forest.predict_proba(features.to_numpy()[:, :-1])
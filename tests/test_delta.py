@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import load_dataset
+from delta import delta_score, load_snapshot, row_hashes, save_snapshot
+from inference import build_feature_matrix, predict_churn
+from registry import get_registry
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    model, scaler, stats, version = get_registry().get()
+    return model, scaler, stats, version
+
+
+@pytest.fixture(scope="module")
+def snapshots():
+    yesterday = load_dataset().drop(columns=["churn"]).head(5_000).reset_index(drop=True)
+    today = yesterday.copy()
+    today.loc[:99, "service_failure_count"] += 1
+    arrivals = yesterday.iloc[:50].assign(id=yesterday["id"].iloc[:50] + 10_000_000)
+    # 30 клієнтів пішли, 50 нових
+    today = pd.concat([today.iloc[30:], arrivals], ignore_index=True)
+    return yesterday, today
+
+
+def test_delta_matches_full_rescore(artifacts, snapshots, tmp_path):
+    model, scaler, stats, version = artifacts
+    yesterday, today = snapshots
+    _, snapshot, _ = delta_score(yesterday, model, scaler, stats, version)
+    save_snapshot(snapshot, str(tmp_path / "snapshot.parquet"))
+    snapshot = load_snapshot(str(tmp_path / "snapshot.parquet"))
+
+    preds, new_snapshot, report = delta_score(today, model, scaler, stats, version, snapshot)
+    full = predict_churn(model, build_feature_matrix(today, scaler, stats))
+    np.testing.assert_array_equal(preds, full)
+    assert report["rows"] == len(today)
+    assert report["new"] == 50
+    assert report["changed"] == 70
+    assert report["skipped"] == len(today) - 50 - 70
+    assert report["removed"] == 30
+    np.testing.assert_array_equal(new_snapshot["row_hash"].to_numpy(), row_hashes(today))
+
+
+def test_other_model_version_rescores_everything(artifacts, snapshots):
+    model, scaler, stats, version = artifacts
+    yesterday, _ = snapshots
+    _, snapshot, _ = delta_score(yesterday, model, scaler, stats, "old-version")
+    _, _, report = delta_score(yesterday, model, scaler, stats, version, snapshot)
+    assert report["skipped"] == 0
+    assert report["new"] == len(yesterday)
+
+
+def test_row_hash_ignores_numeric_dtype_changes(snapshots):
+    yesterday, _ = snapshots
+    widened = yesterday.astype({"service_failure_count": np.float64, "id": np.int64})
+    np.testing.assert_array_equal(row_hashes(widened), row_hashes(yesterday))
+
+
+def test_duplicate_ids_are_rejected(artifacts, snapshots):
+    model, scaler, stats, version = artifacts
+    yesterday, _ = snapshots
+    duplicated = pd.concat([yesterday.head(3), yesterday.head(1)], ignore_index=True)
+    with pytest.raises(ValueError):
+        delta_score(duplicated, model, scaler, stats, version)
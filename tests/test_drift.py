@@ -0,0 +1,66 @@
+import logging
+
+import numpy as np
+import pytest
+
+from dataset import load_dataset
+from drift import DriftMonitor, binned_ks, psi
+from registry import get_registry
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return get_registry().get().stats["drift"]
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return load_dataset().drop(columns=["churn"]).sample(6_000, random_state=0)
+
+
+def test_psi_and_ks():
+    counts = np.array([10, 20, 30, 40])
+    assert psi(counts, counts * 3) == pytest.approx(0.0)
+    assert binned_ks(counts, counts * 3) == pytest.approx(0.0)
+    shifted = counts[::-1]
+    assert psi(counts, shifted) > 0.2
+    assert binned_ks(counts, shifted) == pytest.approx(0.4)
+
+
+def test_window_closes_and_resets(baseline, sample):
+    monitor = DriftMonitor(baseline, window_rows=5_000)
+    assert monitor.update(sample.iloc[:3_000]) is None
+    assert monitor.snapshot()["window_rows"] == 3_000
+
+    report = monitor.update(sample.iloc[3_000:5_500])
+    assert report["rows"] == 5_500
+    # Вибірка з навчальних даних не зміщена
+    assert report["drifted"] == []
+    state = monitor.snapshot()
+    assert state == {"windows": 1, "alerts": 0, "window_rows": 0, "last": report}
+
+    monitor.update(sample.iloc[5_500:])
+    partial = monitor.check()
+    assert partial["rows"] == 500
+    assert monitor.check() is None
+    assert monitor.snapshot()["windows"] == 2
+
+
+def test_shifted_feature_raises_alert(baseline, sample, caplog):
+    monitor = DriftMonitor(baseline, window_rows=len(sample))
+    shifted = sample.assign(download_avg=sample["download_avg"] * 3 + 50)
+    with caplog.at_level(logging.WARNING, logger="drift"):
+        report = monitor.update(shifted)
+    assert report["drifted"] == ["download_avg"]
+    assert report["features"]["download_avg"]["psi"] > 0.2
+    assert monitor.alerts == 1
+    assert "download_avg" in caplog.text
+    text = monitor.prometheus_text()
+    assert "churn_drift_alerts_total 1" in text
+    assert 'churn_feature_psi{feature="download_avg"}' in text
+
+
+def test_missing_column_counts_as_missing_values(baseline, sample):
+    monitor = DriftMonitor(baseline, window_rows=len(sample))
+    report = monitor.update(sample.drop(columns=["upload_avg"]))
+    assert "upload_avg" in report["drifted"]
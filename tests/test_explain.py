@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.dummy import DummyClassifier
+
+from compiled_forest import compile_forest
+from dataset import load_dataset
+from explain import _feature_groups, _naive_contributions, build_explainer, get_explainer
+from inference import build_feature_matrix
+from preprocessing import REQUIRED_COLS
+from registry import get_registry
+
+
+@pytest.fixture(scope="module")
+def model():
+    return get_registry().get().model
+
+
+@pytest.fixture(scope="module")
+def features():
+    _, scaler, stats, _ = get_registry().get()
+    data = load_dataset().drop(columns=["churn"]).sample(3_000, random_state=0)
+    data.loc[data.index[:200], ["download_avg", "upload_avg"]] = np.nan
+    return build_feature_matrix(data, scaler, stats)
+
+
+@pytest.mark.parametrize("group_one_hot", [True, False])
+def test_contributions_sum_to_prediction_minus_bias(model, features, group_one_hot):
+    explainer = build_explainer(model, group_one_hot=group_one_hot)
+    contributions = explainer.contributions(features)
+    assert contributions.shape == (len(features), len(explainer.feature_names))
+    proba = model.predict_proba(pd.DataFrame(features, columns=model.feature_names_in_))[:, 1]
+    np.testing.assert_allclose(
+        contributions.sum(axis=1), proba - explainer.bias, rtol=0, atol=1e-12
+    )
+
+
+def test_contributions_match_per_row_tree_walk(model, features):
+    explainer = build_explainer(model)
+    _, groups = _feature_groups(model.feature_names_in_, True)
+    naive = _naive_contributions(model, features[:100], groups, len(explainer.feature_names))
+    np.testing.assert_allclose(explainer.contributions(features[:100]), naive, rtol=0, atol=1e-12)
+
+
+def test_one_hot_columns_grouped_into_raw_feature(model):
+    explainer = build_explainer(model)
+    assert set(explainer.feature_names) <= set(REQUIRED_COLS)
+    assert "download_over_limit" in explainer.feature_names
+    assert not any(name.startswith("download_over_limit_") for name in explainer.feature_names)
+
+
+def test_top_features_sorted_by_contribution(model, features):
+    explainer = build_explainer(model)
+    top = explainer.top_features(features, k=3)
+    assert list(top.columns) == [
+        "reason_1",
+        "contribution_1",
+        "reason_2",
+        "contribution_2",
+        "reason_3",
+        "contribution_3",
+    ]
+    values = top[["contribution_1", "contribution_2", "contribution_3"]].to_numpy()
+    assert (np.diff(values, axis=1) <= 0).all()
+    contributions = explainer.contributions(features)
+    np.testing.assert_array_equal(values[:, 0], contributions.max(axis=1))
+    names = np.asarray(explainer.feature_names)
+    assert (top["reason_1"].to_numpy() == names[contributions.argmax(axis=1)]).all()
+
+
+def test_unsupported_models_have_no_explainer(model, features):
+    assert get_explainer(compile_forest(model)) is None
+    dummy = DummyClassifier().fit(features[:100], np.arange(100) % 2)
+    assert get_explainer(dummy) is None
+    with pytest.raises(ValueError):
+        build_explainer(dummy)
@@ -0,0 +1,76 @@
+import io
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset import load_dataset
+from export import EXPORT_FORMATS, ResultsWriter, export_tempfile
+from inference import score_csv
+from registry import get_registry
+
+pytest.importorskip("pyarrow")
+
+
+def _chunk(ids):
+    preds = np.linspace(0.1, 0.9, len(ids))
+    return pd.DataFrame({"id": ids, "probability": preds})
+
+
+def test_parquet_chunks_with_different_dtypes():
+    out = io.BytesIO()
+    with ResultsWriter(out, "parquet") as writer:
+        writer.write(_chunk(np.array([1, 2, 3])))
+        # Пропуск у колонці ID: pandas читає частину як float64
+        writer.write(_chunk(np.array([4.0, np.nan, 6.0])))
+        writer.write(_chunk(np.array([7, 8], dtype=np.int32)))
+    loaded = pd.read_parquet(io.BytesIO(out.getvalue()))
+    assert len(loaded) == 8
+    assert loaded["id"].isna().sum() == 1
+    assert loaded["id"].dropna().tolist() == [1, 2, 3, 4, 6, 7, 8]
+
+
+def test_parquet_rejects_incompatible_chunk():
+    out = io.BytesIO()
+    with pytest.raises(ValueError):
+        with ResultsWriter(out, "parquet") as writer:
+            writer.write(_chunk(np.array([1, 2])))
+            writer.write(_chunk(np.array([1.5, 2.5])))
+
+
+@pytest.mark.parametrize("extension", [".csv", ".parquet"])
+def test_score_csv_blank_id_after_first_chunk(tmp_path, extension):
+    model, scaler, stats, _ = get_registry().get()
+    data = load_dataset().drop(columns=["churn"]).head(300).reset_index(drop=True)
+    data["id"] = data["id"].astype(object)
+    data.loc[250, "id"] = None
+    input_path = tmp_path / "input.csv"
+    data.to_csv(input_path, index=False)
+
+    output_path = tmp_path / f"out{extension}"
+    summary = score_csv(str(input_path), str(output_path), model, scaler, stats, chunk_size=100)
+    assert summary["rows"] == 300
+    loaded = pd.read_parquet(output_path) if extension == ".parquet" else pd.read_csv(output_path)
+    assert len(loaded) == 300
+    assert loaded["id"].isna().sum() == 1
+
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz", "parquet"])
+def test_export_tempfile(fmt):
+    results = _chunk(np.arange(1, 121))
+    path = export_tempfile(results, fmt, chunk_size=50)
+    try:
+        assert path.endswith(EXPORT_FORMATS[fmt]["extension"])
+        loaded = pd.read_parquet(path) if fmt == "parquet" else pd.read_csv(path)
+        pd.testing.assert_frame_equal(loaded, results)
+    finally:
+        os.remove(path)
+
+
+def test_export_tempfile_removes_file_on_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    with pytest.raises(ValueError):
+        export_tempfile(_chunk(np.arange(3)), "xlsx")
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compiled_forest import compile_forest
+from dataset import load_dataset
+from inference import (
+    build_feature_matrix,
+    predict_churn,
+    preprocess_input,
+    record_features,
+    score_record,
+)
+from preprocessing import EXPECTED_COLUMNS, preprocess_data
+from score_store import ScoreStore
+from registry import get_registry
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    model, scaler, stats, _ = get_registry().get()
+    return model, scaler, stats
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return load_dataset()
+
+
+def _proba(model, X):
+    return model.predict_proba(pd.DataFrame(X, columns=EXPECTED_COLUMNS))[:, 1]
+
+
+def test_stored_stats_match_training_preprocessing(artifacts, dataset):
+    model, scaler, stats = artifacts
+    # Препроцесинг навчання рахує статистики по всьому датасету і видаляє частину рядків
+    train = preprocess_data(df=dataset)[EXPECTED_COLUMNS]
+    features = preprocess_input(dataset.drop(columns=["churn"]), scaler, stats=stats)
+    features = features.loc[train.index]
+    np.testing.assert_allclose(features.to_numpy(), train.to_numpy(dtype=np.float64), atol=1e-5)
+    np.testing.assert_array_equal(_proba(model, features), _proba(model, train))
+
+
+def test_stored_stats_equal_full_batch_stats(artifacts, dataset):
+    _, scaler, stats = artifacts
+    raw = dataset.drop(columns=["churn"])
+    fixed = preprocess_input(raw, scaler, stats=stats)
+    per_batch = preprocess_input(raw, scaler, stats=None)
+    pd.testing.assert_frame_equal(fixed, per_batch)
+
+
+def test_row_features_do_not_depend_on_batch(artifacts, dataset):
+    _, scaler, stats = artifacts
+    raw = dataset.drop(columns=["churn"])
+    full = preprocess_input(raw, scaler, stats=stats)
+    # Невеликий батч з нетиповим розподілом: найбільші завантаження
+    part = raw.nlargest(50, "download_avg")
+    pd.testing.assert_frame_equal(preprocess_input(part, scaler, stats=stats), full.loc[part.index])
+    assert not preprocess_input(part, scaler, stats=None).equals(full.loc[part.index])
+
+
+def test_input_frame_is_not_modified(artifacts, dataset):
+    _, scaler, stats = artifacts
+    raw = dataset.drop(columns=["churn"]).head(1_000)
+    raw.loc[raw.index[:10], "download_avg"] = np.nan
+    raw.loc[raw.index[10:20], "subscription_age"] = -1.0
+    before = raw.copy()
+    preprocess_input(raw, scaler, stats=stats)
+    build_feature_matrix(raw, scaler, stats)
+    pd.testing.assert_frame_equal(raw, before)
+
+
+def test_float32_matrix_matches_dataframe_path(artifacts, dataset):
+    model, scaler, stats = artifacts
+    raw = dataset.drop(columns=["churn"]).sample(20_000, random_state=0)
+    raw.loc[raw.index[:500], ["download_avg", "upload_avg", "reamining_contract"]] = np.nan
+    raw.loc[raw.index[500:600], "subscription_age"] = -2.0
+    frame = preprocess_input(raw, scaler, stats=stats)
+    matrix = build_feature_matrix(raw, scaler, stats)
+    assert matrix.dtype == np.float32 and matrix.flags.c_contiguous
+    # Дерева порівнюють значення float32, тож матриця збігається з приведеним DataFrame
+    np.testing.assert_array_equal(matrix, frame.to_numpy(dtype=np.float32))
+    np.testing.assert_array_equal(_proba(model, matrix), _proba(model, frame))
+
+
+def _records(dataset, n=500):
+    # Записи з датасету з пропусками, від'ємним віком, викидами, ознаками поза
+    # діапазоном і відсутніми ключами
+    rng = np.random.default_rng(0)
+    records = dataset.drop(columns=["churn"]).sample(n, random_state=0).to_dict("records")
+    for i, record in enumerate(records):
+        kind = i % 6
+        if kind == 0:
+            record["download_avg"] = None
+            record["upload_avg"] = np.nan
+        elif kind == 1:
+            record["subscription_age"] = -rng.random() * 3
+        elif kind == 2:
+            record["download_avg"] = 1e6
+            record["upload_avg"] = -5.0
+        elif kind == 3:
+            record["download_over_limit"] = rng.choice([-3, 12, np.nan])
+        elif kind == 4:
+            del record["reamining_contract"]
+            del record["is_tv_subscriber"]
+    return records
+
+
+def test_record_features_match_dataframe_path(artifacts, dataset):
+    _, scaler, stats = artifacts
+    for record in _records(dataset):
+        expected = preprocess_input(pd.DataFrame([record]), scaler, stats=stats)
+        np.testing.assert_array_equal(
+            record_features(record, scaler, stats), expected.to_numpy()[0], err_msg=str(record)
+        )
+
+
+def test_score_record_matches_batch_prediction(artifacts, dataset):
+    model, scaler, stats = artifacts
+    records = _records(dataset, n=60)
+    # Кожен запис окремо: відсутній ключ у спільному DataFrame став би NaN, а не 0
+    features = np.vstack(
+        [preprocess_input(pd.DataFrame([record]), scaler, stats=stats) for record in records]
+    )
+    batch = predict_churn(model, features)
+    single = [score_record(record, model, scaler, stats) for record in records]
+    np.testing.assert_array_equal(single, batch)
+
+
+def test_record_features_rejects_text_download_over_limit(artifacts):
+    _, scaler, stats = artifacts
+    with pytest.raises(ValueError):
+        record_features({"download_over_limit": "high"}, scaler, stats)
+
+
+def test_store_version_defaults_to_registry_version(artifacts, dataset, tmp_path):
+    model, scaler, stats = artifacts
+    version = get_registry().get().version
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    record = dataset.drop(columns=["churn"]).iloc[0].to_dict()
+    score_record(record, model, scaler, stats, store=store.batch([record["id"]]))
+    assert store.lookup(record["id"])["model_version"].tolist() == [version]
+
+    X = build_feature_matrix(dataset.head(5), scaler, stats)
+    predict_churn(model, X, store=store.batch(np.arange(5)), model_version="explicit")
+    assert store.latest_version() == "explicit"
+
+
+def test_store_requires_version_for_model_outside_registry(artifacts, dataset, tmp_path):
+    model, scaler, stats = artifacts
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    X = build_feature_matrix(dataset.head(5), scaler, stats)
+    with pytest.raises(ValueError):
+        predict_churn(compile_forest(model), X, store=store.batch(np.arange(5)))
+    assert store.latest_version() is None
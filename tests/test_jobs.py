@@ -0,0 +1,67 @@
+import threading
+
+import pandas as pd
+
+from dataset import load_dataset
+from jobs import CANCELLED, DONE, JobManager
+
+
+def _csv_bytes(n_rows=100, blank_ids=()):
+    df = load_dataset().drop(columns=["churn"]).head(n_rows).reset_index(drop=True)
+    if blank_ids:
+        df["id"] = df["id"].astype(object)
+        df.loc[list(blank_ids), "id"] = None
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def test_job_id_depends_on_job_settings(tmp_path):
+    data = _csv_bytes()
+    plain = JobManager(root_dir=str(tmp_path))
+    explained = JobManager(root_dir=str(tmp_path), explain=True)
+    rechunked = JobManager(root_dir=str(tmp_path), chunk_size=10)
+    try:
+        ids = {m.submit(data) for m in [plain, explained, rechunked]}
+        assert len(ids) == 3
+        assert plain.submit(data) in ids
+    finally:
+        for manager in [plain, explained, rechunked]:
+            manager.shutdown()
+
+
+def test_cancel_queued_job_releases_future(tmp_path):
+    manager = JobManager(root_dir=str(tmp_path), max_workers=1)
+    release = threading.Event()
+    # Єдиний потік пулу зайнятий, тож завдання лишається в черзі
+    blocker = manager._executor.submit(release.wait)
+    try:
+        job_id = manager.submit(_csv_bytes())
+        assert manager.cancel(job_id)
+        assert manager.status(job_id)["state"] == CANCELLED
+        assert job_id not in manager._futures
+    finally:
+        release.set()
+        blocker.result()
+        manager.shutdown()
+
+
+def test_job_results_cover_all_rows(tmp_path):
+    manager = JobManager(root_dir=str(tmp_path), chunk_size=30)
+    job_id = manager.submit(_csv_bytes())
+    # shutdown чекає завершення завдання
+    manager.shutdown()
+    results = manager.results(job_id)
+    assert isinstance(results, pd.DataFrame)
+    assert len(results) == 100
+
+
+def test_job_with_mixed_id_dtypes_across_chunks(tmp_path):
+    manager = JobManager(root_dir=str(tmp_path), chunk_size=30, explain=True)
+    # Перша частина читається з ID int64, третя - float64 через порожній ID
+    job_id = manager.submit(_csv_bytes(blank_ids=[70]))
+    manager.shutdown()
+    status = manager.status(job_id)
+    assert status["state"] == DONE, status["error"]
+    results = manager.results(job_id)
+    assert len(results) == 100
+    assert results["id"].isna().sum() == 1
+    assert results["id"].dropna().is_unique
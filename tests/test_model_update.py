@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from dataset import load_dataset
+from inference import preprocess_input
+from model import update_forest
+from preprocessing import fit_preprocessing_counts
+from registry import get_registry
+
+
+@pytest.fixture(scope="module")
+def base():
+    model, scaler, stats, _ = get_registry().get()
+    dataset = load_dataset()
+    half = len(dataset) // 2
+    history = dataset.iloc[:half]
+    new_data = dataset.iloc[half:].sample(5_000, random_state=0)
+    return model, scaler, fit_preprocessing_counts(history), new_data
+
+
+def _tree_proba(estimators, X):
+    return np.column_stack([est.predict_proba(X.to_numpy())[:, 1] for est in estimators])
+
+
+def test_retained_trees_see_same_raw_values(base):
+    model, scaler, counts, new_data = base
+    thresholds = [est.tree_.threshold.copy() for est in model.estimators_]
+    updated, new_scaler, stats, _ = update_forest(model, scaler, counts, new_data, n_new_trees=0)
+    assert not np.allclose(new_scaler.mean_, scaler.mean_)
+
+    # Ті самі сирі рядки в старій і новій шкалі нормалізації
+    raw = load_dataset().drop(columns=["churn"]).sample(20_000, random_state=1)
+    before = _tree_proba(model.estimators_, preprocess_input(raw, scaler, stats=stats))
+    after = _tree_proba(updated.estimators_, preprocess_input(raw, new_scaler, stats=stats))
+    np.testing.assert_array_equal(before, after)
+
+    # Вхідна модель не змінюється
+    for est, threshold in zip(model.estimators_, thresholds):
+        np.testing.assert_array_equal(est.tree_.threshold, threshold)
+
+
+def test_retire_oldest_and_new_trees(base):
+    model, scaler, counts, new_data = base
+    updated, new_scaler, stats, _ = update_forest(
+        model, scaler, counts, new_data, n_new_trees=8, retire_oldest=5
+    )
+    n_old = len(model.estimators_)
+    assert len(updated.estimators_) == updated.n_estimators == n_old - 5 + 8
+    assert not updated.warm_start
+    # Збережені дерева - ті самі дерева без 5 найстаріших, нові додаються в кінець
+    for old, kept in zip(model.estimators_[5:], updated.estimators_[: n_old - 5]):
+        np.testing.assert_array_equal(old.tree_.feature, kept.tree_.feature)
+        np.testing.assert_array_equal(old.tree_.value, kept.tree_.value)
+    old_ids = {id(est) for est in model.estimators_}
+    assert not any(id(est) in old_ids for est in updated.estimators_)
+    proba = updated.predict_proba(
+        preprocess_input(new_data.drop(columns=["churn"]), new_scaler, stats=stats)
+    )
+    assert proba.shape == (len(new_data), 2)
+
+
+def test_update_rejects_empty_forest(base):
+    model, scaler, counts, new_data = base
+    with pytest.raises(ValueError):
+        update_forest(
+            model, scaler, counts, new_data, n_new_trees=0, retire_oldest=len(model.estimators_)
+        )
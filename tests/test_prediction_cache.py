@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from inference import predict_churn
+from prediction_cache import PredictionCache
+
+
+class CountingModel:
+    # Модель-заглушка: ймовірність - сигмоїда суми ознак, рахує рядки, що дійшли до моделі
+    def __init__(self):
+        self.rows = 0
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        self.rows += len(X)
+        p = 1.0 / (1.0 + np.exp(-X.sum(axis=1)))
+        return np.column_stack([1.0 - p, p])
+
+
+def _features(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, 15)).astype(np.float32)
+
+
+def test_repeated_rows_served_from_cache():
+    model, cache = CountingModel(), PredictionCache()
+    X = _features(100)
+    first = predict_churn(model, X, cache=cache, model_version="v1")
+    second = predict_churn(model, X, cache=cache, model_version="v1")
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(first, predict_churn(CountingModel(), X))
+    assert model.rows == 100
+    assert cache.stats()["hits"] == 100 and cache.stats()["misses"] == 100
+
+    # Частково нові рядки: до моделі потрапляють лише промахи
+    mixed = np.vstack([X[:30], _features(20, seed=1)])
+    predict_churn(model, mixed, cache=cache, model_version="v1")
+    assert model.rows == 120
+
+
+def test_new_model_version_invalidates_cache():
+    model, cache = CountingModel(), PredictionCache()
+    X = _features(50)
+    predict_churn(model, X, cache=cache, model_version="v1")
+    predict_churn(model, X, cache=cache, model_version="v2")
+    assert model.rows == 100
+    stats = cache.stats()
+    assert stats["invalidations"] == 1
+    assert stats["model_version"] == "v2"
+    assert stats["size"] == 50
+
+
+def test_least_recently_used_rows_are_evicted():
+    model, cache = CountingModel(), PredictionCache(max_size=10)
+    X = _features(12)
+    predict_churn(model, X[:10], cache=cache, model_version="v1")
+    # Рядок 0 використано повторно, тож витісняються рядки 1 і 2
+    predict_churn(model, X[:1], cache=cache, model_version="v1")
+    predict_churn(model, X[10:], cache=cache, model_version="v1")
+    assert cache.stats()["evictions"] == 2
+    _, miss = cache.get_many(X[:3], "v1")
+    assert miss.tolist() == [False, True, True]
+
+
+def test_cache_requires_model_version():
+    with pytest.raises(ValueError):
+        predict_churn(CountingModel(), _features(3), cache=PredictionCache())
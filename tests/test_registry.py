@@ -0,0 +1,69 @@
+import copy
+import os
+import pickle
+import shutil
+
+import pytest
+
+from model import _copy_atomic, publish_artifacts
+from registry import ARTIFACT_FILES, ARTIFACT_MANIFEST, ModelRegistry
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _store(tmp_path, name, scaler_shift=0.0):
+    # Набір артефактів з комітованих файлів; scaler_shift робить інший scaler
+    path = tmp_path / "model_store" / name
+    path.mkdir(parents=True)
+    for file_name in ARTIFACT_FILES:
+        shutil.copyfile(os.path.join(PROJECT_ROOT, file_name), path / file_name)
+    with open(path / "scaler.pkl", "rb") as f:
+        scaler = pickle.load(f)
+    scaler = copy.deepcopy(scaler)
+    scaler.mean_ = scaler.mean_ + scaler_shift
+    with open(path / "scaler.pkl", "wb") as f:
+        pickle.dump(scaler, f)
+    (path / "feature_importance.png").write_bytes(b"")
+    return str(path)
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    return str(root)
+
+
+def test_registry_loads_published_manifest(tmp_path, root):
+    store = _store(tmp_path, "v1")
+    publish_artifacts(store, root)
+    assert os.path.exists(os.path.join(root, ARTIFACT_MANIFEST))
+    assert (tmp_path / "model_store" / "CURRENT").read_text() == "v1"
+
+    bundle = ModelRegistry(root, check_interval=0).get()
+    with open(os.path.join(root, ARTIFACT_MANIFEST)) as f:
+        assert f'"version": "{bundle.version}"' in f.read()
+
+
+def test_partial_publish_keeps_previous_set(tmp_path, root):
+    old = _store(tmp_path, "v1")
+    new = _store(tmp_path, "v2", scaler_shift=1.0)
+    publish_artifacts(old, root)
+    registry = ModelRegistry(root, check_interval=0)
+    first = registry.get()
+
+    # Публікацію перервано після scaler.pkl: на диску новий scaler зі старим маніфестом
+    _copy_atomic(os.path.join(new, "scaler.pkl"), os.path.join(root, "scaler.pkl"))
+    assert registry.get() is first
+
+    publish_artifacts(new, root)
+    second = registry.get()
+    assert second.version != first.version
+    assert (second.scaler.mean_ == first.scaler.mean_ + 1.0).all()
+
+
+def test_registry_without_manifest(root):
+    for file_name in ARTIFACT_FILES:
+        shutil.copyfile(os.path.join(PROJECT_ROOT, file_name), os.path.join(root, file_name))
+    bundle = ModelRegistry(root, check_interval=0).get()
+    assert bundle.version
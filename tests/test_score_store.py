@@ -0,0 +1,52 @@
+import io
+import logging
+
+import numpy as np
+import pandas as pd
+
+from score_store import ScoreStore
+
+
+def test_float_ids_round_trip(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    # Колонка id з пропуском читається pandas як float64: 123.0, NaN
+    ids = pd.read_csv(io.StringIO("id\n123\n\n7\n"), skip_blank_lines=False)["id"]
+    store.write(ids, np.array([0.9, 0.5, 0.1]), "v1")
+
+    for customer_id in ["123", 123, 123.0, np.int64(123)]:
+        found = store.lookup(customer_id)
+        assert len(found) == 1
+        assert found["customer_id"].iloc[0] == "123"
+        assert found["probability"].iloc[0] == 0.9
+    assert store.lookup("123.0").empty
+
+
+def test_mixed_ids_keep_text(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    store.write(np.array(["A-1", 5.0, 5.5], dtype=object), np.array([0.2, 0.3, 0.4]), "v1")
+    assert store.lookup("A-1")["probability"].iloc[0] == 0.2
+    assert store.lookup(5)["probability"].iloc[0] == 0.3
+    assert store.lookup(5.5)["probability"].iloc[0] == 0.4
+
+
+def test_rewrite_replaces_score(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    store.write([1, 2], np.array([0.1, 0.2]), "v1")
+    store.write(np.array([1.0, 2.0]), np.array([0.8, 0.2]), "v1")
+    assert store.count_above(0.0) == 2
+    assert store.top_k(1)["customer_id"].iloc[0] == "1"
+
+
+def test_rows_without_id_are_skipped(tmp_path, caplog):
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    ids = np.array([1.0, np.nan, 2.0, np.nan])
+    with caplog.at_level(logging.INFO, logger="score_store"):
+        written = store.write(ids, np.array([0.1, 0.2, 0.3, 0.4]), "v1")
+    assert written == 2
+    assert store.count_above(0.0) == 2
+    assert store.lookup("nan").empty
+    assert store.lookup(2)["probability"].iloc[0] == 0.3
+    assert "пропущено 2 рядків без ID" in caplog.text
+
+    assert store.write(np.array([None, None], dtype=object), np.array([0.5, 0.6]), "v1") == 0
+    assert store.count_above(0.0) == 2
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+from drift import get_drift_monitor
+from registry import get_registry
+from service import MicroBatcher, ScoringService
+
+GOOD_RECORD = {
+    "id": 1,
+    "is_tv_subscriber": 1,
+    "is_movie_package_subscriber": 0,
+    "subscription_age": 2.5,
+    "reamining_contract": 1.0,
+    "service_failure_count": 0,
+    "download_avg": 100.0,
+    "upload_avg": 10.0,
+    "download_over_limit": 0,
+}
+
+
+async def _post(port, path, payload):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode(
+            "latin-1"
+        )
+        + body
+    )
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), timeout=30)
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(data)
+
+
+async def _run_service(scenario):
+    batcher = MicroBatcher(get_registry(), max_wait_ms=20)
+    service = ScoringService(batcher)
+    batch_task = asyncio.create_task(batcher.run())
+    server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        return await scenario(port)
+    finally:
+        server.close()
+        batch_task.cancel()
+
+
+def test_bad_record_does_not_stop_batching():
+    bad = {**GOOD_RECORD, "subscription_age": {"x": 1}}
+
+    async def scenario(port):
+        # Поганий і добрий запити в одному мікробатчі, потім ще один добрий
+        together = await asyncio.gather(
+            _post(port, "/predict", bad), _post(port, "/predict", GOOD_RECORD)
+        )
+        after = await _post(port, "/predict", GOOD_RECORD)
+        return together, after
+
+    (bad_response, good_response), after = asyncio.run(_run_service(scenario))
+    assert bad_response[0] >= 400
+    assert good_response[0] == 200
+    assert 0.0 <= good_response[1]["probability"] <= 1.0
+    assert after[0] == 200
+    assert after[1]["probability"] == good_response[1]["probability"]
+
+
+def test_bad_batch_payload_returns_error_status():
+    async def scenario(port):
+        return await _post(port, "/predict/batch", [{"subscription_age": [1, 2]}])
+
+    status, response = asyncio.run(_run_service(scenario))
+    assert status in (400, 500)
+    assert "error" in response
+
+
+def test_failed_batch_rows_counted_once_in_drift_monitor():
+    registry = get_registry()
+    batcher = MicroBatcher(registry)
+    monitor = get_drift_monitor(registry.get().stats)
+    assert monitor is not None
+    monitor.check()
+    bad = {**GOOD_RECORD, "subscription_age": {"x": 1}}
+    items = [([GOOD_RECORD, GOOD_RECORD], None), ([bad], None), ([GOOD_RECORD], None)]
+
+    results = batcher._score_batch(items)
+
+    assert isinstance(results[1], Exception)
+    # Лише три спрогнозовані добрі рядки; рядки невдалого батчу не враховуються двічі
+    assert monitor.snapshot()["window_rows"] == 3